@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import collections
+import logging
+import threading
+import typing
+
+from openstack_migrate.db import models
+from openstack_migrate.handlers import base
+
+LOG = logging.getLogger()
+
+# (resource_type, source_id)
+ResourceKey = tuple[str, str]
+
+
+class RunCache:
+    """Run-scoped cache of resource dependencies and migration lookups.
+
+    Shared dependencies (e.g. networks, flavors, projects) may be referenced
+    by a large number of resources. This cache ensures that the associated
+    resources are only retrieved once per run and avoids repeated database
+    queries.
+
+    The cached migrations must be updated whenever a migration record is
+    saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._associated_resources: dict[ResourceKey, list[base.Resource]] = {}
+        self._migrations: dict[ResourceKey, models.Migration | None] = {}
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    def get_associated_resources(
+        self,
+        key: ResourceKey,
+        fetch: typing.Callable[[], list[base.Resource]],
+    ) -> list[base.Resource]:
+        """Get the associated resources, using the callback on cache miss."""
+        with self._lock:
+            if key in self._associated_resources:
+                self.stats["associated_resources_hit"] += 1
+                return list(self._associated_resources[key])
+
+        # Avoid holding the lock while querying the source cloud.
+        associated_resources = fetch()
+        with self._lock:
+            self.stats["associated_resources_miss"] += 1
+            self._associated_resources[key] = list(associated_resources)
+        return associated_resources
+
+    def get_latest_migration(
+        self,
+        key: ResourceKey,
+        fetch: typing.Callable[[], models.Migration | None],
+    ) -> models.Migration | None:
+        """Get the latest migration of a resource, if any."""
+        with self._lock:
+            if key in self._migrations:
+                self.stats["migration_hit"] += 1
+                return self._migrations[key]
+
+        migration = fetch()
+        with self._lock:
+            self.stats["migration_miss"] += 1
+            # Do not overwrite entries updated in the meantime.
+            self._migrations.setdefault(key, migration)
+            return self._migrations[key]
+
+    def set_latest_migration(self, migration: models.Migration):
+        """Update the cache after a migration record was saved."""
+        key = (str(migration.resource_type), str(migration.source_id))
+        with self._lock:
+            self._migrations[key] = migration
+
+    def get_latest_migrations(
+        self,
+        keys: list[ResourceKey],
+        fetch: typing.Callable[
+            [list[ResourceKey]], dict[ResourceKey, models.Migration]
+        ],
+    ) -> dict[ResourceKey, models.Migration | None]:
+        """Get the latest migrations of multiple resources.
+
+        The callback is used to retrieve the missing entries at once.
+        """
+        with self._lock:
+            missing = [
+                key for key in dict.fromkeys(keys) if key not in self._migrations
+            ]
+            self.stats["migration_hit"] += len(keys) - len(missing)
+
+        if missing:
+            migrations = fetch(missing)
+            with self._lock:
+                self.stats["migration_miss"] += len(missing)
+                for key in missing:
+                    self._migrations.setdefault(key, migrations.get(key))
+
+        with self._lock:
+            return {key: self._migrations.get(key) for key in keys}
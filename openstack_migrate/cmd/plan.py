@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import logging
+import typing
+
+import click
+import prettytable
+
+from openstack_migrate import manager
+from openstack_migrate.cmd import start as start_cmd
+from openstack_migrate.db import api
+
+LOG = logging.getLogger()
+
+
+@click.command("plan")
+@click.option("--resource-type", help="The migrated resource type (e.g. image, secret)")
+@click.option(
+    "--id",
+    "resource_ids",
+    multiple=True,
+    help="One or more resources to migrate.",
+)
+@click.option(
+    "--filter",
+    "resource_filters",
+    multiple=True,
+    help="One or more filters used to select the resources to migrate.",
+)
+@click.option("--all", "migrate_all", is_flag=True, help="Migrate all resources.")
+@click.option(
+    "--cleanup-source",
+    is_flag=True,
+    help="Cleanup the resources on the source side if the migration succeeds.",
+)
+@click.option(
+    "--include-dependencies",
+    is_flag=True,
+    help="Automatically migrate associated resources.",
+)
+@click.option(
+    "--include-members",
+    is_flag=True,
+    help="Automatically migrate member resources (contained resources).",
+)
+def create_plan(
+    resource_type: str,
+    resource_ids: tuple[str],
+    resource_filters: tuple[str],
+    migrate_all: bool,
+    cleanup_source: bool,
+    include_dependencies: bool,
+    include_members: bool,
+):
+    """Create a migration plan.
+
+    Resolves the dependencies of the specified resources and stores the
+    resulting migration plan, which can be applied using the "apply" command.
+    """
+    if not resource_type:
+        raise click.ClickException("No resource type specified.")
+    if resource_ids and (resource_filters or migrate_all):
+        raise click.ClickException(
+            "'--id' cannot be combined with '--filter' or '--all'."
+        )
+    if not resource_ids and not resource_filters and not migrate_all:
+        raise click.ClickException(
+            "No resources specified. Use '--id', '--filter' or '--all'."
+        )
+
+    mgr = manager.OpenstackMigrationManager()
+    plan = mgr.create_migration_plan(
+        resource_type,
+        resource_filters=start_cmd.parse_resource_filters(resource_filters),
+        resource_ids=list(resource_ids),
+        cleanup_source=cleanup_source,
+        include_dependencies=include_dependencies,
+        include_members=include_members,
+    )
+    _show_plan(plan.uuid, "table")
+
+
+@click.command("apply")
+@click.argument("plan_id")
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The maximum number of resources migrated in parallel.",
+)
+def apply_plan(plan_id: str, concurrency: int):
+    """Apply a migration plan."""
+    if not plan_id:
+        raise click.ClickException("No migration plan id specified.")
+
+    mgr = manager.OpenstackMigrationManager()
+    mgr.apply_migration_plan(plan_id, concurrency=concurrency)
+
+
+@click.command("show-plan")
+@click.argument("plan_id")
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(["json", "table"]),
+    default="table",
+    help="Set the output format.",
+)
+def show_plan(output_format: str, plan_id: str):
+    """Show a migration plan, including the current migration status."""
+    if not plan_id:
+        raise click.ClickException("No migration plan id specified.")
+    _show_plan(plan_id, output_format)
+
+
+def _show_plan(plan_id: str, output_format: str):
+    plans = api.get_migration_plans(uuid=plan_id, include_archived=True)
+    if not plans:
+        raise click.ClickException(f"Could not find the specified plan: {plan_id}")
+    plan = plans[0]
+
+    nodes = api.get_migration_plan_nodes(plan.id)
+    migrations = api.get_latest_migrations(
+        [(node.resource_type, node.source_id) for node in nodes]
+    )
+    entries: list[dict[str, typing.Any]] = []
+    for node in nodes:
+        migration = migrations.get((node.resource_type, node.source_id))
+        entries.append(
+            {
+                "level": node.level,
+                "resource_type": node.resource_type,
+                "source_id": node.source_id,
+                "requested": node.requested,
+                "cleanup_source": node.cleanup_source,
+                "status": migration.status if migration else "pending",
+                "destination_id": migration.destination_id if migration else None,
+            }
+        )
+
+    if output_format == "json":
+        print(json.dumps({"plan": plan.to_dict(), "nodes": entries}))
+        return
+
+    table = prettytable.PrettyTable()
+    table.title = f"Migration plan {plan.uuid} ({plan.status})"
+    table.field_names = [
+        "Level",
+        "Resource type",
+        "Source ID",
+        "Requested",
+        "Cleanup source",
+        "Status",
+        "Destination ID",
+    ]
+    for entry in entries:
+        table.add_row(
+            [
+                entry["level"],
+                entry["resource_type"],
+                entry["source_id"],
+                entry["requested"],
+                entry["cleanup_source"],
+                entry["status"],
+                entry["destination_id"],
+            ]
+        )
+    print(table)
@@ -1,17 +1,9 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
-import logging
-
 import click
 
-from openstack_migrate import config, constants
-from openstack_migrate.db import api as db_api
-from openstack_migrate.db import models
-from openstack_migrate.handlers import factory
-
-CONFIG = config.get_config()
-LOG = logging.getLogger()
+from openstack_migrate import manager
 
 
 @click.command("register-external")
@@ -45,25 +37,7 @@ def register_external(
     if not resource_type:
         raise click.ClickException("Unspecified resource type.")
 
-    migrations = db_api.get_migrations(
-        resource_type=resource_type,
-        source_id=source_resource_id,
-        destination_id=destination_resource_id,
-        status=constants.STATUS_COMPLETED,
-    )
-    if migrations:
-        LOG.warning("Found existing migration: %s, skipping...", migrations[0].uuid)
-        return
-
-    handler = factory.get_migration_handler(resource_type)
-    migration = models.Migration(
-        service=handler.get_service_type(),
-        source_cloud=CONFIG.source_cloud_name,
-        destination_cloud=CONFIG.destination_cloud_name,
-        source_id=source_resource_id,
-        resource_type=resource_type,
-        destination_id=destination_resource_id,
-        status=constants.STATUS_COMPLETED,
-        external=True,
+    mgr = manager.OpenstackMigrationManager()
+    mgr.register_external_migration(
+        resource_type, source_resource_id, destination_resource_id
     )
-    migration.save()
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+
+import click
+
+from openstack_migrate import constants, manager
+from openstack_migrate.db import api
+
+LOG = logging.getLogger()
+
+
+@click.command("resume")
+@click.argument("migration_ids", nargs=-1)
+@click.option(
+    "--all",
+    "resume_all",
+    is_flag=True,
+    help="Resume all the interrupted migrations (in-progress status).",
+)
+@click.option(
+    "--cleanup-source",
+    is_flag=True,
+    help="Cleanup the resources on the source side if the migration succeeds.",
+)
+def resume_migrations(
+    migration_ids: tuple[str, ...], resume_all: bool, cleanup_source: bool
+):
+    """Resume interrupted or failed migrations.
+
+    The migration steps completed by previous attempts (e.g. volume uploads)
+    are skipped. Make sure that the specified migrations are not being
+    processed by other openstack-migrate instances.
+    """
+    if not migration_ids and not resume_all:
+        raise click.ClickException(
+            "No migration specified. Specify '--all' to resume all the "
+            "interrupted migrations."
+        )
+
+    migration_ids = tuple(migration_ids)
+    if resume_all:
+        migration_ids += tuple(
+            str(migration.uuid)
+            for migration in api.get_migrations(
+                status=constants.STATUS_IN_PROGRESS, ascending=True
+            )
+            if migration.uuid not in migration_ids
+        )
+
+    mgr = manager.OpenstackMigrationManager()
+    failed = []
+    for migration_id in migration_ids:
+        try:
+            mgr.resume_migration(migration_id, cleanup_source=cleanup_source)
+        except Exception as ex:
+            LOG.error("Unable to resume migration %s: %r", migration_id, ex)
+            failed.append(migration_id)
+
+    if failed:
+        raise click.ClickException(f"Unable to resume migrations: {failed}")
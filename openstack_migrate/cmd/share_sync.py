@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import click
+
+from openstack_migrate import config, manager
+
+CONFIG = config.get_config()
+
+
+@click.command("share-sync")
+@click.argument("migration_id")
+@click.option(
+    "--passes",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The maximum number of delta passes, stopping once the shares are in sync.",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help=(
+        "Verify the share data after the sync, using the 'share_verification' "
+        "mode or a full verification if disabled."
+    ),
+)
+@click.option(
+    "--final",
+    is_flag=True,
+    help=(
+        "Perform the final sync, completing the migration. The source share "
+        "clients must be stopped."
+    ),
+)
+@click.option(
+    "--cleanup-source",
+    is_flag=True,
+    help="Remove the source share after the final sync.",
+)
+def sync_share(
+    migration_id: str, passes: int, verify: bool, final: bool, cleanup_source: bool
+):
+    """Transfer the share data modified since the previous copy.
+
+    Only the files that were modified since the previous copy are transferred,
+    while the files that were deleted from the source share are removed from
+    the destination share. Stop the source share clients before performing the
+    final sync, which completes live pre-copied share migrations.
+    """
+    verification = config.ShareVerification.disabled
+    if verify:
+        verification = CONFIG.share_verification
+        if verification == config.ShareVerification.disabled:
+            verification = config.ShareVerification.full
+    mgr = manager.OpenstackMigrationManager()
+    mgr.sync_share_data(
+        migration_id,
+        passes=passes,
+        verification=verification,
+        final=final,
+        cleanup_source=cleanup_source,
+    )
@@ -32,13 +32,14 @@ def show_migration(output_format: str, migration_id: str):
     if len(migrations) > 1:
         raise click.ClickException(f"Multiple migrations found: {migration_id}")
 
+    steps = api.get_migration_steps(migrations[0].id)
     if output_format == "table":
-        _table_format(migrations[0])
+        _table_format(migrations[0], steps)
     else:
-        _json_format(migrations[0])
+        _json_format(migrations[0], steps)
 
 
-def _table_format(migration: models.Migration):
+def _table_format(migration: models.Migration, steps: list[models.MigrationStep]):
     table = prettytable.PrettyTable()
     table.title = "Migration"
     table.field_names = ["Field", "Value"]
@@ -57,6 +58,13 @@ def _table_format(migration: models.Migration):
         "archived",
         "source_removed",
         "external",
+        "reused",
+        "checksum",
+        "hash_algo",
+        "hash_value",
+        "bytes_transferred",
+        "transfer_metrics",
+        "content_manifest",
     ]
 
     for field in fields:
@@ -65,6 +73,23 @@ def _table_format(migration: models.Migration):
         table.add_row([table_field_name, value])
     print(table)
 
+    if steps:
+        steps_table = prettytable.PrettyTable()
+        steps_table.title = "Migration steps"
+        steps_table.field_names = ["Name", "Status", "Updated at", "Error message"]
+        for step in steps:
+            steps_table.add_row(
+                [
+                    step.name,
+                    step.status,
+                    step.updated_at or step.created_at,
+                    step.error_message,
+                ]
+            )
+        print(steps_table)
 
-def _json_format(migration: models.Migration):
-    print(json.dumps(migration.to_dict()))
+
+def _json_format(migration: models.Migration, steps: list[models.MigrationStep]):
+    migration_dict = migration.to_dict()
+    migration_dict["steps"] = [step.to_dict() for step in steps]
+    print(json.dumps(migration_dict))
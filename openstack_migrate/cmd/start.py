@@ -82,6 +82,13 @@ def start_migration(
     is_flag=True,
     help="Automatically migrate member resources (contained resources).",
 )
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The maximum number of resources migrated in parallel.",
+)
 def start_batch_migration(
     resource_type: str,
     resource_filters: tuple[str],
@@ -90,6 +97,7 @@ def start_batch_migration(
     cleanup_source: bool,
     include_dependencies: bool,
     include_members: bool,
+    concurrency: int,
 ):
     """Migrate multiple resources that match the filters."""
     if not resource_type:
@@ -99,15 +107,7 @@ def start_batch_migration(
             "No filters specified. Specify '--all' to migrate all resources."
         )
 
-    resource_filters_dict: dict[str, str] = {}
-    for str_filter in resource_filters or []:
-        if ":" not in str_filter:
-            raise click.ClickException(
-                "Invalid resource filter, "
-                f"expecting 'key:value' arguments: {str_filter}"
-            )
-        key, val = str_filter.split(":", 1)
-        resource_filters_dict[key.replace("-", "_")] = val
+    resource_filters_dict = parse_resource_filters(resource_filters)
 
     mgr = manager.OpenstackMigrationManager()
     mgr.perform_batch_migration(
@@ -117,4 +117,19 @@ def start_batch_migration(
         cleanup_source=cleanup_source,
         include_dependencies=include_dependencies,
         include_members=include_members,
+        concurrency=concurrency,
     )
+
+
+def parse_resource_filters(resource_filters: tuple[str, ...]) -> dict[str, str]:
+    """Parse "key:value" resource filters."""
+    resource_filters_dict: dict[str, str] = {}
+    for str_filter in resource_filters or []:
+        if ":" not in str_filter:
+            raise click.ClickException(
+                "Invalid resource filter, "
+                f"expecting 'key:value' arguments: {str_filter}"
+            )
+        key, val = str_filter.split(":", 1)
+        resource_filters_dict[key.replace("-", "_")] = val
+    return resource_filters_dict
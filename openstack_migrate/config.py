@@ -18,6 +18,69 @@ class LogLevel(str, Enum):
     error = "error"
 
 
+class ImageUploadMethod(str, Enum):
+    """The method used to upload images to the destination cloud."""
+
+    # Upload the data directly ("PUT /v2/images/{id}/file").
+    upload = "upload"
+    # Stage the data and then use the Glance image import.
+    glance_direct = "glance-direct"
+
+
+class ImageTransferMode(str, Enum):
+    """The method used to transfer image data."""
+
+    # Stream the data through the migration host.
+    streaming = "streaming"
+    # Let the destination Glance service retrieve the data using the
+    # "web-download" import method.
+    web_download = "web-download"
+
+
+class ImageDeduplication(str, Enum):
+    """Whether to reuse identical images found on the destination cloud."""
+
+    # Always transfer the image data.
+    disabled = "disabled"
+    # Reuse images having the same hash, owner and visibility.
+    same_owner = "same-owner"
+    # Reuse images having the same hash, regardless of owner and visibility.
+    any = "any"
+
+
+class VolumeTransferBackend(str, Enum):
+    """The method used to transfer volume data."""
+
+    # Upload the volume to Glance, migrate the image and create the
+    # destination volume from the migrated image.
+    glance = "glance"
+    # Attach the source and destination volumes locally using "os-brick" and
+    # copy the data directly.
+    block_copy = "block-copy"
+
+
+class ShareVerification(str, Enum):
+    """Whether to verify the share data once copied."""
+
+    disabled = "disabled"
+    # Hash the entire files on both sides.
+    full = "full"
+    # Only hash a few blocks of each file.
+    sampled = "sampled"
+
+
+class ApiRateLimit(BaseModel):
+    """Openstack API rate limit."""
+
+    # Token bucket refill rate. Unlimited if unset.
+    requests_per_second: float | None = None
+    # Token bucket size, the maximum number of requests that can be
+    # performed at once.
+    burst: int | None = None
+    # The maximum number of concurrent requests. Unlimited if unset.
+    max_in_flight: int | None = None
+
+
 class OpenstackMigrateConfig(BaseModel):
     """openstack-migrate coniguration."""
 
@@ -45,9 +108,98 @@ class OpenstackMigrateConfig(BaseModel):
     # dependencies and migrated automatically if "--include-dependencies" is set.
     multitenant_mode: bool = True
 
+    # Resource status polling intervals (seconds). Pending resources of the
+    # same type and project are polled at once. The interval increases
+    # while the resource statuses remain unchanged.
+    status_poll_min_interval: float = 2
+    status_poll_max_interval: float = 30
+
+    # Openstack API rate limits, applied separately to each cloud. The keys
+    # are service names (e.g. "nova", "cinder", "glance"), "<cloud>:<service>"
+    # for cloud specific limits or "default".
+    api_rate_limits: dict[str, ApiRateLimit] = {}
+
+    # How often to log the progress of data transfers (seconds), 0 to disable.
+    transfer_progress_interval: int = 60
+    # Estimated data transfer rate (bytes per second), used to rank the
+    # resources by expected migration duration when performing parallel
+    # migrations. Resources without a known size use historical durations.
+    estimated_transfer_rate: int = 100 * 1024 * 1024  # 100MB/s
+
+    # The initial chunk size, adapted at runtime based on the observed
+    # transfer rate unless "image_transfer_adaptive_chunk_size" is disabled.
     image_transfer_chunk_size: int = 32 * 1024 * 1024  # 32MB
+    image_transfer_adaptive_chunk_size: bool = True
+    image_transfer_min_chunk_size: int = 1024 * 1024  # 1MB
+    image_transfer_max_chunk_size: int = 256 * 1024 * 1024  # 256MB
+    # The memory limit of the chunk buffers, shared by concurrent transfers.
+    image_transfer_memory_limit: int = 1024 * 1024 * 1024  # 1GB
+    # The number of chunk buffers used by image transfers. The source download
+    # may get ahead of the destination upload (and vice versa) by this many
+    # chunks.
+    image_transfer_buffer_count: int = 4
+    # Interrupted image downloads are resumed using HTTP range requests.
+    image_transfer_retries: int = 3
+    # "glance-direct" stages the image data before importing it, allowing
+    # resumed migrations to skip the data transfer. Requires the destination
+    # Glance service to enable the "glance-direct" import method.
+    image_upload_method: ImageUploadMethod = ImageUploadMethod.upload
+    image_transfer_mode: ImageTransferMode = ImageTransferMode.streaming
+    # The source image URL template used by "web-download" transfers,
+    # the "{image_id}" placeholder being replaced with the source image id.
+    image_web_download_url: str | None = None
+    # Optional Swift temporary URL key used to sign the source image URLs,
+    # which expire after "image_web_download_url_ttl" seconds.
+    image_web_download_temp_url_key: str | None = None
+    image_web_download_url_ttl: int = 3600
+    # How much to wait for Glance image imports (seconds).
+    image_import_timeout: int = 3600
+    # Download the images to "temporary_migration_dir" before uploading them,
+    # allowing failed downloads to be resumed by subsequent attempts.
+    image_spool_enabled: bool = False
+    # The size limit (bytes) of the local image cache, stored under
+    # "temporary_migration_dir" and keyed by the image hash. Images that
+    # share the same content are downloaded only once, the least recently
+    # used images being evicted when reaching the limit. Disabled if 0.
+    image_cache_size: int = 0
+    # Convert raw images to the specified format (e.g. qcow2) using
+    # "qemu-img" before uploading them, skipping the unallocated data.
+    image_raw_conversion_format: str | None = None
+    # Reuse destination images that have the same hash as the source image
+    # instead of transferring the image data.
+    image_deduplication: ImageDeduplication = ImageDeduplication.disabled
+    # The destination image index used for deduplication is rebuilt once
+    # older than the specified interval (seconds).
+    image_deduplication_index_ttl: int = 600
 
     volume_upload_timeout: int = 1800
+    # The maximum number of volume and instance disk uploads to the source
+    # Glance service performed at the same time, across all migrations.
+    # Unlimited if 0.
+    max_concurrent_disk_exports: int = 0
+    # The maximum number of associated resources migrated concurrently for
+    # a given resource (e.g. the volumes attached to an instance, the
+    # instance root disk being exported in the meantime). Set to 1 to
+    # migrate them one after another.
+    max_concurrent_dependencies: int = 4
+    # The disk format used when uploading volumes to Glance. Sparse formats
+    # (e.g. qcow2) reduce the amount of transferred data.
+    volume_upload_disk_format: str = "raw"
+    # The method used to transfer the volume data. The "block-copy" backend
+    # requires the "os-brick" library and access to both storage backends.
+    volume_transfer_backend: VolumeTransferBackend = VolumeTransferBackend.glance
+    # The size of the reads performed by the "block-copy" backend.
+    volume_block_copy_chunk_size: int = 8 * 1024 * 1024
+    # Zero out the destination volume ranges that correspond to all-zero
+    # source blocks, which are otherwise skipped. May be disabled if the
+    # destination storage backend is known to provide empty volumes.
+    volume_block_copy_zero_destination: bool = True
+    # The local IP used to attach volumes. If not provided, it will be
+    # determined based on the Cinder endpoint.
+    volume_attach_local_ip: str | None = None
+    # "os-brick" settings, used to attach volumes locally.
+    os_brick_root_helper: str = "sudo"
+    os_brick_use_multipath: bool = False
     # How much to wait for OpenStack resource provisioning.
     resource_creation_timeout: int = 300
 
@@ -89,6 +241,29 @@ class OpenstackMigrateConfig(BaseModel):
     # share that's being migrated. If not provided, it will be detected
     # automatically.
     manila_local_access_ip: str | None = None
+    # Keep the shares mounted after use, allowing subsequent operations to
+    # reuse the mounts and temporary access rules. The shares are unmounted
+    # at the end of the run or when reaching "manila_max_mounted_shares"
+    # (unlimited if 0).
+    manila_reuse_mounts: bool = True
+    manila_max_mounted_shares: int = 16
+    # The share data is copied by a pool of worker threads, the small files
+    # being copied in batches of "share_copy_batch_size" files.
+    share_copy_workers: int = 16
+    share_copy_batch_size: int = 64
+    # Copy the share data while the source share is in use, followed by
+    # up to "share_delta_passes" incremental passes that transfer the files
+    # modified in the meantime. The final sync is performed using the
+    # "share-sync" command once the source share clients are stopped.
+    share_live_precopy: bool = False
+    share_delta_passes: int = 2
+    # Compare the destination share contents with the source share once the
+    # data was copied. Sampled verifications only hash
+    # "share_verification_sample_blocks" blocks of each file. Full
+    # verifications record a content manifest, allowing subsequent delta
+    # syncs to skip files whose contents did not change.
+    share_verification: ShareVerification = ShareVerification.disabled
+    share_verification_sample_blocks: int = 16
 
     # The name of the "member" Keystone role. When migrating certain resources
     # to other tenants (e.g. instances, volumes, shares), we need to a project
@@ -7,6 +7,11 @@ STATUS_COMPLETED = "completed"
 STATUS_SOURCE_CLEANUP_FAILED = "source-cleanup-failed"
 STATUS_PENDING_MEMBERS = "pending-members"
 STATUS_PENDING_CLEANUP = "pending-cleanup"
+# The data was copied while the source resource was in use (e.g. share live
+# pre-copy), a final sync being required once the source clients are stopped.
+STATUS_PENDING_FINAL_SYNC = "pending-final-sync"
+# Migration plans that haven't been applied yet.
+STATUS_PLANNED = "planned"
 
 # If the resource is in any of the following states, it has been
 # migrated to the destination cloud and we've obtained a destination
@@ -16,7 +21,17 @@ LIST_STATUS_MIGRATED: list[str] = [
     STATUS_SOURCE_CLEANUP_FAILED,
     STATUS_PENDING_MEMBERS,
     STATUS_PENDING_CLEANUP,
+    STATUS_PENDING_FINAL_SYNC,
 ]
 
+# Name prefixes of the temporary images used to transfer the volume and
+# instance disks, removed once the migration completes.
+VOLUME_IMAGE_PREFIX = "volmigr-"
+INSTANCE_IMAGE_PREFIX = "instmigr-"
+TEMPORARY_IMAGE_PREFIXES = (VOLUME_IMAGE_PREFIX, INSTANCE_IMAGE_PREFIX)
+
 MANILA_MICROVERSION = "2.45"
 NOVA_MICROVERSION = "2.93"  # Zed
+
+# Cinder and Manila report the volume and share sizes in GiB.
+GiB = 1024**3
@@ -2,15 +2,21 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+import uuid
 
+from sqlalchemy import func, inspect, text, tuple_
 from sqlalchemy.sql.expression import asc, desc
 
-from openstack_migrate import config
+from openstack_migrate import config, constants
 from openstack_migrate.db import models, session_utils
 
 CONFIG = config.get_config()
 LOG = logging.getLogger()
 
+# Each resource key uses two bound parameters. Older SQLite versions
+# do not accept more than 999 parameters per query.
+RESOURCE_KEY_BATCH_SIZE = 400
+
 
 def initialize():
     """Initialize the database."""
@@ -26,6 +32,32 @@ def initialize():
 def create_tables():
     """Create the tables, if missing."""
     models.BaseModel.metadata.create_all(session_utils.engine)
+    _add_missing_columns()
+    # "create_all" skips the indexes of existing tables.
+    for table in models.BaseModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(session_utils.engine, checkfirst=True)
+
+
+def _add_missing_columns():
+    """Add the columns introduced after the tables were created."""
+    inspector = inspect(session_utils.engine)
+    with session_utils.engine.begin() as connection:
+        for table in models.BaseModel.metadata.sorted_tables:
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+            }
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                LOG.info("Adding database column: %s.%s", table.name, column.name)
+                column_type = column.type.compile(dialect=session_utils.engine.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {column_type}"
+                    )
+                )
 
 
 @session_utils.ensure_session
@@ -49,6 +81,65 @@ def get_migrations(
     )
 
 
+@session_utils.ensure_session
+def get_latest_migrations(
+    resource_keys: list[tuple[str, str]],
+    session=None,
+    include_archived=False,
+) -> dict[tuple[str, str], models.Migration]:
+    """Retrieve the latest migration of each specified resource.
+
+    :param resource_keys: a list of (resource_type, source_id) tuples
+    :returns: a dict containing the latest migration of each resource,
+        using (resource_type, source_id) keys. Resources that were never
+        migrated are omitted.
+    """
+    resource_keys = list(dict.fromkeys(resource_keys))
+    latest_migrations: dict[tuple[str, str], models.Migration] = {}
+    for idx in range(0, len(resource_keys), RESOURCE_KEY_BATCH_SIZE):
+        query = session.query(models.Migration).filter(
+            tuple_(models.Migration.resource_type, models.Migration.source_id).in_(
+                resource_keys[idx : idx + RESOURCE_KEY_BATCH_SIZE]
+            )
+        )
+        if not include_archived:
+            query = query.filter_by(archived=False)
+        query = query.order_by(
+            desc(models.Migration.created_at), desc(models.Migration.id)
+        )
+        for migration in query.all():
+            key = (str(migration.resource_type), str(migration.source_id))
+            latest_migrations.setdefault(key, migration)
+    return latest_migrations
+
+
+@session_utils.ensure_session
+def get_average_migration_durations(
+    session=None, include_archived=False
+) -> dict[str, float]:
+    """Retrieve the average duration of completed migrations (seconds).
+
+    :returns: a dict containing the average duration of each resource type.
+    """
+    duration = (
+        func.julianday(models.Migration.updated_at)
+        - func.julianday(models.Migration.created_at)
+    ) * 86400
+    query = session.query(models.Migration.resource_type, func.avg(duration)).filter(
+        models.Migration.status == constants.STATUS_COMPLETED,
+        models.Migration.updated_at.isnot(None),
+    )
+    if not include_archived:
+        query = query.filter_by(archived=False)
+    return {
+        str(resource_type): float(avg_duration)
+        for resource_type, avg_duration in query.group_by(
+            models.Migration.resource_type
+        ).all()
+        if avg_duration is not None
+    }
+
+
 @session_utils.ensure_session
 def delete_migrations(session=None, soft_delete=True, **filters):
     """Delete migrations.
@@ -73,3 +164,95 @@ def restore_migrations(session=None, soft_delete=True, **filters):
     session.query(models.Migration).filter_by(**filters).update(
         {"archived": False},
     )
+
+
+@session_utils.ensure_session
+def get_migration_steps(
+    migration_id: int, session=None, **filters
+) -> list[models.MigrationStep]:
+    """Retrieve the steps of a migration, in the order of execution."""
+    return (
+        session.query(models.MigrationStep)
+        .filter_by(migration_id=migration_id, **filters)
+        .order_by(asc("id"))
+        .all()
+    )
+
+
+@session_utils.ensure_session
+def create_migration_plan(
+    plan: models.MigrationPlan,
+    nodes: list[models.MigrationPlanNode],
+    edges: list[tuple[int, int, str]],
+    session=None,
+) -> models.MigrationPlan:
+    """Save a migration plan along with its nodes and edges.
+
+    The edges are specified as (node index, required node index, relation)
+    tuples, referencing the specified list of nodes.
+    """
+    for record in [plan, *nodes]:
+        if not record.uuid:
+            record.uuid = str(uuid.uuid4())
+
+    session.add(plan)
+    session.flush()
+
+    for node in nodes:
+        node.plan_id = plan.id
+    session.add_all(nodes)
+    session.flush()
+
+    session.add_all(
+        [
+            models.MigrationPlanEdge(
+                uuid=str(uuid.uuid4()),
+                plan_id=plan.id,
+                node_id=nodes[node_idx].id,
+                required_node_id=nodes[required_node_idx].id,
+                relation=relation,
+            )
+            for node_idx, required_node_idx, relation in edges
+        ]
+    )
+    session.flush()
+    session.refresh(plan)
+    return plan
+
+
+@session_utils.ensure_session
+def get_migration_plans(
+    order_by="created_at",
+    ascending=False,
+    session=None,
+    include_archived=False,
+    **filters,
+) -> list[models.MigrationPlan]:
+    """Retrieve migration plans."""
+    order_type = asc if ascending else desc
+    if not include_archived:
+        filters["archived"] = False
+
+    return (
+        session.query(models.MigrationPlan)
+        .filter_by(**filters)
+        .order_by(order_type(order_by))
+        .all()
+    )
+
+
+@session_utils.ensure_session
+def get_migration_plan_nodes(plan_id: int, session=None):
+    """Retrieve the nodes of a migration plan, ordered by level."""
+    return (
+        session.query(models.MigrationPlanNode)
+        .filter_by(plan_id=plan_id)
+        .order_by(asc("level"), asc("id"))
+        .all()
+    )
+
+
+@session_utils.ensure_session
+def get_migration_plan_edges(plan_id: int, session=None):
+    """Retrieve the edges of a migration plan."""
+    return session.query(models.MigrationPlanEdge).filter_by(plan_id=plan_id).all()
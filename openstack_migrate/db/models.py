@@ -5,7 +5,16 @@ import datetime
 import typing
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.ext.declarative import as_declarative
 
 from openstack_migrate.db import session_utils
@@ -60,6 +69,10 @@ class Migration(BaseModel):
     """Migration model."""
 
     __tablename__ = "migrations"
+    __table_args__ = (
+        # Used when looking up the latest migration of a given resource.
+        Index("ix_migrations_resource", "resource_type", "source_id", "created_at"),
+    )
 
     service = Column(Text)
     resource_type = Column(Text)
@@ -76,6 +89,99 @@ class Migration(BaseModel):
     source_removed = Column(Boolean, default=False)
     # Whether the resource was migrated externally.
     external = Column(Boolean, default=False)
+    # Whether an existing destination resource was reused instead of
+    # transferring the resource (e.g. identical images).
+    reused = Column(Boolean, default=False)
+    # The verified digests of the transferred data (e.g. image data),
+    # allowing subsequent checks to skip reading the data again.
+    checksum = Column(Text)
+    hash_algo = Column(Text)
+    hash_value = Column(Text)
+    # The amount of transferred data (bytes) and the JSON encoded transfer
+    # metrics (e.g. duration, rate, phase durations).
+    bytes_transferred = Column(Integer)
+    transfer_metrics = Column(Text)
+    # The JSON encoded results of the latest share data verification,
+    # including the path of the recorded content manifest.
+    content_manifest = Column(Text)
 
     status = Column(Text)
     error_message = Column(Text)
+
+
+class MigrationStep(BaseModel):
+    """Migration step model.
+
+    Migration handlers may checkpoint the steps of multi-step migrations,
+    allowing interrupted migrations to be resumed.
+    """
+
+    __tablename__ = "migration_steps"
+
+    migration_id = Column(Integer, ForeignKey("migrations.id"), index=True)
+    name = Column(Text)
+    status = Column(Text)
+    # JSON encoded step result (e.g. temporary resource ids).
+    result = Column(Text)
+    error_message = Column(Text)
+
+
+class MigrationPlan(BaseModel):
+    """Migration plan model.
+
+    Migration plans contain the resolved dependency graph of a set of
+    resources, allowing it to be executed without querying the source
+    cloud again.
+    """
+
+    __tablename__ = "migration_plans"
+
+    source_cloud = Column(Text)
+    destination_cloud = Column(Text)
+
+    # The requested resource type and filters.
+    resource_type = Column(Text)
+    # JSON encoded filters.
+    resource_filters = Column(Text)
+
+    include_dependencies = Column(Boolean, default=False)
+    include_members = Column(Boolean, default=False)
+    cleanup_source = Column(Boolean, default=False)
+
+    status = Column(Text)
+    error_message = Column(Text)
+
+
+class MigrationPlanNode(BaseModel):
+    """Migration plan node model, describing a resource to be migrated."""
+
+    __tablename__ = "migration_plan_nodes"
+
+    plan_id = Column(Integer, ForeignKey("migration_plans.id"), index=True)
+
+    resource_type = Column(Text)
+    source_id = Column(Text)
+
+    # Nodes from the same topological level do not depend on each other.
+    level = Column(Integer)
+    # Whether the resource was explicitly requested.
+    requested = Column(Boolean, default=False)
+    cleanup_source = Column(Boolean, default=False)
+    # JSON encoded list of associated resources reported by the migration
+    # handler, including the "should_cleanup" flags.
+    associated_resources = Column(Text)
+
+
+class MigrationPlanEdge(BaseModel):
+    """Migration plan edge model.
+
+    The "node" can only be migrated after the "required node".
+    """
+
+    __tablename__ = "migration_plan_edges"
+
+    plan_id = Column(Integer, ForeignKey("migration_plans.id"), index=True)
+    node_id = Column(Integer, ForeignKey("migration_plan_nodes.id"))
+    required_node_id = Column(Integer, ForeignKey("migration_plan_nodes.id"))
+    # "dependency" or "member"
+    relation = Column(Text)
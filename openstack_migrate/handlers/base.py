@@ -2,17 +2,40 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import abc
+import contextlib
+import functools
+import json
 import logging
-import os
+import threading
+import typing
 
-import openstack
 import pydantic
 
 from openstack_migrate import config, constants, exception
+from openstack_migrate.db import api as db_api
+from openstack_migrate.db import models
+from openstack_migrate.transfer import metrics as transfer_metrics
+from openstack_migrate.utils import connection_utils
 
 CONF = config.get_config()
 LOG = logging.getLogger()
 
+_DISK_EXPORT_SEMAPHORE: threading.BoundedSemaphore | None = None
+_DISK_EXPORT_SEMAPHORE_LOCK = threading.Lock()
+
+
+def get_disk_export_semaphore() -> threading.BoundedSemaphore | None:
+    """Retrieve the process-wide disk export semaphore, None if unlimited."""
+    global _DISK_EXPORT_SEMAPHORE
+    if not CONF.max_concurrent_disk_exports:
+        return None
+    with _DISK_EXPORT_SEMAPHORE_LOCK:
+        if not _DISK_EXPORT_SEMAPHORE:
+            _DISK_EXPORT_SEMAPHORE = threading.BoundedSemaphore(
+                CONF.max_concurrent_disk_exports
+            )
+        return _DISK_EXPORT_SEMAPHORE
+
 
 class Resource(pydantic.BaseModel):
     """Resource class.
@@ -45,6 +68,8 @@ class BaseMigrationHandler(abc.ABC):
 
     def __init__(self, *args, **kwargs):
         self._manager = None
+        self._migration: models.Migration | None = None
+        self._metrics: transfer_metrics.TransferMetrics | None = None
 
     @abc.abstractmethod
     def get_service_type(self) -> str:
@@ -126,6 +151,36 @@ class BaseMigrationHandler(abc.ABC):
         """
         return []
 
+    def get_concurrent_associated_resource_types(self) -> list[str]:
+        """Get the associated resource types that may be migrated concurrently.
+
+        Pending associated resources of these types are migrated in parallel,
+        after the other associated resources. Example: the volumes attached
+        to an instance.
+        """
+        return []
+
+    def prepare_migration(self, resource_id: str) -> typing.ContextManager:
+        """Prepare the migration of the specified resource.
+
+        The migration manager enters the returned context before migrating
+        the pending associated resources and calls
+        "perform_individual_migration" within it. Handlers may use it to
+        start the migration steps that do not depend on the associated
+        resources (e.g. exporting the instance root disk), waiting for them
+        when exiting the context.
+        """
+        return contextlib.nullcontext()
+
+    def requires_final_sync(self) -> bool:
+        """Check whether the migrated resources require a final data sync.
+
+        Such migrations remain in the "pending-final-sync" state until the
+        data is synchronized once more and the source resources may not be
+        cleaned up in the meantime.
+        """
+        return False
+
     def get_supported_resource_filters(self) -> list[str]:
         """Get a list of supported resource filters.
 
@@ -133,6 +188,14 @@ class BaseMigrationHandler(abc.ABC):
         """
         return []
 
+    def get_resource_size(self, resource_id: str) -> int | None:
+        """Get the amount of data transferred when migrating the resource.
+
+        Used to estimate the migration duration when scheduling batch
+        migrations. Returns the size in bytes or None if not applicable.
+        """
+        return None
+
     def connect_member_resources_to_parent(
         self,
         parent_resource_id: str | None,
@@ -150,15 +213,8 @@ class BaseMigrationHandler(abc.ABC):
         pass
 
     def _get_openstack_session(self, cloud_name: str):
-        if not CONF.cloud_config_file:
-            raise exception.InvalidInput("No cloud config provided.")
-
-        os.environ["OS_CLIENT_CONFIG_FILE"] = str(CONF.cloud_config_file)
-        return openstack.connect(
-            cloud=cloud_name,
-            compute_api_version=constants.NOVA_MICROVERSION,
-            share_api_version=constants.MANILA_MICROVERSION,
-        )
+        # The connections are shared across handler instances.
+        return connection_utils.get_connection(cloud_name)
 
     def _assign_project_role_to_current_user(
         self,
@@ -180,34 +236,41 @@ class BaseMigrationHandler(abc.ABC):
         )
 
     def _owner_scoped_session(self, session, role_names: list[str], project_id: str):
+        # The role assignments and the project scoped connections are cached
+        # per cloud and project.
+        cloud_name = session.config.name
         for role_name in role_names:
-            self._assign_project_role_to_current_user(session, role_name, project_id)
-        project = session.identity.get_project(project_id)
-        return session.connect_as_project(project)
+            connection_utils.ensure_role_assignment(
+                cloud_name,
+                project_id,
+                role_name,
+                functools.partial(
+                    self._assign_project_role_to_current_user,
+                    session,
+                    role_name,
+                    project_id,
+                ),
+            )
+
+        def _connect():
+            project = session.identity.get_project(project_id)
+            return session.connect_as_project(project)
+
+        return connection_utils.get_connection(cloud_name, project_id, _connect)
 
     @property
     def _source_session(self):
         if not CONF.source_cloud_name:
             raise exception.InvalidInput("No source cloud specified.")
 
-        if not getattr(self, "_cached_source_session", None):
-            self._cached_source_session = self._get_openstack_session(
-                CONF.source_cloud_name
-            )
-
-        return self._cached_source_session
+        return self._get_openstack_session(CONF.source_cloud_name)
 
     @property
     def _destination_session(self):
         if not CONF.destination_cloud_name:
             raise exception.InvalidInput("No destination cloud specified.")
 
-        if not getattr(self, "_cached_destinaton_session", None):
-            self._cached_destinaton_session = self._get_openstack_session(
-                CONF.destination_cloud_name
-            )
-
-        return self._cached_destinaton_session
+        return self._get_openstack_session(CONF.destination_cloud_name)
 
     def _report_identity_dependencies(
         self,
@@ -307,6 +370,122 @@ class BaseMigrationHandler(abc.ABC):
         """
         self._manager = manager
 
+    def _is_reused_destination(self, resource_type: str, source_id: str) -> bool:
+        """Check whether the migration reused an existing destination resource.
+
+        Reused resources were not created by openstack-migrate and must not
+        be removed when cleaning up temporary resources.
+        """
+        migration = self.manager._get_latest_migration(resource_type, source_id)
+        return bool(migration and migration.reused)
+
+    def set_migration(self, migration: models.Migration | None):
+        """Pass the migration record of the resource that is being migrated.
+
+        The migration record is used to checkpoint migration steps, allowing
+        interrupted migrations to be resumed.
+        """
+        self._migration = migration
+
+    def _run_step(self, name: str, func: typing.Callable[[], typing.Any]) -> typing.Any:
+        """Run a migration step, unless completed by a previous attempt.
+
+        The step result must be JSON serializable. It is stored in the database
+        and returned when resuming the migration, without calling the function
+        again.
+        """
+        if not self._migration:
+            return func()
+
+        completed_steps = db_api.get_migration_steps(
+            self._migration.id, name=name, status=constants.STATUS_COMPLETED
+        )
+        if completed_steps:
+            LOG.info(
+                "Skipping completed migration step: %s (migration %s)",
+                name,
+                self._migration.uuid,
+            )
+            return json.loads(completed_steps[-1].result)
+
+        LOG.debug(
+            "Starting migration step: %s (migration %s)", name, self._migration.uuid
+        )
+        step = models.MigrationStep(
+            migration_id=self._migration.id,
+            name=name,
+            status=constants.STATUS_IN_PROGRESS,
+        )
+        step.save()
+        try:
+            result = func()
+        except Exception as ex:
+            step.status = constants.STATUS_FAILED
+            step.error_message = "Migration step failed, error: %r" % ex
+            step.save()
+            raise
+
+        step.result = json.dumps(result)
+        step.status = constants.STATUS_COMPLETED
+        step.save()
+        return result
+
+    @contextlib.contextmanager
+    def _track_transfer(
+        self,
+        name: str,
+        total_bytes: int | None = None,
+        bytes_callback: typing.Callable[[], int] | None = None,
+    ) -> typing.Iterator[transfer_metrics.TransferMetrics]:
+        """Track a data transfer, logging its progress.
+
+        The transfer metrics are recorded in the migration record.
+        """
+        metrics = transfer_metrics.TransferMetrics(
+            name, total_bytes=total_bytes, bytes_callback=bytes_callback
+        )
+        self._metrics = metrics
+        try:
+            with metrics:
+                yield metrics
+        finally:
+            self._metrics = None
+            metrics.log_summary()
+            if self._migration:
+                current = metrics.to_dict()
+                if self._migration.transfer_metrics:
+                    current = transfer_metrics.merge_metrics(
+                        json.loads(self._migration.transfer_metrics), current
+                    )
+                self._migration.bytes_transferred = current["bytes_transferred"]
+                self._migration.transfer_metrics = json.dumps(current)
+
+    @contextlib.contextmanager
+    def _disk_export_slot(self, description: str) -> typing.Iterator[None]:
+        """Limit the number of disk exports performed at the same time.
+
+        Volume and instance disk uploads to the source Glance service are
+        limited across all migrations through "max_concurrent_disk_exports".
+        """
+        semaphore = get_disk_export_semaphore()
+        if not semaphore:
+            yield
+            return
+
+        if not semaphore.acquire(blocking=False):
+            LOG.info("Waiting for a disk export slot: %s", description)
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def _transfer_phase(self, name: str) -> typing.ContextManager:
+        """Measure the duration of a phase of the tracked transfer, if any."""
+        if not self._metrics:
+            return contextlib.nullcontext()
+        return self._metrics.phase(name)
+
     @property
     def manager(self):
         """Access the migration manager."""
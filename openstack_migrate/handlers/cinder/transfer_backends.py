@@ -0,0 +1,323 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Cinder volume transfer backends.
+
+The backends create the destination volume using the source volume data.
+The backend is selected using the "volume_transfer_backend" setting.
+"""
+
+import abc
+import functools
+import json
+import logging
+import os
+import subprocess
+import sys
+import typing
+
+from openstack_migrate import config, constants, exception, poller
+from openstack_migrate.handlers import base
+from openstack_migrate.transfer import blockcopy
+from openstack_migrate.utils import cinder_utils
+
+if typing.TYPE_CHECKING:
+    from openstack_migrate.handlers.cinder import volume
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+class VolumeTransferBackend(abc.ABC):
+    """Transfer the volume data to the destination cloud.
+
+    :param handler: the volume migration handler, used to checkpoint the
+                    migration steps and track the data transfers
+    """
+
+    def __init__(self, handler: "volume.VolumeHandler"):
+        self._handler = handler
+
+    @abc.abstractmethod
+    def transfer_volume(
+        self,
+        source_volume,
+        owner_source_session,
+        owner_destination_session,
+        migrated_associated_resources: list[base.MigratedResource],
+        destination_project_id: str | None,
+    ) -> str:
+        """Create the destination volume, returning its id."""
+
+
+class GlanceVolumeTransferBackend(VolumeTransferBackend):
+    """Transfer the volume data through Glance.
+
+    The volume is uploaded to the source Glance service, the resulting image
+    is migrated and the destination volume is created from the migrated
+    image. Backend agnostic, although the data is written multiple times.
+    """
+
+    def transfer_volume(
+        self,
+        source_volume,
+        owner_source_session,
+        owner_destination_session,
+        migrated_associated_resources: list[base.MigratedResource],
+        destination_project_id: str | None,
+    ) -> str:
+        """Create the destination volume, returning its id."""
+        handler = self._handler
+        # The migration steps are checkpointed, allowing interrupted
+        # migrations to be resumed without uploading the volume again.
+        source_image_id = handler._run_step(
+            "upload-source-image",
+            lambda: (
+                self._upload_source_volume_to_image(
+                    owner_source_session, source_volume
+                ).id
+            ),
+        )
+        destination_image_id: str | None = None
+        succeeded = False
+        try:
+            destination_image_id = handler._run_step(
+                "migrate-image",
+                lambda: (
+                    handler.manager.perform_individual_migration(
+                        resource_type="image",
+                        resource_id=source_image_id,
+                        cleanup_source=True,
+                        include_dependencies=True,
+                    ).destination_id
+                ),
+            )
+            destination_volume_id = handler._run_step(
+                "create-volume",
+                functools.partial(
+                    handler._create_destination_volume,
+                    owner_destination_session,
+                    source_volume,
+                    destination_image_id,
+                    migrated_associated_resources,
+                ),
+            )
+            handler._wait_for_destination_volume(
+                source_volume, destination_volume_id, destination_project_id
+            )
+            succeeded = True
+        finally:
+            if succeeded or not handler._migration:
+                self._delete_temporary_images(source_image_id, destination_image_id)
+            else:
+                LOG.warning(
+                    "Volume migration failed, preserving the temporary images "
+                    "(source: %s, destination: %s). The migration can be "
+                    "resumed using 'openstack-migrate resume %s'.",
+                    source_image_id,
+                    destination_image_id,
+                    handler._migration.uuid,
+                )
+
+        return destination_volume_id
+
+    def _upload_source_volume_to_image(self, owner_source_session, source_volume):
+        handler = self._handler
+        source_session = handler._source_session
+        rand = int.from_bytes(os.urandom(4))
+        image_name = f"{constants.VOLUME_IMAGE_PREFIX}{source_volume.id}-{rand}"
+        LOG.info("Uploading %s volume to image: %s", source_volume.id, image_name)
+        # Cinder does not report the upload progress, the time left is
+        # estimated based on the volume size.
+        with (
+            handler._disk_export_slot(f"volume {source_volume.id}"),
+            handler._track_transfer(
+                f"volume {source_volume.id} upload",
+                total_bytes=(source_volume.size or 0) * constants.GiB,
+            ),
+            handler._transfer_phase("source-upload"),
+        ):
+            response = owner_source_session.block_storage.upload_volume_to_image(
+                source_volume,
+                image_name,
+                force=True,
+                disk_format=CONF.volume_upload_disk_format,
+            )
+            image_id = response["image_id"]
+            LOG.info("Waiting for volume upload to complete. Image id: %s", image_id)
+            poller.wait_for_resource_status(
+                source_session,
+                "image",
+                image_id,
+                list_resources=functools.partial(
+                    source_session.image.images, owner=source_volume.project_id
+                ),
+                get_resource=source_session.image.get_image,
+                status="active",
+                failures=["error"],
+                timeout=CONF.volume_upload_timeout,
+                group_id=source_volume.project_id,
+            )
+        LOG.info("Finished uploading source volume to Glance.")
+        return source_session.get_image(image_id)
+
+    def _delete_temporary_images(
+        self, source_image_id: str, destination_image_id: str | None
+    ):
+        LOG.info("Deleting temporary image on source side: %s", source_image_id)
+        self._handler._source_session.delete_image(source_image_id)
+        if destination_image_id and self._handler._is_reused_destination(
+            "image", source_image_id
+        ):
+            LOG.info(
+                "The destination image was reused, skipping its cleanup: %s",
+                destination_image_id,
+            )
+        elif destination_image_id:
+            LOG.info(
+                "Deleting temporary image on the destination side: %s",
+                destination_image_id,
+            )
+            self._handler._destination_session.delete_image(destination_image_id)
+        else:
+            LOG.info(
+                "No image has been migrated as part of the volume transfer. "
+                "Skipping image cleanup..."
+            )
+
+
+class BlockCopyVolumeTransferBackend(VolumeTransferBackend):
+    """Copy the volume data directly between locally attached volumes.
+
+    An empty destination volume is created, after which both volumes are
+    attached to the local host and the data is copied block by block,
+    skipping the all-zero blocks. The data is written only once, although
+    both storage backends must be accessible from the local host.
+
+    :param handler: the volume migration handler
+    :param attacher: used to attach the volumes locally, defaults to
+                     "os-brick"
+    """
+
+    def __init__(
+        self,
+        handler: "volume.VolumeHandler",
+        attacher: cinder_utils.VolumeAttacher | None = None,
+    ):
+        super().__init__(handler)
+        self._attacher = attacher or cinder_utils.OsBrickVolumeAttacher()
+
+    def transfer_volume(
+        self,
+        source_volume,
+        owner_source_session,
+        owner_destination_session,
+        migrated_associated_resources: list[base.MigratedResource],
+        destination_project_id: str | None,
+    ) -> str:
+        """Create the destination volume, returning its id."""
+        if source_volume.status != "available" and not source_volume.is_multiattach:
+            raise exception.InvalidInput(
+                f"The volume {source_volume.id} must be detached in order to be "
+                f"copied directly, status: {source_volume.status}. Use the "
+                "'glance' volume transfer backend for attached volumes."
+            )
+
+        handler = self._handler
+        # The "create-volume" step of the Glance backend creates the volume
+        # from the migrated image, a different step name is used for the
+        # empty volume.
+        destination_volume_id = handler._run_step(
+            "create-empty-volume",
+            functools.partial(
+                handler._create_destination_volume,
+                owner_destination_session,
+                source_volume,
+                None,
+                migrated_associated_resources,
+            ),
+        )
+        handler._wait_for_destination_volume(
+            source_volume, destination_volume_id, destination_project_id
+        )
+        # The data copy is idempotent, interrupted copies being restarted.
+        handler._run_step(
+            "copy-volume-data",
+            functools.partial(
+                self._copy_volume_data,
+                owner_source_session,
+                owner_destination_session,
+                source_volume,
+                destination_volume_id,
+            ),
+        )
+        return destination_volume_id
+
+    def _copy_volume_data(
+        self,
+        owner_source_session,
+        owner_destination_session,
+        source_volume,
+        destination_volume_id: str,
+    ):
+        handler = self._handler
+        destination_volume = owner_destination_session.block_storage.get_volume(
+            destination_volume_id
+        )
+        with (
+            self._attacher.attach_volume(
+                owner_source_session, source_volume
+            ) as source_path,
+            self._attacher.attach_volume(
+                owner_destination_session, destination_volume
+            ) as destination_path,
+            handler._track_transfer(
+                f"volume {source_volume.id} block copy",
+                total_bytes=(source_volume.size or 0) * constants.GiB,
+            ) as metrics,
+            handler._transfer_phase("block-copy"),
+        ):
+            if os.access(source_path, os.R_OK) and os.access(destination_path, os.W_OK):
+                blockcopy.BlockCopier(
+                    source_path,
+                    destination_path,
+                    chunk_size=CONF.volume_block_copy_chunk_size,
+                    zero_destination=CONF.volume_block_copy_zero_destination,
+                    progress_callback=metrics.add_bytes,
+                ).run()
+            else:
+                stats = self._copy_privileged(source_path, destination_path)
+                metrics.add_bytes(stats["bytes"] + stats["skipped"])
+
+        if source_volume.is_bootable:
+            owner_destination_session.block_storage.set_volume_bootable_status(
+                destination_volume, True
+            )
+
+    def _copy_privileged(self, source_path: str, destination_path: str) -> dict:
+        """Copy the data using a privileged process, returning the copy stats."""
+        cmd = [
+            "sudo",
+            sys.executable,
+            "-m",
+            "openstack_migrate.transfer.blockcopy",
+            "--chunk-size",
+            str(CONF.volume_block_copy_chunk_size),
+            source_path,
+            destination_path,
+        ]
+        if not CONF.volume_block_copy_zero_destination:
+            cmd.append("--no-zero-destination")
+        output = subprocess.check_output(cmd, text=True)
+        return json.loads(output.splitlines()[-1])
+
+
+TRANSFER_BACKENDS: dict[config.VolumeTransferBackend, type[VolumeTransferBackend]] = {
+    config.VolumeTransferBackend.glance: GlanceVolumeTransferBackend,
+    config.VolumeTransferBackend.block_copy: BlockCopyVolumeTransferBackend,
+}
+
+
+def get_transfer_backend(handler: "volume.VolumeHandler") -> VolumeTransferBackend:
+    """Get the configured volume transfer backend."""
+    return TRANSFER_BACKENDS[CONF.volume_transfer_backend](handler)
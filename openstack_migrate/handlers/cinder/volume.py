@@ -12,7 +12,7 @@ There are multiple ways in which an Openstack volume can be migrated:
       the Glance image.
     * Simplest approach and backend agnostic
     * Most inefficient
-    * What we use right now.
+    * The default "glance" volume transfer backend.
 2. Using the Cinder migration API
     * The backends must be part of the same Openstack cloud.
 3. "os-brick"
@@ -21,19 +21,23 @@ There are multiple ways in which an Openstack volume can be migrated:
     * Both storage backends must be accessible
     * May require additional packages and configuration (e.g. iSCSI initiator,
       Ceph client, etc).
+    * The "block-copy" volume transfer backend.
 4. Through backend specific mechanisms
     * Ceph RBD allows live migrating images between clusters.
 5. In-place migration
     * Both clouds use the same external storage backend
     * It's a matter of importing the volume on the destination cloud.
+
+The volume transfer backends are defined in "transfer_backends".
 """
 
+import functools
 import logging
-import os
 from typing import Any
 
-from openstack_migrate import config, exception
+from openstack_migrate import config, constants, exception, poller
 from openstack_migrate.handlers import base
+from openstack_migrate.handlers.cinder import transfer_backends
 
 CONF = config.get_config()
 LOG = logging.getLogger()
@@ -101,26 +105,6 @@ class VolumeHandler(base.BaseMigrationHandler):
 
         return associated_resources
 
-    def _upload_source_volume_to_image(self, owner_source_session, source_volume):
-        rand = int.from_bytes(os.urandom(4))
-        image_name = f"volmigr-{source_volume.id}-{rand}"
-        LOG.info("Uploading %s volume to image: %s", source_volume.id, image_name)
-        response = owner_source_session.block_storage.upload_volume_to_image(
-            source_volume, image_name, force=True
-        )
-        image_id = response["image_id"]
-        LOG.info("Waiting for volume upload to complete. Image id: %s", image_id)
-        image = self._source_session.get_image(image_id)
-        self._source_session.image.wait_for_status(
-            image,
-            status="active",
-            failures=["error"],
-            interval=5,
-            wait=CONF.volume_upload_timeout,
-        )
-        LOG.info("Finished uploading source volume to Glance.")
-        return self._source_session.get_image(image.id)
-
     def perform_individual_migration(
         self,
         resource_id: str,
@@ -156,55 +140,69 @@ class VolumeHandler(base.BaseMigrationHandler):
             owner_source_session = self._source_session
             owner_destination_session = self._destination_session
 
-        source_image = self._upload_source_volume_to_image(
-            owner_source_session, source_volume
+        return transfer_backends.get_transfer_backend(self).transfer_volume(
+            source_volume,
+            owner_source_session,
+            owner_destination_session,
+            migrated_associated_resources,
+            identity_kwargs.get("project_id"),
         )
-        destination_image_id: str | None = None
-        try:
-            image_migration = self.manager.perform_individual_migration(
-                resource_type="image",
-                resource_id=source_image.id,
-                cleanup_source=True,
-                include_dependencies=True,
-            )
-            destination_image_id = image_migration.destination_id
 
-            volume_kwargs = self._build_volume_kwargs(
-                source_volume, destination_image_id, migrated_associated_resources
-            )
-
-            destination_volume = owner_destination_session.block_storage.create_volume(
-                **volume_kwargs
-            )
-            LOG.info("Waiting for volume provisioning: %s", destination_volume.id)
-            self._destination_session.block_storage.wait_for_status(
-                destination_volume,
-                status="available",
-                failures=["error"],
-                interval=5,
-                wait=CONF.volume_upload_timeout,
-            )
-            if source_volume.volume_image_metadata:
-                self._destination_session.block_storage.set_volume_image_metadata(
-                    destination_volume, metadata=source_volume.volume_image_metadata
-                )
-        finally:
-            LOG.info("Deleting temporary image on source side: %s", source_image.id)
-            self._source_session.delete_image(source_image.id)
-            if destination_image_id:
-                LOG.info(
-                    "Deleting temporary image on the destination side: %s",
-                    destination_image_id,
-                )
-                self._destination_session.delete_image(destination_image_id)
-            else:
-                LOG.info(
-                    "No image has been migrated as part of the volume transfer. "
-                    "Skipping image cleanup..."
-                )
+    def _create_destination_volume(
+        self,
+        owner_destination_session,
+        source_volume,
+        destination_image_id: str | None,
+        migrated_associated_resources: list[base.MigratedResource],
+    ) -> str:
+        volume_kwargs = self._build_volume_kwargs(
+            source_volume, destination_image_id, migrated_associated_resources
+        )
 
+        destination_volume = owner_destination_session.block_storage.create_volume(
+            **volume_kwargs
+        )
+        LOG.info("Created destination volume: %s", destination_volume.id)
         return destination_volume.id
 
+    def _wait_for_destination_volume(
+        self,
+        source_volume,
+        destination_volume_id: str,
+        destination_project_id: str | None,
+    ):
+        """Wait for the destination volume to become available.
+
+        The volume creation is checkpointed separately, allowing resumed
+        migrations to wait for the existing volume instead of creating
+        another one. The source volume image metadata is copied afterwards.
+        """
+        LOG.info("Waiting for volume provisioning: %s", destination_volume_id)
+        list_filters = (
+            {"all_projects": True, "project_id": destination_project_id}
+            if destination_project_id
+            else {}
+        )
+        poller.wait_for_resource_status(
+            self._destination_session,
+            "volume",
+            destination_volume_id,
+            list_resources=functools.partial(
+                self._destination_session.block_storage.volumes,
+                details=True,
+                **list_filters,
+            ),
+            get_resource=self._destination_session.block_storage.get_volume,
+            status="available",
+            failures=["error"],
+            timeout=CONF.volume_upload_timeout,
+            group_id=destination_project_id,
+        )
+        if source_volume.volume_image_metadata:
+            self._destination_session.block_storage.set_volume_image_metadata(
+                destination_volume_id, metadata=source_volume.volume_image_metadata
+            )
+
     def _build_volume_kwargs(
         self,
         source_volume: Any,
@@ -245,6 +243,11 @@ class VolumeHandler(base.BaseMigrationHandler):
 
         return kwargs
 
+    def get_resource_size(self, resource_id: str) -> int | None:
+        """Get the volume size in bytes."""
+        source_volume = self._source_session.block_storage.get_volume(resource_id)
+        return source_volume.size * constants.GiB
+
     def get_source_resource_ids(self, resource_filters: dict[str, str]) -> list[str]:
         """Returns a list of resource ids based on the specified filters.
 
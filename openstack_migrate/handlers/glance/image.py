@@ -1,16 +1,33 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
-import hashlib
+import contextlib
 import logging
+import pathlib
+import typing
 
-from openstack_migrate import config, exception
+from openstack import exceptions as openstack_exc
+
+from openstack_migrate import config, exception, poller
 from openstack_migrate.handlers import base
+from openstack_migrate.transfer import (
+    dedup,
+    image_cache,
+    pipeline,
+    resumable,
+    sparse,
+    web_download,
+)
 
 CONF = config.get_config()
 LOG = logging.getLogger()
 
 
+def _is_import_locked(image) -> bool:
+    properties = getattr(image, "properties", None) or {}
+    return bool(properties.get("os_glance_import_task"))
+
+
 class ImageHandler(base.BaseMigrationHandler):
     """Handle Glance image migrations."""
 
@@ -131,35 +148,399 @@ class ImageHandler(base.BaseMigrationHandler):
         )
         kwargs.update(identity_kwargs)
 
-        destination_image = self._destination_session.create_image(
-            data=self._chunked_image_reader(
-                source_image, CONF.image_transfer_chunk_size
+        existing_image_id = self._run_step(
+            "find-duplicate-image",
+            lambda: self._find_duplicate_image(source_image, kwargs.get("owner")),
+        )
+        if existing_image_id:
+            LOG.info(
+                "Reusing identical destination image %s, 0 bytes transferred.",
+                existing_image_id,
+            )
+            if self._migration:
+                self._migration.reused = True
+                self._record_digests(image_cache.get_image_hashes(source_image))
+            return existing_image_id
+
+        convert_format = self._get_conversion_format(source_image)
+        if convert_format:
+            kwargs["disk_format"] = convert_format
+
+        # The destination image record is checkpointed, allowing the data
+        # upload to be completed when resuming the migration.
+        destination_image_id = self._run_step(
+            "create-image",
+            lambda: self._destination_session.create_image(**kwargs).id,
+        )
+        # The data digests, computed while transferring the data.
+        hexdigests: dict[str, str] = {}
+        try:
+            with self._track_transfer(
+                f"image {source_image.id}", total_bytes=source_image.size
+            ):
+                destination_image = self._upload_image_data(
+                    source_image, destination_image_id, hexdigests, convert_format
+                )
+        except Exception:
+            if self._migration:
+                LOG.warning(
+                    "Image upload failed, preserving destination image %s. "
+                    "Use 'openstack-migrate resume %s' to complete the upload.",
+                    destination_image_id,
+                    self._migration.uuid,
+                )
+            else:
+                self._delete_resource(destination_image_id, self._destination_session)
+            raise
+
+        # The data was verified against the source image hashes while being
+        # transferred. Images uploaded by previous attempts are verified
+        # using the source image hashes, unless converted.
+        if hexdigests or not convert_format:
+            digests = hexdigests or image_cache.get_image_hashes(source_image)
+            self._verify_destination_image(destination_image, digests)
+            self._record_digests(digests)
+        else:
+            LOG.warning(
+                "The converted image was uploaded by a previous attempt, "
+                "skipping validation."
+            )
+
+        spool_path = resumable.get_spool_path(source_image.id)
+        spool_path.unlink(missing_ok=True)
+        if convert_format:
+            spool_path.with_suffix(f".{convert_format}").unlink(missing_ok=True)
+
+        return destination_image.id
+
+    def _get_hash_algorithms(self, source_image) -> list[str]:
+        # Glance uses sha512 by default.
+        hash_algo = getattr(source_image, "hash_algo", None) or "sha512"
+        return list(dict.fromkeys(["md5", hash_algo]))
+
+    def _verify_hexdigests(self, source_image, hexdigests: dict[str, str]):
+        for algorithm, value in image_cache.get_image_hashes(source_image).items():
+            if algorithm in hexdigests and hexdigests[algorithm] != value:
+                raise exception.Invalid(
+                    f"Checksum mismatch in downloaded image ({algorithm})."
+                )
+
+    def _verify_destination_image(self, destination_image, digests: dict[str, str]):
+        """Compare the hashes reported by the destination with the data digests."""
+        verified = False
+        for algorithm, value in image_cache.get_image_hashes(destination_image).items():
+            if algorithm not in digests:
+                continue
+            if digests[algorithm] != value:
+                raise exception.Invalid(
+                    f"Checksum mismatch in transferred image ({algorithm})."
+                )
+            verified = True
+        if not verified:
+            LOG.warning(
+                "The Glance image doesn’t contain a checksum, skipping validation."
+            )
+
+    def _record_digests(self, digests: dict[str, str]):
+        if not self._migration:
+            return
+        self._migration.checksum = digests.get("md5")
+        for algorithm, value in digests.items():
+            if algorithm != "md5":
+                self._migration.hash_algo = algorithm
+                self._migration.hash_value = value
+
+    def _get_conversion_format(self, source_image) -> str | None:
+        """Get the format used to upload raw images, if they are converted."""
+        convert_format = CONF.image_raw_conversion_format
+        if not convert_format or source_image.disk_format != "raw":
+            return None
+        if not sparse.qemu_img_available():
+            LOG.warning(
+                "qemu-img is not available, image %s will not be converted to %s.",
+                source_image.id,
+                convert_format,
+            )
+            return None
+        return convert_format
+
+    def _find_duplicate_image(self, source_image, owner: str | None) -> str | None:
+        mode = CONF.image_deduplication
+        if mode == config.ImageDeduplication.disabled:
+            return None
+        # Images are created in the current project unless specified otherwise.
+        owner = owner or self._destination_session.current_project_id
+        image = dedup.get_destination_image_index().find(
+            self._destination_session.image, source_image, owner, mode
+        )
+        return image.id if image else None
+
+    def _get_import_methods(self) -> list[str]:
+        import_info = self._destination_session.image.get_import_info()
+        return (import_info.import_methods or {}).get("value", [])
+
+    def _get_upload_method(self) -> config.ImageUploadMethod:
+        method = CONF.image_upload_method
+        if method == config.ImageUploadMethod.upload:
+            return method
+        if method not in self._get_import_methods():
+            LOG.warning(
+                "The destination image service does not support the %s import "
+                "method, falling back to direct uploads.",
+                method.value,
+            )
+            return config.ImageUploadMethod.upload
+        return method
+
+    def _upload_image_data(
+        self,
+        source_image,
+        destination_image_id: str,
+        hexdigests: dict[str, str],
+        convert_format: str | None = None,
+    ):
+        """Upload the image data, completing partial uploads if possible.
+
+        Images staged by previous attempts are imported without transferring
+        the data again. Raw images are converted to "convert_format" before
+        being uploaded, if specified.
+
+        The data digests are added to "hexdigests" once transferred. Returns
+        the active destination image.
+        """
+        destination_image = self._destination_session.image.get_image(
+            destination_image_id
+        )
+        if destination_image.status == "active":
+            LOG.info("Destination image already uploaded: %s", destination_image_id)
+            return destination_image
+
+        if (
+            destination_image.status == "queued"
+            and CONF.image_transfer_mode == config.ImageTransferMode.web_download
+            and not convert_format
+        ):
+            with self._transfer_phase("web-download"):
+                destination_image = self._web_download_image(
+                    source_image, destination_image
+                )
+            if destination_image.status == "active":
+                return destination_image
+
+        if destination_image.status == "queued":
+            method = self._get_upload_method()
+            with contextlib.ExitStack() as stack:
+                data = self._get_image_data(
+                    source_image, stack, hexdigests, convert_format
+                )
+                if self._metrics:
+                    data = self._metrics.track(data)
+                if method == config.ImageUploadMethod.upload:
+                    with self._transfer_phase("upload"):
+                        response = destination_image.upload(
+                            self._destination_session.image,
+                            data=data,
+                        )
+                    openstack_exc.raise_from_response(response)
+                    # Retrieve the hashes computed by the destination.
+                    return self._destination_session.image.get_image(
+                        destination_image_id
+                    )
+
+                with self._transfer_phase("upload"):
+                    destination_image = self._destination_session.image.stage_image(
+                        destination_image, data=data
+                    )
+
+        if destination_image.status == "uploading":
+            LOG.info("Importing staged image: %s", destination_image_id)
+            self._destination_session.image.import_image(
+                destination_image, method=config.ImageUploadMethod.glance_direct.value
+            )
+        elif destination_image.status != "importing":
+            raise exception.OpenstackMigrateException(
+                f"Unexpected destination image {destination_image_id} "
+                f"status: {destination_image.status}"
+            )
+
+        with self._transfer_phase("import"):
+            return self._wait_for_import(destination_image_id)
+
+    def _wait_for_import(self, destination_image_id: str, **kwargs):
+        return poller.wait_for_resource_status(
+            self._destination_session,
+            "image",
+            destination_image_id,
+            list_resources=lambda: self._destination_session.image.images(
+                status="importing"
             ),
+            get_resource=self._destination_session.image.get_image,
+            status="active",
+            failures=["queued", "killed", "deleted"],
+            timeout=CONF.image_import_timeout,
+            group_id="importing",
             **kwargs,
         )
 
-        # Refresh the image to get all the information, including checksums.
-        destination_image = self._destination_session.get_image(destination_image.id)
-        if not destination_image.checksum or not source_image.checksum:
+    def _web_download_image(self, source_image, destination_image):
+        """Let the destination Glance service retrieve the image data.
+
+        Returns the updated destination image, which remains queued if the
+        image could not be imported, in which case the data is streamed
+        instead.
+        """
+        method = config.ImageTransferMode.web_download.value
+        if method not in self._get_import_methods():
             LOG.warning(
-                "The Glance image doesn’t contain a checksum, skipping validation."
+                "The destination image service does not support the %s import "
+                "method, falling back to streaming.",
+                method,
+            )
+            return destination_image
+        url = web_download.get_source_image_url(source_image.id)
+        if not url:
+            LOG.warning(
+                "No source image URL configured (image_web_download_url), "
+                "falling back to streaming."
             )
-        elif destination_image.checksum != source_image.checksum:
-            raise exception.Invalid("Checksum mismatch in transferred image.")
+            return destination_image
 
-        return destination_image.id
+        LOG.info(
+            "Importing image %s using the %s method.", destination_image.id, method
+        )
+        self._destination_session.image.import_image(
+            destination_image, method=method, uri=url
+        )
+        try:
+            # The image remains queued while importing the data. Glance holds
+            # an import lock until the import completes, failed imports
+            # reverting the image to the queued status.
+            return self._wait_for_import(
+                destination_image.id, pending=_is_import_locked
+            )
+        except openstack_exc.ResourceFailure as ex:
+            LOG.warning(
+                "Image %s import failed, falling back to streaming. Error: %s",
+                destination_image.id,
+                ex,
+            )
+        return self._destination_session.image.get_image(destination_image.id)
+
+    def _get_image_data(
+        self,
+        source_image,
+        stack: contextlib.ExitStack,
+        hexdigests: dict[str, str],
+        convert_format: str | None = None,
+    ) -> typing.Iterable:
+        """Get the image data iterator.
+
+        Local copies (cached, spooled or converted images) are retrieved
+        upfront and released once the stack is closed.
+
+        The data is verified against the source image hashes, the digests
+        being added to "hexdigests". When converting the image, "hexdigests"
+        receives the digests of the converted data instead.
+        """
+        chunk_size = CONF.image_transfer_chunk_size
+        with self._transfer_phase("download"):
+            local_path = stack.enter_context(
+                image_cache.get_image_cache().get_image_file(
+                    self._source_session.image, source_image
+                )
+            )
+        if local_path:
+            # Cached images are verified when downloaded.
+            hexdigests.update(image_cache.get_image_hashes(source_image))
+        elif CONF.image_spool_enabled or convert_format:
+            with self._transfer_phase("download"):
+                local_path = self._spool_image(source_image, chunk_size, hexdigests)
+        else:
+            return self._chunked_image_reader(source_image, chunk_size, hexdigests)
+
+        if not convert_format:
+            return resumable.iter_file_chunks(local_path, chunk_size)
+
+        converted_path = resumable.get_spool_path(source_image.id).with_suffix(
+            f".{convert_format}"
+        )
+        with self._transfer_phase("convert"):
+            sparse.convert_image(local_path, converted_path, "raw", convert_format)
+        hexdigests.clear()
+        return self._chunked_file_reader(converted_path, chunk_size, hexdigests)
+
+    def _spool_image(
+        self, source_image, chunk_size: int, hexdigests: dict[str, str]
+    ) -> pathlib.Path:
+        spool_path = resumable.get_spool_path(source_image.id)
+        spool_hexdigests = resumable.spool_image(
+            self._source_session.image,
+            source_image.id,
+            spool_path,
+            chunk_size,
+            hash_algorithms=self._get_hash_algorithms(source_image),
+        )
+        try:
+            self._verify_hexdigests(source_image, spool_hexdigests)
+        except exception.Invalid:
+            spool_path.unlink()
+            raise
+        hexdigests.update(spool_hexdigests)
+        return spool_path
+
+    def _chunked_file_reader(
+        self, path: pathlib.Path, chunk_size: int, hexdigests: dict[str, str]
+    ):
+        # The hashes of the uploaded data are computed by the hashing thread.
+        with (
+            path.open("rb") as f,
+            pipeline.TransferPipeline(
+                f,
+                chunk_size,
+                hash_algorithms=self._get_hash_algorithms(None),
+                name=f"file {path}",
+                adaptive=CONF.image_transfer_adaptive_chunk_size,
+                size_hint=path.stat().st_size,
+            ) as transfer,
+        ):
+            yield from transfer
+            hexdigests.update(transfer.hexdigests())
+
+    def _chunked_image_reader(
+        self, source_image, chunk_size: int, hexdigests: dict[str, str]
+    ):
+        # Interrupted downloads are resumed using range requests.
+        reader = resumable.ImageDataReader(self._source_session.image, source_image.id)
+        # The download and upload are performed using separate threads, the
+        # data being passed through a bounded set of reusable buffers. The
+        # hashes are computed in a single pass by the hashing thread.
+        with (
+            reader,
+            pipeline.TransferPipeline(
+                reader,
+                chunk_size,
+                hash_algorithms=self._get_hash_algorithms(source_image),
+                name=f"image {source_image.id}",
+                adaptive=CONF.image_transfer_adaptive_chunk_size,
+                size_hint=source_image.size,
+            ) as transfer,
+        ):
+            try:
+                yield from transfer
+            finally:
+                if self._metrics:
+                    self._metrics.add_waits(
+                        source=transfer.consumer_wait,
+                        destination=transfer.reader_wait,
+                    )
+            transfer_hexdigests = transfer.hexdigests()
+
+        self._verify_hexdigests(source_image, transfer_hexdigests)
+        hexdigests.update(transfer_hexdigests)
 
-    def _chunked_image_reader(self, source_image, chunk_size: int):
-        if not chunk_size:
-            raise exception.InvalidInput("No image transfer chunk size provided.")
-        response = self._source_session.image.download_image(source_image, stream=True)
-        md5 = hashlib.md5(usedforsecurity=False)
-        for chunk in response.iter_content(chunk_size=chunk_size):
-            md5.update(chunk)
-            yield chunk
-
-        if source_image.checksum and md5.hexdigest() != response.headers["Content-MD5"]:
-            raise exception.Invalid("Checksum mismatch in downloaded image.")
+    def get_resource_size(self, resource_id: str) -> int | None:
+        """Get the image size in bytes."""
+        return self._source_session.get_image(resource_id).size
 
     def get_source_resource_ids(self, resource_filters: dict[str, str]) -> list[str]:
         """Returns a list of resource ids based on the specified filters.
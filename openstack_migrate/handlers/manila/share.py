@@ -1,13 +1,18 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import functools
+import json
 import logging
+import pathlib
+import shutil
 import subprocess
+import sys
 from typing import Any
 
 from openstack import exceptions as openstack_exc
 
-from openstack_migrate import config, exception
+from openstack_migrate import config, constants, exception, poller
 from openstack_migrate.handlers import base
 from openstack_migrate.utils import client_utils, manila_utils
 
@@ -60,6 +65,10 @@ class ShareHandler(base.BaseMigrationHandler):
 
         return associated_resources
 
+    def requires_final_sync(self) -> bool:
+        """Live pre-copied shares require a final "share-sync"."""
+        return CONF.share_live_precopy
+
     def perform_individual_migration(
         self,
         resource_id: str,
@@ -99,33 +108,110 @@ class ShareHandler(base.BaseMigrationHandler):
         else:
             owner_destination_session = self._destination_session
 
-        share_kwargs = self._build_share_kwargs(
-            source_share, migrated_associated_resources
+        destination_project_id = identity_kwargs.get("project_id")
+        # The destination share is reused when resuming the migration, the
+        # copy manifest allowing the data transfer to be resumed as well.
+        destination_share_id = self._run_step(
+            "create-share",
+            functools.partial(
+                self._create_destination_share,
+                owner_destination_session,
+                source_share,
+                migrated_associated_resources,
+            ),
         )
-        destination_share = owner_destination_session.shared_file_system.create_share(
-            **share_kwargs
-        )
-
-        LOG.info("Waiting for share provisioning: %s", destination_share.id)
-        self._destination_session.shared_file_system.wait_for_status(
-            destination_share,
-            status="available",
-            failures=["error"],
-            interval=5,
-            wait=CONF.resource_creation_timeout,
+        self._wait_for_destination_share(destination_share_id, destination_project_id)
+        destination_share = self._destination_session.shared_file_system.get_share(
+            destination_share_id
         )
 
         if CONF.preserve_share_access_rules:
-            self._migrate_share_access_rules(
-                source_share, destination_share, owner_destination_session
+            self._run_step(
+                "migrate-access-rules",
+                lambda: self._migrate_share_access_rules(
+                    source_share, destination_share, owner_destination_session
+                ),
             )
         else:
             LOG.info("'preserve_share_access_rules' disabled.")
 
-        self._migrate_share_data(source_share, destination_share)
+        # The data may be copied while the source share is in use, the files
+        # modified in the meantime being transferred by the delta passes.
+        # Verifying live shares would report the ongoing changes, so the
+        # verification is deferred to the final sync in that case.
+        self._migrate_share_data(
+            source_share,
+            destination_share,
+            delta_passes=CONF.share_delta_passes if CONF.share_live_precopy else 0,
+            verification=(
+                config.ShareVerification.disabled
+                if CONF.share_live_precopy
+                else CONF.share_verification
+            ),
+        )
+        if CONF.share_live_precopy and self._migration:
+            LOG.warning(
+                "The share %s data was copied while the share was in use. Stop "
+                "the source share clients and run 'openstack-migrate share-sync "
+                "--final %s%s' in order to transfer the remaining changes and "
+                "complete the migration.",
+                source_share.id,
+                self._migration.uuid,
+                (
+                    " --verify"
+                    if CONF.share_verification != config.ShareVerification.disabled
+                    else ""
+                ),
+            )
 
         return destination_share.id
 
+    def _create_destination_share(
+        self,
+        owner_destination_session,
+        source_share,
+        migrated_associated_resources: list[base.MigratedResource],
+    ) -> str:
+        share_kwargs = self._build_share_kwargs(
+            source_share, migrated_associated_resources
+        )
+        destination_share = owner_destination_session.shared_file_system.create_share(
+            **share_kwargs
+        )
+        LOG.info("Created destination share: %s", destination_share.id)
+        return destination_share.id
+
+    def _wait_for_destination_share(
+        self, destination_share_id: str, destination_project_id: str | None
+    ):
+        """Wait for the destination share to become available.
+
+        The share creation is checkpointed separately, allowing resumed
+        migrations to wait for the existing share instead of creating
+        another one.
+        """
+        LOG.info("Waiting for share provisioning: %s", destination_share_id)
+        list_filters = (
+            {"all_projects": True, "project_id": destination_project_id}
+            if destination_project_id
+            else {}
+        )
+        poller.wait_for_resource_status(
+            self._destination_session,
+            "share",
+            destination_share_id,
+            list_resources=functools.partial(
+                self._destination_session.shared_file_system.shares,
+                details=True,
+                **list_filters,
+            ),
+            get_resource=self._destination_session.shared_file_system.get_share,
+            status="available",
+            failures=["error"],
+            timeout=CONF.resource_creation_timeout,
+            group_id=destination_project_id,
+        )
+
     def _build_share_kwargs(
         self,
         source_share,
@@ -195,14 +281,7 @@ class ShareHandler(base.BaseMigrationHandler):
                     access_level=rule.access_level,
                 )
                 LOG.info("Waiting for access rule to become active: %s", access_rule.id)
-                destination_session.shared_file_system.wait_for_status(
-                    access_rule,
-                    status="active",
-                    attribute="state",
-                    failures=["error"],
-                    interval=5,
-                    wait=CONF.resource_creation_timeout,
-                )
+                manila_utils.wait_for_access_rule(destination_session, access_rule)
             except openstack_exc.ConflictException as exc:
                 LOG.warning(
                     "Access rule already exists or conflicts "
@@ -219,32 +298,225 @@ class ShareHandler(base.BaseMigrationHandler):
                 # Continue with other rules even if one fails
                 continue
 
-    def _migrate_share_data(self, source_share, destination_share):
-        with (
-            manila_utils.mounted_nfs_share(
-                self._source_session, source_share
-            ) as source_mountpoint,
-            manila_utils.mounted_nfs_share(
-                self._destination_session, destination_share
-            ) as destination_mountpoint,
-        ):
+    def sync_share_data(
+        self,
+        source_share_id: str,
+        destination_share_id: str,
+        passes: int = 1,
+        verification: config.ShareVerification = config.ShareVerification.disabled,
+    ):
+        """Transfer the share data modified since the previous copy.
+
+        Used to perform the final sync once the source share clients are
+        stopped, after copying the data while the source share was in use.
+        The share data may be verified afterwards.
+        """
+        source_share = self._source_session.shared_file_system.get_share(
+            source_share_id
+        )
+        destination_share = self._destination_session.shared_file_system.get_share(
+            destination_share_id
+        )
+        self._migrate_share_data(
+            source_share,
+            destination_share,
+            initial_copy=False,
+            delta_passes=passes,
+            verification=verification,
+        )
+
+    def _migrate_share_data(
+        self,
+        source_share,
+        destination_share,
+        initial_copy: bool = True,
+        delta_passes: int = 0,
+        verification: config.ShareVerification = config.ShareVerification.disabled,
+    ):
+        """Transfer the share data.
+
+        The initial copy may be followed by incremental (delta) passes, which
+        transfer the files that were modified in the meantime and remove the
+        files that were deleted from the source share. The delta passes stop
+        early once the shares are in sync. The destination share contents
+        are verified at the end, if requested.
+        """
+        # Both shares are mounted concurrently and remain mounted, allowing
+        # subsequent operations to reuse the mounts.
+        with manila_utils.get_mount_manager().mounted_shares(
+            (self._source_session, source_share),
+            (self._destination_session, destination_share),
+        ) as (source_mountpoint, destination_mountpoint):
             LOG.info(
                 "Migrating share data: %s -> %s",
                 source_mountpoint,
                 destination_mountpoint,
             )
-            cmd = [
-                "sudo",
-                "cp",
-                "-r",
-                "--preserve=timestamps",
-                "--preserve=xattr",
-                "--preserve=links",
-                "--preserve=ownership",
-                f"{source_mountpoint}/.",
-                f"{destination_mountpoint}/",
-            ]
-            subprocess.check_call(cmd, text=True)
+            if initial_copy:
+                # The copy progress is measured using the destination
+                # filesystem usage, which is cheap to retrieve.
+                initial_usage = shutil.disk_usage(destination_mountpoint).used
+                with (
+                    self._track_transfer(
+                        f"share {source_share.id}",
+                        total_bytes=shutil.disk_usage(source_mountpoint).used,
+                        bytes_callback=lambda: (
+                            shutil.disk_usage(destination_mountpoint).used
+                            - initial_usage
+                        ),
+                    ),
+                    self._transfer_phase("copy"),
+                ):
+                    self._copy_share_data(
+                        source_share.id,
+                        destination_share.id,
+                        source_mountpoint,
+                        destination_mountpoint,
+                    )
+
+            for sync_pass in range(1, delta_passes + 1):
+                LOG.info(
+                    "Performing share %s delta sync, pass %s/%s.",
+                    source_share.id,
+                    sync_pass,
+                    delta_passes,
+                )
+                with (
+                    self._track_transfer(
+                        f"share {source_share.id} delta sync"
+                    ) as metrics,
+                    self._transfer_phase("delta-sync"),
+                ):
+                    stats = self._copy_share_data(
+                        source_share.id,
+                        destination_share.id,
+                        source_mountpoint,
+                        destination_mountpoint,
+                        delete=True,
+                    )
+                    metrics.add_bytes(stats.get("bytes", 0))
+                if not stats.get("files") and not stats.get("deleted"):
+                    LOG.info("Share %s data in sync.", source_share.id)
+                    break
+
+            if verification != config.ShareVerification.disabled:
+                self._verify_share_data(
+                    source_share.id,
+                    destination_share.id,
+                    source_mountpoint,
+                    destination_mountpoint,
+                    sampled=verification == config.ShareVerification.sampled,
+                )
+
+    def _get_manifest_path(
+        self, source_share_id: str, destination_share_id: str, suffix: str
+    ) -> pathlib.Path:
+        manifest_dir = CONF.temporary_migration_dir / "share-manifests"
+        manifest_dir.mkdir(mode=0o750, parents=True, exist_ok=True)
+        return manifest_dir / f"{source_share_id}-{destination_share_id}{suffix}"
+
+    def _copy_share_data(
+        self,
+        source_share_id: str,
+        destination_share_id: str,
+        source_mountpoint: str,
+        destination_mountpoint: str,
+        delete: bool = False,
+    ) -> dict[str, int]:
+        """Copy the share data, returning the copy stats.
+
+        Only the files modified since the previous copy are transferred, the
+        copied files being recorded in a manifest. The content manifest of a
+        previous verification is used to skip files whose contents did not
+        change.
+        """
+        manifest_path = self._get_manifest_path(
+            source_share_id, destination_share_id, ".jsonl"
+        )
+        content_manifest_path = self._get_manifest_path(
+            source_share_id, destination_share_id, ".content.jsonl"
+        )
+        # The copy is performed by a privileged process.
+        cmd = [
+            "sudo",
+            sys.executable,
+            "-m",
+            "openstack_migrate.transfer.filecopy",
+            "--manifest",
+            str(manifest_path),
+            "--workers",
+            str(CONF.share_copy_workers),
+            "--batch-size",
+            str(CONF.share_copy_batch_size),
+            source_mountpoint,
+            destination_mountpoint,
+        ]
+        if delete:
+            cmd.append("--delete")
+        if content_manifest_path.exists():
+            cmd += ["--content-manifest", str(content_manifest_path)]
+        output = subprocess.check_output(cmd, text=True)
+        return json.loads(output.splitlines()[-1])
+
+    def _verify_share_data(
+        self,
+        source_share_id: str,
+        destination_share_id: str,
+        source_mountpoint: str,
+        destination_mountpoint: str,
+        sampled: bool = False,
+    ):
+        """Check that the destination share contents match the source share.
+
+        The results are recorded in the migration record, along with the path
+        of the content manifest produced by full verifications.
+        """
+        content_manifest_path = self._get_manifest_path(
+            source_share_id, destination_share_id, ".content.jsonl"
+        )
+        LOG.info("Verifying share %s data, sampled: %s", destination_share_id, sampled)
+        # The verification is performed by a privileged process.
+        cmd = [
+            "sudo",
+            sys.executable,
+            "-m",
+            "openstack_migrate.transfer.verify",
+            "--workers",
+            str(CONF.share_copy_workers),
+            source_mountpoint,
+            destination_mountpoint,
+        ]
+        if sampled:
+            cmd += ["--sample-blocks", str(CONF.share_verification_sample_blocks)]
+        else:
+            cmd += ["--content-manifest", str(content_manifest_path)]
+        output = subprocess.check_output(cmd, text=True)
+        results = json.loads(output.splitlines()[-1])
+        if not sampled:
+            results["path"] = str(content_manifest_path)
+        if self._migration:
+            self._migration.content_manifest = json.dumps(results)
+
+        if results["mismatches"]:
+            mismatches = ", ".join(
+                f"{mismatch['path']} ({mismatch['reason']})"
+                for mismatch in results["mismatched_paths"][:10]
+            )
+            raise exception.Invalid(
+                f"Share {destination_share_id} data verification failed, "
+                f"{results['mismatches']} mismatches: {mismatches}"
+            )
+        LOG.info(
+            "Verified share %s data, files: %s (%s bytes).",
+            destination_share_id,
+            results["files"],
+            results["bytes"],
+        )
+
+    def get_resource_size(self, resource_id: str) -> int | None:
+        """Get the share size in bytes."""
+        source_share = self._source_session.shared_file_system.get_share(resource_id)
+        return source_share.size * constants.GiB
 
     def get_source_resource_ids(self, resource_filters: dict[str, Any]) -> list[str]:
         """Returns a list of resource ids based on the specified filters.
@@ -268,6 +540,9 @@ class ShareHandler(base.BaseMigrationHandler):
         return resource_ids
 
     def _delete_resource(self, resource_id: str, openstack_session):
+        manila_utils.get_mount_manager().release_share(
+            openstack_session.config.name, resource_id
+        )
         openstack_session.shared_file_system.delete_share(
             resource_id, ignore_missing=True
         )
@@ -1,11 +1,15 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
+import functools
 import logging
 import os
+import typing
+from concurrent import futures
 from typing import Any
 
-from openstack_migrate import config, exception
+from openstack_migrate import config, constants, exception, poller
 from openstack_migrate.handlers import base
 
 CONF = config.get_config()
@@ -15,6 +19,13 @@ LOG = logging.getLogger()
 class InstanceHandler(base.BaseMigrationHandler):
     """Handle Nova instance migrations."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The root disk export started by "prepare_migration", if any.
+        self._root_disk_export: futures.Future | None = None
+        self._source_image_id: str | None = None
+        self._destination_image_id: str | None = None
+
     def get_service_type(self) -> str:
         """Return the Nova service type identifier."""
         return "nova"
@@ -37,6 +48,10 @@ class InstanceHandler(base.BaseMigrationHandler):
             types.append("project")
         return types
 
+    def get_concurrent_associated_resource_types(self) -> list[str]:
+        """The attached volumes are migrated concurrently."""
+        return ["volume"]
+
     def get_associated_resources(self, resource_id: str) -> list[base.Resource]:
         """Return the source resources this instance depends on."""
         source_instance = self._source_session.compute.get_server(resource_id)
@@ -119,22 +134,38 @@ class InstanceHandler(base.BaseMigrationHandler):
     def _upload_instance_to_image(self, owner_source_session, source_instance):
         """Upload instance to Glance image."""
         rand = int.from_bytes(os.urandom(4))
-        image_name = f"instmigr-{source_instance.id}-{rand}"
+        image_name = f"{constants.INSTANCE_IMAGE_PREFIX}{source_instance.id}-{rand}"
         LOG.info("Uploading instance %s to image: %s", source_instance.id, image_name)
-        image = owner_source_session.compute.create_server_image(
-            source_instance, image_name
-        )
-        LOG.info("Waiting for instance upload to complete. Image id: %s", image.id)
-        glance_image = self._source_session.get_image(image.id)
-        self._source_session.image.wait_for_status(
-            glance_image,
-            status="active",
-            failures=["error"],
-            interval=5,
-            wait=CONF.volume_upload_timeout,
-        )
+        # Nova does not report the upload progress, the time left is
+        # estimated based on the flavor disk size.
+        with (
+            self._disk_export_slot(f"instance {source_instance.id}"),
+            self._track_transfer(
+                f"instance {source_instance.id} upload",
+                total_bytes=(source_instance.flavor.disk or 0) * constants.GiB,
+            ),
+            self._transfer_phase("source-upload"),
+        ):
+            image = owner_source_session.compute.create_server_image(
+                source_instance, image_name
+            )
+            LOG.info("Waiting for instance upload to complete. Image id: %s", image.id)
+            poller.wait_for_resource_status(
+                self._source_session,
+                "image",
+                image.id,
+                list_resources=functools.partial(
+                    self._source_session.image.images,
+                    owner=source_instance.project_id,
+                ),
+                get_resource=self._source_session.image.get_image,
+                status="active",
+                failures=["error"],
+                timeout=CONF.volume_upload_timeout,
+                group_id=source_instance.project_id,
+            )
         LOG.info("Finished uploading instance to Glance.")
-        return self._source_session.get_image(glance_image.id)
+        return self._source_session.get_image(image.id)
 
     def _get_block_device_mapping(
         self,
@@ -193,86 +224,213 @@ class InstanceHandler(base.BaseMigrationHandler):
             source_project_id=source_instance.project_id,
         )
         if CONF.multitenant_mode:
-            owner_source_session = self._owner_scoped_session(
-                self._source_session,
-                [CONF.member_role_name],
-                source_instance.project_id,
-            )
             owner_destination_session = self._owner_scoped_session(
                 self._destination_session,
                 [CONF.member_role_name],
                 identity_kwargs["project_id"],
             )
         else:
-            owner_source_session = self._source_session
             owner_destination_session = self._destination_session
 
-        destination_image_id: str | None = None
-        source_image: Any = None
+        succeeded = False
+        try:
+            # Handle image-booted instances: upload to Glance and migrate image.
+            # The migration steps are checkpointed, allowing interrupted
+            # migrations to be resumed.
+            if self._root_disk_export:
+                # Started by "prepare_migration", concurrently with the
+                # attached volume migrations.
+                self._root_disk_export.result()
+            elif self._is_image_booted(source_instance):
+                self._export_root_disk(
+                    self._get_owner_source_session(source_instance), source_instance
+                )
 
-        # Handle image-booted instances: upload to Glance and migrate image
-        if source_instance.image and source_instance.image.get("id"):
-            source_image = self._upload_instance_to_image(
-                owner_source_session, source_instance
+            destination_instance_id = self._run_step(
+                "create-instance",
+                functools.partial(
+                    self._create_destination_instance,
+                    owner_destination_session,
+                    source_instance,
+                    source_flavor.id,
+                    self._destination_image_id,
+                    migrated_associated_resources,
+                ),
             )
-            try:
-                image_migration = self.manager.perform_individual_migration(
-                    resource_type="image",
-                    resource_id=source_image.id,
-                    cleanup_source=True,
-                    include_dependencies=True,
-                )
-                destination_image_id = image_migration.destination_id
-            except Exception as ex:
-                LOG.error("Failed to migrate instance image: %r", ex)
-                # Clean up source image on error
-                if source_image:
-                    self._source_session.image.delete_image(
-                        source_image.id, ignore_missing=True
-                    )
-                raise
+            self._wait_for_destination_instance(
+                destination_instance_id, identity_kwargs.get("project_id")
+            )
+            succeeded = True
+        finally:
+            self._release_temporary_images(succeeded)
 
-        try:
-            # Build instance creation kwargs
-            instance_kwargs = self._build_instance_kwargs(
-                source_instance,
-                source_flavor.id,
-                destination_image_id,
-                migrated_associated_resources,
+        return destination_instance_id
+
+    def _release_temporary_images(self, succeeded: bool):
+        """Delete the temporary images, unless the migration can be resumed."""
+        if succeeded or not self._migration:
+            self._delete_temporary_images(
+                self._source_image_id, self._destination_image_id
             )
+        elif self._source_image_id:
+            LOG.warning(
+                "Instance migration failed, preserving the temporary images "
+                "(source: %s, destination: %s). The migration can be "
+                "resumed using 'openstack-migrate resume %s'.",
+                self._source_image_id,
+                self._destination_image_id,
+                self._migration.uuid,
+            )
+
+    def _is_image_booted(self, source_instance) -> bool:
+        return bool(source_instance.image and source_instance.image.get("id"))
 
-            # Create instance on destination
-            destination_instance = owner_destination_session.compute.create_server(
-                **instance_kwargs
+    def _get_owner_source_session(self, source_instance):
+        if CONF.multitenant_mode:
+            return self._owner_scoped_session(
+                self._source_session,
+                [CONF.member_role_name],
+                source_instance.project_id,
             )
+        return self._source_session
+
+    @contextlib.contextmanager
+    def prepare_migration(self, resource_id: str) -> typing.Iterator[None]:
+        """Export the root disk while the attached volumes are migrated.
 
-            LOG.info("Waiting for instance provisioning: %s", destination_instance.id)
-            self._destination_session.compute.wait_for_server(
-                destination_instance,
-                status="ACTIVE",
-                failures=["ERROR"],
-                interval=5,
-                wait=CONF.resource_creation_timeout,
+        The instance is created once the root disk and the volumes have
+        been transferred.
+        """
+        source_instance = self._source_session.compute.get_server(resource_id)
+        if not source_instance or not self._is_image_booted(source_instance):
+            yield
+            return
+
+        owner_source_session = self._get_owner_source_session(source_instance)
+        with futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="root-disk"
+        ) as pool:
+            self._root_disk_export = pool.submit(
+                self._export_root_disk, owner_source_session, source_instance
             )
-        finally:
-            # Clean up temporary images after instance is created
-            if source_image:
-                LOG.info("Deleting temporary image on source side: %s", source_image.id)
-                self._source_session.image.delete_image(
-                    source_image.id, ignore_missing=True
-                )
+            try:
+                yield
+            except Exception:
+                if self._root_disk_export.running():
+                    LOG.info(
+                        "Instance %s migration failed, waiting for the root disk "
+                        "export to complete.",
+                        resource_id,
+                    )
+                # The instance migration is not performed if the associated
+                # resources could not be migrated, so the exported images are
+                # handled here.
+                futures.wait([self._root_disk_export])
+                self._release_temporary_images(succeeded=False)
+                raise
+            finally:
+                self._root_disk_export = None
+
+    def _export_root_disk(self, owner_source_session, source_instance):
+        """Upload the instance root disk to Glance and migrate the image."""
+        source_image_id = self._run_step(
+            "upload-source-image",
+            lambda: (
+                self._upload_instance_to_image(owner_source_session, source_instance).id
+            ),
+        )
+        self._source_image_id = source_image_id
+        self._destination_image_id = self._run_step(
+            "migrate-image",
+            lambda: (
+                self.manager.perform_individual_migration(
+                    resource_type="image",
+                    resource_id=source_image_id,
+                    cleanup_source=True,
+                    include_dependencies=True,
+                ).destination_id
+            ),
+        )
 
-            if destination_image_id:
-                LOG.info(
-                    "Deleting temporary image on destination side: %s",
-                    destination_image_id,
-                )
-                self._destination_session.image.delete_image(
-                    destination_image_id, ignore_missing=True
-                )
+    def _create_destination_instance(
+        self,
+        owner_destination_session,
+        source_instance: Any,
+        source_flavor_id: str,
+        destination_image_id: str | None,
+        migrated_associated_resources: list[base.MigratedResource],
+    ) -> str:
+        instance_kwargs = self._build_instance_kwargs(
+            source_instance,
+            source_flavor_id,
+            destination_image_id,
+            migrated_associated_resources,
+        )
 
+        destination_instance = owner_destination_session.compute.create_server(
+            **instance_kwargs
+        )
+        LOG.info("Created destination instance: %s", destination_instance.id)
         return destination_instance.id
 
+    def _wait_for_destination_instance(
+        self, destination_instance_id: str, destination_project_id: str | None
+    ):
+        """Wait for the destination instance to become active.
+
+        The instance creation is checkpointed separately, allowing resumed
+        migrations to wait for the existing instance instead of creating
+        another one.
+        """
+        LOG.info("Waiting for instance provisioning: %s", destination_instance_id)
+        list_filters = (
+            {"all_projects": True, "project_id": destination_project_id}
+            if destination_project_id
+            else {}
+        )
+        poller.wait_for_resource_status(
+            self._destination_session,
+            "instance",
+            destination_instance_id,
+            list_resources=functools.partial(
+                self._destination_session.compute.servers,
+                details=True,
+                **list_filters,
+            ),
+            get_resource=self._destination_session.compute.get_server,
+            status="ACTIVE",
+            failures=["ERROR"],
+            timeout=CONF.resource_creation_timeout,
+            group_id=destination_project_id,
+        )
+
+    def _delete_temporary_images(
+        self, source_image_id: str | None, destination_image_id: str | None
+    ):
+        if source_image_id:
+            LOG.info("Deleting temporary image on source side: %s", source_image_id)
+            self._source_session.image.delete_image(
+                source_image_id, ignore_missing=True
+            )
+
+        if (
+            source_image_id
+            and destination_image_id
+            and self._is_reused_destination("image", source_image_id)
+        ):
+            LOG.info(
+                "The destination image was reused, skipping its cleanup: %s",
+                destination_image_id,
+            )
+        elif destination_image_id:
+            LOG.info(
+                "Deleting temporary image on destination side: %s",
+                destination_image_id,
+            )
+            self._destination_session.image.delete_image(
+                destination_image_id, ignore_missing=True
+            )
+
     # ruff: noqa: C901
     def _build_instance_kwargs(
         self,
@@ -345,6 +503,19 @@ class InstanceHandler(base.BaseMigrationHandler):
 
         return kwargs
 
+    def get_resource_size(self, resource_id: str) -> int | None:
+        """Get the size of the root disk uploaded to Glance, in bytes.
+
+        Attached volumes are migrated separately. Instances booted from
+        volume do not transfer any data directly.
+        """
+        source_instance = self._source_session.compute.get_server(resource_id)
+        if not (source_instance.image and source_instance.image.get("id")):
+            return None
+        # The embedded flavor contains the disk size starting with
+        # compute API microversion 2.47.
+        return (source_instance.flavor.disk or 0) * constants.GiB
+
     def get_source_resource_ids(self, resource_filters: dict[str, str]) -> list[str]:
         """Return all source instance ids."""
         self._validate_resource_filters(resource_filters)
@@ -1,9 +1,10 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import functools
 import logging
 
-from openstack_migrate import config, exception
+from openstack_migrate import config, exception, poller
 from openstack_migrate.handlers import base
 
 CONF = config.get_config()
@@ -151,79 +152,78 @@ class LoadBalancerHandler(base.BaseMigrationHandler):
                         if hm:
                             source_health_monitors_map[default_pool_id] = hm
 
-        dest_lb_id = self._create_destination_load_balancer(
-            source_lb, migrated_associated_resources
+        # Each component creation is checkpointed, allowing interrupted
+        # migrations to be resumed without recreating the load balancer.
+        dest_lb_id = self._run_step(
+            "create-load-balancer",
+            functools.partial(
+                self._create_destination_load_balancer,
+                source_lb,
+                migrated_associated_resources,
+            ),
         )
+        dest_project_id = self._get_identity_build_kwargs(
+            migrated_associated_resources, source_project_id=source_lb.project_id
+        ).get("project_id")
 
-        self._destination_session.load_balancer.wait_for_load_balancer(
-            dest_lb_id,
-            status="ACTIVE",
-            failures=["ERROR"],
-            interval=2,
-            wait=CONF.resource_creation_timeout,
-        )
+        self._wait_for_load_balancer(dest_lb_id, dest_project_id)
 
         listener_id_map = {}
         pool_id_map = {}
 
         for source_listener in source_listeners:
-            dest_listener_id = self._create_destination_listener(
-                source_listener, dest_lb_id
+            dest_listener_id = self._run_step(
+                f"create-listener:{source_listener.id}",
+                functools.partial(
+                    self._create_destination_listener, source_listener, dest_lb_id
+                ),
             )
             listener_id_map[source_listener.id] = dest_listener_id
 
-            self._destination_session.load_balancer.wait_for_load_balancer(
-                dest_lb_id,
-                status="ACTIVE",
-                failures=["ERROR"],
-                interval=2,
-                wait=CONF.resource_creation_timeout,
-            )
+            self._wait_for_load_balancer(dest_lb_id, dest_project_id)
 
             if source_listener.default_pool_id:
                 source_pool = source_pools_map.get(source_listener.default_pool_id)
                 if source_pool and source_pool.id not in pool_id_map:
-                    dest_pool_id = self._create_destination_pool(
-                        source_pool, dest_listener_id
+                    dest_pool_id = self._run_step(
+                        f"create-pool:{source_pool.id}",
+                        functools.partial(
+                            self._create_destination_pool,
+                            source_pool,
+                            dest_listener_id,
+                        ),
                     )
                     pool_id_map[source_pool.id] = dest_pool_id
 
-                    self._destination_session.load_balancer.wait_for_load_balancer(
-                        dest_lb_id,
-                        status="ACTIVE",
-                        failures=["ERROR"],
-                        interval=2,
-                        wait=CONF.resource_creation_timeout,
-                    )
+                    self._wait_for_load_balancer(dest_lb_id, dest_project_id)
 
                     if source_pool.id in source_health_monitors_map:
                         source_hm = source_health_monitors_map[source_pool.id]
-                        self._create_destination_health_monitor(source_hm, dest_pool_id)
-
-                        self._destination_session.load_balancer.wait_for_load_balancer(
-                            dest_lb_id,
-                            status="ACTIVE",
-                            failures=["ERROR"],
-                            interval=2,
-                            wait=CONF.resource_creation_timeout,
+                        self._run_step(
+                            f"create-health-monitor:{source_hm.id}",
+                            functools.partial(
+                                self._create_destination_health_monitor,
+                                source_hm,
+                                dest_pool_id,
+                            ),
                         )
 
+                        self._wait_for_load_balancer(dest_lb_id, dest_project_id)
+
                     source_members = source_members_map.get(source_pool.id, [])
                     for source_member in source_members:
-                        self._create_destination_member(
-                            source_member,
-                            dest_pool_id,
-                            source_pool.id,
-                            migrated_associated_resources,
+                        self._run_step(
+                            f"create-member:{source_member.id}",
+                            functools.partial(
+                                self._create_destination_member,
+                                source_member,
+                                dest_pool_id,
+                                source_pool.id,
+                                migrated_associated_resources,
+                            ),
                         )
 
-                        self._destination_session.load_balancer.wait_for_load_balancer(
-                            dest_lb_id,
-                            status="ACTIVE",
-                            failures=["ERROR"],
-                            interval=2,
-                            wait=CONF.resource_creation_timeout,
-                        )
+                        self._wait_for_load_balancer(dest_lb_id, dest_project_id)
 
         # Attach Floating IPs to the destination load balancer port
         dest_lb = self._destination_session.load_balancer.get_load_balancer(dest_lb_id)
@@ -281,6 +281,28 @@ class LoadBalancerHandler(base.BaseMigrationHandler):
             resource_id, ignore_missing=True, cascade=True
         )
 
+    def _wait_for_load_balancer(self, dest_lb_id: str, dest_project_id: str | None):
+        """Wait for the destination load balancer to become active.
+
+        Load balancers are immutable while provisioning, so we'll have
+        to wait after each operation.
+        """
+        poller.wait_for_resource_status(
+            self._destination_session,
+            "load-balancer",
+            dest_lb_id,
+            list_resources=functools.partial(
+                self._destination_session.load_balancer.load_balancers,
+                **({"project_id": dest_project_id} if dest_project_id else {}),
+            ),
+            get_resource=self._destination_session.load_balancer.get_load_balancer,
+            status="ACTIVE",
+            failures=["ERROR"],
+            attribute="provisioning_status",
+            timeout=CONF.resource_creation_timeout,
+            group_id=dest_project_id,
+        )
+
     def _get_source_pool_members(self, pool_id: str) -> list:
         """Get all members for a source pool.
 
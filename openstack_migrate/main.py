@@ -12,8 +12,11 @@ from openstack_migrate.cmd import capabilities as capabilities_cmd
 from openstack_migrate.cmd import cleanup_source as cleanup_source_cmd
 from openstack_migrate.cmd import delete as delete_cmd
 from openstack_migrate.cmd import list as list_cmd
+from openstack_migrate.cmd import plan as plan_cmd
 from openstack_migrate.cmd import register_external as register_external_cmd
 from openstack_migrate.cmd import restore as restore_cmd
+from openstack_migrate.cmd import resume as resume_cmd
+from openstack_migrate.cmd import share_sync as share_sync_cmd
 from openstack_migrate.cmd import show as show_cmd
 from openstack_migrate.cmd import start as start_cmd
 from openstack_migrate.db import api as db_api
@@ -55,6 +58,11 @@ def main():
     cli.add_command(show_cmd.show_migration)
     cli.add_command(start_cmd.start_migration)
     cli.add_command(start_cmd.start_batch_migration)
+    cli.add_command(resume_cmd.resume_migrations)
+    cli.add_command(share_sync_cmd.sync_share)
+    cli.add_command(plan_cmd.create_plan)
+    cli.add_command(plan_cmd.apply_plan)
+    cli.add_command(plan_cmd.show_plan)
     cli.add_command(delete_cmd.delete_migrations)
     cli.add_command(restore_cmd.restore_migrations)
     cli.add_command(cleanup_source_cmd.cleanup_migration_sources)
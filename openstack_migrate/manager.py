@@ -1,19 +1,40 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import functools
+import json
 import logging
+import threading
 import typing
+from concurrent import futures
 
-from openstack_migrate import config, constants, exception
+from openstack_migrate import (
+    cache,
+    config,
+    constants,
+    exception,
+    ratelimit,
+    scheduler,
+)
 from openstack_migrate.db import api as db_api
 from openstack_migrate.db import models
 from openstack_migrate.handlers import base, factory
+from openstack_migrate.handlers.manila import share as share_handler
+from openstack_migrate.transfer import image_cache
 
 CONFIG = config.get_config()
 LOG = logging.getLogger()
 
 
 class OpenstackMigrationManager:
+    def __init__(self):
+        # Run-scoped cache, the manager is instantiated for each command.
+        self._cache = cache.RunCache()
+        # Serializes the migration of associated resources shared by
+        # resources that are migrated concurrently.
+        self._resource_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._resource_locks_lock = threading.Lock()
+
     def _get_migration_handler(
         self, resource_type: str | None
     ) -> base.BaseMigrationHandler:
@@ -44,6 +65,8 @@ class OpenstackMigrationManager:
 
         if not resource_id:
             raise exception.InvalidInput("No resource id specified.")
+        if cleanup_source:
+            self._check_source_cleanup_allowed(handler, resource_type)
 
         migration, associated_migrations = self._migrate_parent_resource(
             handler=handler,
@@ -54,8 +77,9 @@ class OpenstackMigrationManager:
         )
 
         migration.status = constants.STATUS_PENDING_MEMBERS
-        migration.save()
+        self._save_migration(migration)
 
+        migrated_member_resources: list[base.MigratedResource] | None = None
         if include_members:
             migrated_member_resources = self._migrate_member_resources(
                 handler=handler,
@@ -64,6 +88,42 @@ class OpenstackMigrationManager:
                 include_dependencies=include_dependencies,
                 include_members=include_members,
             )
+
+        self._complete_migration(
+            handler=handler,
+            migration=migration,
+            associated_migrations=associated_migrations,
+            migrated_member_resources=migrated_member_resources,
+            cleanup_source=cleanup_source,
+        )
+        return migration
+
+    def _check_source_cleanup_allowed(self, handler, resource_type: str):
+        """Reject source cleanups of migrations that require a final sync."""
+        if handler.requires_final_sync():
+            raise exception.InvalidInput(
+                f"The {resource_type} migrations require a final sync (e.g. "
+                "'share_live_precopy'), the source resources cannot be cleaned "
+                "up right away. Use the 'cleanup-source' command once "
+                "synchronized."
+            )
+
+    def _complete_migration(
+        self,
+        handler,
+        migration: models.Migration,
+        associated_migrations: list[models.Migration],
+        migrated_member_resources: list[base.MigratedResource] | None,
+        cleanup_source: bool,
+    ):
+        """Finalize a migration once its member resources have been migrated.
+
+        Connects the member resources to the parent resource, cleans up the
+        source resources if requested and marks the migration as completed.
+        Member resources are not connected if "migrated_member_resources"
+        is None.
+        """
+        if migrated_member_resources is not None:
             try:
                 handler.connect_member_resources_to_parent(
                     parent_resource_id=migration.destination_id,
@@ -72,13 +132,26 @@ class OpenstackMigrationManager:
             except Exception as ex:
                 LOG.error(
                     "Failed to connect member resources to parent %s: %r",
-                    resource_id,
+                    migration.source_id,
                     ex,
                 )
 
+        if handler.requires_final_sync():
+            if cleanup_source:
+                LOG.warning(
+                    "The %s resource %s requires a final sync, skipping the "
+                    "source cleanup. Use the 'cleanup-source' command once "
+                    "synchronized.",
+                    migration.resource_type,
+                    migration.source_id,
+                )
+            migration.status = constants.STATUS_PENDING_FINAL_SYNC
+            self._save_migration(migration)
+            return
+
         if cleanup_source:
             migration.status = constants.STATUS_PENDING_CLEANUP
-            migration.save()
+            self._save_migration(migration)
 
             self.cleanup_migration_source(migration)
 
@@ -90,8 +163,7 @@ class OpenstackMigrationManager:
             # remove contained resources.
 
         migration.status = constants.STATUS_COMPLETED
-        migration.save()
-        return migration
+        self._save_migration(migration)
 
     def _migrate_parent_resource(
         self,
@@ -100,26 +172,28 @@ class OpenstackMigrationManager:
         resource_id: str,
         include_dependencies: bool,
         include_members: bool,
+        associated_resources: list[base.Resource] | None = None,
     ) -> tuple[models.Migration, list[models.Migration]]:
         """Handle the parent resource migration logic.
 
         Returns a migration object for the requested resource and a list of
         associated (dependency) migrations that can be cleaned up.
+
+        The associated resources may be passed by the caller if they have
+        already been retrieved, in which case the migration handler will
+        not be queried again.
         """
-        existing = db_api.get_migrations(
-            source_id=resource_id,
-            resource_type=resource_type,
-        )
-        if existing and existing[0].status in constants.LIST_STATUS_MIGRATED:
+        existing = self._get_latest_migration(resource_type, resource_id)
+        if existing and existing.status in constants.LIST_STATUS_MIGRATED:
             LOG.info(
                 "Already migrated %s resource: %s (migration %s, status %s) "
                 "skipping duplicate migration",
                 resource_type,
                 resource_id,
-                existing[0].uuid,
-                existing[0].status,
+                existing.uuid,
+                existing.status,
             )
-            return existing[0], []
+            return existing, []
 
         LOG.info("Initiating %s migration, resource id: %s", resource_type, resource_id)
 
@@ -131,114 +205,382 @@ class OpenstackMigrationManager:
             resource_type=resource_type,
             status=constants.STATUS_IN_PROGRESS,
         )
-        migration.save()
+        self._save_migration(migration)
 
         cleanup_associated_migrations = []
         try:
-            associated_resources = self._get_associated_resources(
-                resource_type, resource_id
+            resolved_associated_resources = self._get_associated_resources(
+                resource_type, resource_id, associated_resources
             )
             LOG.debug(
                 "Associated resources of %s %s - %s",
                 resource_type,
                 resource_id,
-                associated_resources,
+                resolved_associated_resources,
             )
-            if associated_resources["pending"]:
-                if not include_dependencies:
-                    raise exception.InvalidInput(
-                        "The %s resource (%s) has pending associated resources. "
-                        "Specify --include-dependencies to automatically migrate them "
-                        "or use separate `openstack-migrate start` commands: %s"
-                        % (resource_type, resource_id, associated_resources)
+            if resolved_associated_resources["pending"] and not include_dependencies:
+                raise exception.InvalidInput(
+                    "The %s resource (%s) has pending associated resources. "
+                    "Specify --include-dependencies to automatically migrate them "
+                    "or use separate `openstack-migrate start` commands: %s"
+                    % (resource_type, resource_id, resolved_associated_resources)
+                )
+
+            # The handler may start the migration steps that do not depend on
+            # the associated resources while the latter are being migrated.
+            handler.set_migration(migration)
+            with handler.prepare_migration(resource_id):
+                if resolved_associated_resources["pending"]:
+                    cleanup_associated_migrations = self._migrate_associated_resources(
+                        handler,
+                        resolved_associated_resources["pending"],
+                        include_dependencies=include_dependencies,
+                        include_members=include_members,
                     )
-                for associated_resource in associated_resources["pending"]:
-                    # Check if this resource is already being migrated
-                    existing = db_api.get_migrations(
-                        source_id=associated_resource.source_id,
-                        resource_type=associated_resource.resource_type,
+
+                    # Refresh the associated resources and ensure that all of
+                    # them have been migrated.
+                    resolved_associated_resources = self._get_associated_resources(
+                        resource_type, resource_id, associated_resources
                     )
-                    if existing:
-                        if existing[0].status in constants.LIST_STATUS_MIGRATED:
-                            LOG.info(
-                                "Associated resource %s %s already completed"
-                                " (migration %s, status %s), "
-                                "skipping duplicate migration",
-                                associated_resource.resource_type,
-                                associated_resource.source_id,
-                                existing[0].uuid,
-                                existing[0].status,
+                    if resolved_associated_resources["pending"]:
+                        raise exception.OpenstackMigrateException(
+                            "Unable to migrate %s resource (%s), "
+                            "dependencies still pending: %s"
+                            % (
+                                resource_type,
+                                resource_id,
+                                resolved_associated_resources,
                             )
-                            continue
-                        elif existing[0].status == constants.STATUS_IN_PROGRESS:
-                            LOG.info(
-                                "Associated resource %s %s already in progress"
-                                " (migration %s), "
-                                "will be available once migration completes",
-                                associated_resource.resource_type,
-                                associated_resource.source_id,
-                                existing[0].uuid,
-                            )
-                            continue
+                        )
+
+                self._run_migration_handler(
+                    handler, migration, resolved_associated_resources["migrated"]
+                )
+        except Exception as ex:
+            migration.status = constants.STATUS_FAILED
+            migration.error_message = "Migration failed, error: %r" % ex
+            self._save_migration(migration)
+            raise
+
+        LOG.info(
+            "Successfully migrated %s resource, destination id: %s",
+            resource_type,
+            migration.destination_id,
+        )
+
+        return migration, cleanup_associated_migrations
+
+    def _get_resource_lock(self, resource_type: str, resource_id: str):
+        with self._resource_locks_lock:
+            return self._resource_locks.setdefault(
+                (resource_type, resource_id), threading.Lock()
+            )
+
+    def _migrate_associated_resources(
+        self,
+        handler,
+        pending_resources: typing.Sequence[base.Resource],
+        include_dependencies: bool,
+        include_members: bool,
+    ) -> list[models.Migration]:
+        """Migrate the pending associated resources.
+
+        The resources whose types are returned by the handler's
+        "get_concurrent_associated_resource_types" are migrated concurrently,
+        up to "max_concurrent_dependencies" at a time, after the other
+        associated resources.
+
+        Returns the associated migrations that can be cleaned up.
+        """
+        concurrent_types = handler.get_concurrent_associated_resource_types()
+        serial_resources = []
+        concurrent_resources = []
+        for resource in pending_resources:
+            if (
+                resource.resource_type in concurrent_types
+                and CONFIG.max_concurrent_dependencies > 1
+            ):
+                concurrent_resources.append(resource)
+            else:
+                serial_resources.append(resource)
+
+        migrate = functools.partial(
+            self._migrate_associated_resource,
+            include_dependencies=include_dependencies,
+            include_members=include_members,
+        )
+        results = [(resource, migrate(resource)) for resource in serial_resources]
+        if concurrent_resources:
+            with futures.ThreadPoolExecutor(
+                max_workers=CONFIG.max_concurrent_dependencies,
+                thread_name_prefix="dependency",
+            ) as pool:
+                pending_futures = [
+                    pool.submit(migrate, resource) for resource in concurrent_resources
+                ]
+            # Wait for all the concurrent migrations before propagating errors.
+            results += [
+                (resource, future.result())
+                for resource, future in zip(concurrent_resources, pending_futures)
+            ]
+
+        cleanup_associated_migrations = []
+        for associated_resource, associated_migration in results:
+            if not associated_migration:
+                continue
+            # Indirect dependencies will not be included.
+            if associated_resource.should_cleanup:
+                LOG.debug(
+                    "Adding associated resource to the cleanup list: %s",
+                    associated_resource,
+                )
+                cleanup_associated_migrations.append(associated_migration)
+            else:
+                LOG.debug(
+                    "The associated resource should not be cleaned up: %s, "
+                    "it may be shared with other resources.",
+                    associated_resource,
+                )
+        return cleanup_associated_migrations
 
+    def _migrate_associated_resource(
+        self,
+        associated_resource: base.Resource,
+        include_dependencies: bool,
+        include_members: bool,
+    ) -> models.Migration | None:
+        """Migrate an associated resource, unless already migrated.
+
+        Associated resources may be shared by resources that are migrated
+        concurrently, in which case the migration is performed only once.
+        """
+        with self._get_resource_lock(
+            associated_resource.resource_type, associated_resource.source_id
+        ):
+            # Check if this resource is already being migrated
+            existing = self._get_latest_migration(
+                associated_resource.resource_type,
+                associated_resource.source_id,
+            )
+            if existing:
+                if existing.status in constants.LIST_STATUS_MIGRATED:
                     LOG.info(
-                        "Migrating associated %s resource: %s",
+                        "Associated resource %s %s already completed"
+                        " (migration %s, status %s), "
+                        "skipping duplicate migration",
                         associated_resource.resource_type,
                         associated_resource.source_id,
+                        existing.uuid,
+                        existing.status,
                     )
-                    associated_migration = self.perform_individual_migration(
+                    return None
+                elif existing.status == constants.STATUS_IN_PROGRESS:
+                    LOG.info(
+                        "Associated resource %s %s already in progress"
+                        " (migration %s), "
+                        "will be available once migration completes",
                         associated_resource.resource_type,
                         associated_resource.source_id,
-                        include_dependencies=include_dependencies,
-                        include_members=include_members,
+                        existing.uuid,
                     )
-                    # Indirect dependencies will not be included.
-                    if associated_resource.should_cleanup:
-                        LOG.debug(
-                            "Adding associated resource to the cleanup list: %s",
-                            associated_resource,
-                        )
-                        cleanup_associated_migrations.append(associated_migration)
-                    else:
-                        LOG.debug(
-                            "The associated resource should not be cleaned up: %s, "
-                            "it may be shared with other resources.",
-                            associated_resource,
-                        )
+                    return None
 
-                # Refresh the associated resources and ensure that all of them have
-                # been migrated.
-                associated_resources = self._get_associated_resources(
-                    resource_type, resource_id
-                )
-                if associated_resources["pending"]:
-                    raise exception.OpenstackMigrateException(
-                        "Unable to migrate %s resource (%s), "
-                        "dependencies still pending: %s"
-                        % (resource_type, resource_id, associated_resources)
+            LOG.info(
+                "Migrating associated %s resource: %s",
+                associated_resource.resource_type,
+                associated_resource.source_id,
+            )
+            return self.perform_individual_migration(
+                associated_resource.resource_type,
+                associated_resource.source_id,
+                include_dependencies=include_dependencies,
+                include_members=include_members,
+            )
+
+    def _run_migration_handler(
+        self,
+        handler,
+        migration: models.Migration,
+        migrated_associated_resources: typing.Sequence[base.Resource],
+    ):
+        """Call the migration handler and record the destination resource id.
+
+        The handler receives the migration record, which is used to checkpoint
+        the migration steps.
+        """
+        handler.set_migration(migration)
+        # The handler is expected to cleanup failed migrations on the destination
+        # side.
+        destination_id = handler.perform_individual_migration(
+            migration.source_id,
+            migrated_associated_resources=migrated_associated_resources,
+        )
+        migration.destination_id = destination_id
+        self._save_migration(migration)
+
+    def resume_migration(
+        self, migration_id: str, cleanup_source: bool = False
+    ) -> models.Migration:
+        """Resume an interrupted or failed migration.
+
+        The migration steps completed by previous attempts are skipped.
+        Pending dependencies must be migrated first and member resources
+        are not included.
+        """
+        migrations = db_api.get_migrations(uuid=migration_id)
+        if not migrations:
+            raise exception.NotFound(f"Migration not found: {migration_id}")
+        migration = migrations[0]
+
+        if migration.status in (
+            constants.STATUS_COMPLETED,
+            constants.STATUS_SOURCE_CLEANUP_FAILED,
+            constants.STATUS_PENDING_FINAL_SYNC,
+        ):
+            LOG.info(
+                "Migration %s already completed, status: %s",
+                migration_id,
+                migration.status,
+            )
+            return migration
+
+        latest = self._get_latest_migration(
+            str(migration.resource_type), str(migration.source_id)
+        )
+        if latest and latest.uuid != migration.uuid:
+            raise exception.InvalidInput(
+                "A newer migration exists for %s resource %s: %s"
+                % (migration.resource_type, migration.source_id, latest.uuid)
+            )
+
+        handler = self._get_migration_handler(str(migration.resource_type))
+        if cleanup_source:
+            self._check_source_cleanup_allowed(handler, str(migration.resource_type))
+        if migration.status in (constants.STATUS_IN_PROGRESS, constants.STATUS_FAILED):
+            completed_steps = db_api.get_migration_steps(
+                migration.id, status=constants.STATUS_COMPLETED
+            )
+            LOG.info(
+                "Resuming %s migration %s, resource id: %s, completed steps: %s",
+                migration.resource_type,
+                migration_id,
+                migration.source_id,
+                [step.name for step in completed_steps],
+            )
+
+            resolved_associated_resources = self._get_associated_resources(
+                str(migration.resource_type), str(migration.source_id)
+            )
+            if resolved_associated_resources["pending"]:
+                raise exception.InvalidInput(
+                    "The %s resource (%s) has pending associated resources, "
+                    "please migrate them first: %s"
+                    % (
+                        migration.resource_type,
+                        migration.source_id,
+                        resolved_associated_resources["pending"],
                     )
+                )
 
-            # The handler is expected to cleanup failed migrations on the destination
-            # side.
-            destination_id = handler.perform_individual_migration(
-                resource_id,
-                migrated_associated_resources=associated_resources["migrated"],
+            migration.status = constants.STATUS_IN_PROGRESS
+            migration.error_message = None
+            self._save_migration(migration)
+            try:
+                self._run_migration_handler(
+                    handler, migration, resolved_associated_resources["migrated"]
+                )
+            except Exception as ex:
+                migration.status = constants.STATUS_FAILED
+                migration.error_message = "Migration failed, error: %r" % ex
+                self._save_migration(migration)
+                raise
+
+        self._complete_migration(
+            handler=handler,
+            migration=migration,
+            associated_migrations=[],
+            migrated_member_resources=None,
+            cleanup_source=(
+                cleanup_source or migration.status == constants.STATUS_PENDING_CLEANUP
+            ),
+        )
+        LOG.info(
+            "Successfully resumed %s migration %s, destination id: %s",
+            migration.resource_type,
+            migration_id,
+            migration.destination_id,
+        )
+        return migration
+
+    def sync_share_data(
+        self,
+        migration_id: str,
+        passes: int = 1,
+        verification: config.ShareVerification = config.ShareVerification.disabled,
+        final: bool = False,
+        cleanup_source: bool = False,
+    ) -> models.Migration:
+        """Transfer the share data modified since the previous copy.
+
+        Used to perform delta syncs after copying the share data while the
+        source share was in use, e.g. during the cutover window. The final
+        sync completes migrations that are pending a final sync, after which
+        the source share may be cleaned up.
+        """
+        migrations = db_api.get_migrations(uuid=migration_id)
+        if not migrations:
+            raise exception.NotFound(f"Migration not found: {migration_id}")
+        migration = migrations[0]
+        if migration.resource_type != "share":
+            raise exception.InvalidInput(
+                f"Migration {migration_id} is not a share migration: "
+                f"{migration.resource_type}"
             )
-            migration.destination_id = destination_id
-            migration.save()
-        except Exception as ex:
-            migration.status = constants.STATUS_FAILED
-            migration.error_message = "Migration failed, error: %r" % ex
-            migration.save()
+        if not migration.destination_id:
+            raise exception.InvalidInput(
+                f"The share migration {migration_id} has not completed yet, "
+                "use the 'resume' command to complete it."
+            )
+        if migration.source_removed:
+            raise exception.InvalidInput(
+                f"The source share of migration {migration_id} has been removed."
+            )
+        if cleanup_source and not final:
+            raise exception.InvalidInput(
+                "The source share may only be cleaned up after the final sync."
+            )
+
+        handler = self._get_migration_handler("share")
+        if not isinstance(handler, share_handler.ShareHandler):
+            raise exception.OpenstackMigrateException(
+                f"Unexpected share migration handler: {handler}"
+            )
+        handler.set_migration(migration)
+        try:
+            handler.sync_share_data(
+                str(migration.source_id),
+                str(migration.destination_id),
+                passes=passes,
+                verification=verification,
+            )
+        except Exception:
+            # Record the transfer metrics and verification results.
+            self._save_migration(migration)
             raise
 
+        if final and migration.status == constants.STATUS_PENDING_FINAL_SYNC:
+            migration.status = constants.STATUS_COMPLETED
+        self._save_migration(migration)
         LOG.info(
-            "Successfully migrated %s resource, destination id: %s",
-            resource_type,
-            destination_id,
+            "Synchronized share %s data, migration: %s, status: %s",
+            migration.source_id,
+            migration_id,
+            migration.status,
         )
-
-        return migration, cleanup_associated_migrations
+        if cleanup_source:
+            self.cleanup_migration_source(migration)
+        return migration
 
     def _migrate_member_resources(
         self,
@@ -251,15 +593,18 @@ class OpenstackMigrationManager:
         """Handle member resource migration logic."""
         migrated_member_resources: list[base.MigratedResource] = []
         member_resources = handler.get_member_resources(resource_id)
+        # Retrieve the migration records at once, the cache is updated
+        # as we go.
+        self._get_latest_migrations(
+            [(member.resource_type, member.source_id) for member in member_resources]
+        )
         for member_resource in member_resources:
             # Check if this resource is already migrated or being migrated
             # (could have been migrated as an associated resource earlier)
-            migrations = db_api.get_migrations(
-                source_id=member_resource.source_id,
-                resource_type=member_resource.resource_type,
+            latest = self._get_latest_migration(
+                member_resource.resource_type, member_resource.source_id
             )
-            if migrations:
-                latest = migrations[0]
+            if latest:
                 if latest.status in constants.LIST_STATUS_MIGRATED:
                     LOG.info(
                         "Member resource %s %s already completed (migration %s - %s), "
@@ -311,30 +656,114 @@ class OpenstackMigrationManager:
         self,
         resource_type: str,
         resource_id: str,
+        associated_resources: list[base.Resource] | None = None,
     ) -> dict[str, typing.Sequence[base.Resource]]:
-        handler = self._get_migration_handler(resource_type)
-        associated_resources = handler.get_associated_resources(resource_id)
+        if associated_resources is None:
+            associated_resources = self._resolve_associated_resources(
+                resource_type, resource_id
+            )
 
         migrated_resources: list[base.MigratedResource] = []
         pending_resources: list[base.Resource] = []
 
+        migrations = self._get_latest_migrations(
+            [
+                (associated_resource.resource_type, associated_resource.source_id)
+                for associated_resource in associated_resources
+            ]
+        )
         for associated_resource in associated_resources:
-            migrations = db_api.get_migrations(
-                source_id=associated_resource.source_id,
-                resource_type=associated_resource.resource_type,
-            )
-            if not migrations:
+            migration = migrations[
+                (associated_resource.resource_type, associated_resource.source_id)
+            ]
+            if not migration:
                 pending_resources.append(associated_resource)
-            elif migrations[0].status not in constants.LIST_STATUS_MIGRATED:
+            elif migration.status not in constants.LIST_STATUS_MIGRATED:
                 pending_resources.append(associated_resource)
             else:
-                migrated_resources.append(self._get_migrated_resource(migrations[0]))
+                migrated_resources.append(self._get_migrated_resource(migration))
 
         return {
             "migrated": migrated_resources,
             "pending": pending_resources,
         }
 
+    def _resolve_associated_resources(
+        self, resource_type: str, resource_id: str
+    ) -> list[base.Resource]:
+        """Get the associated resources reported by the migration handler.
+
+        The result is cached for the duration of the run, avoiding repeated
+        source cloud queries for shared dependencies.
+        """
+
+        def _fetch():
+            handler = self._get_migration_handler(resource_type)
+            return handler.get_associated_resources(resource_id)
+
+        return self._cache.get_associated_resources(
+            (resource_type, resource_id), _fetch
+        )
+
+    def _get_latest_migration(
+        self, resource_type: str, resource_id: str
+    ) -> models.Migration | None:
+        """Get the latest migration of the specified resource, if any."""
+        key = (resource_type, resource_id)
+        return self._cache.get_latest_migration(
+            key, lambda: db_api.get_latest_migrations([key]).get(key)
+        )
+
+    def _get_latest_migrations(
+        self, resource_keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], models.Migration | None]:
+        """Get the latest migrations of multiple resources.
+
+        The uncached entries are retrieved using a single database query.
+
+        :param resource_keys: a list of (resource_type, source_id) tuples
+        """
+        return self._cache.get_latest_migrations(
+            resource_keys, db_api.get_latest_migrations
+        )
+
+    def _save_migration(self, migration: models.Migration):
+        """Save the migration record, keeping the run cache up to date."""
+        migration.save()
+        self._cache.set_latest_migration(migration)
+
+    def register_external_migration(
+        self, resource_type: str, source_id: str, destination_id: str
+    ) -> models.Migration:
+        """Register a migration that was performed externally.
+
+        Returns the existing migration record if the migration was already
+        registered.
+        """
+        migrations = db_api.get_migrations(
+            resource_type=resource_type,
+            source_id=source_id,
+            destination_id=destination_id,
+            status=constants.STATUS_COMPLETED,
+        )
+        if migrations:
+            LOG.warning("Found existing migration: %s, skipping...", migrations[0].uuid)
+            return migrations[0]
+
+        handler = self._get_migration_handler(resource_type)
+        migration = models.Migration(
+            service=handler.get_service_type(),
+            source_cloud=CONFIG.source_cloud_name,
+            destination_cloud=CONFIG.destination_cloud_name,
+            source_id=source_id,
+            resource_type=resource_type,
+            destination_id=destination_id,
+            status=constants.STATUS_COMPLETED,
+            external=True,
+        )
+        self._save_migration(migration)
+        return migration
+
     def perform_batch_migration(
         self,
         resource_type: str,
@@ -343,32 +772,198 @@ class OpenstackMigrationManager:
         cleanup_source: bool = False,
         include_dependencies: bool = False,
         include_members: bool = False,
+        concurrency: int = 1,
     ):
-        """Migrate multiple resources that match the specified filters."""
+        """Migrate multiple resources that match the specified filters.
+
+        If the concurrency is greater than 1, the dependency graph is
+        resolved upfront and independent resources are migrated in parallel.
+        """
+        pending_resource_ids = self._get_pending_batch_resource_ids(
+            resource_type, resource_filters
+        )
+
+        if concurrency > 1:
+            self._perform_parallel_batch_migration(
+                resource_type,
+                pending_resource_ids,
+                dry_run=dry_run,
+                cleanup_source=cleanup_source,
+                include_dependencies=include_dependencies,
+                include_members=include_members,
+                concurrency=concurrency,
+            )
+        else:
+            for resource_id in pending_resource_ids:
+                self.perform_individual_migration(
+                    resource_type,
+                    resource_id,
+                    cleanup_source=cleanup_source,
+                    include_dependencies=include_dependencies,
+                    include_members=include_members,
+                    dry_run=dry_run,
+                )
+
+        LOG.debug("Run cache statistics: %s", dict(self._cache.stats))
+        ratelimit.get_rate_limiter().log_stats()
+        image_cache.get_image_cache().log_stats()
+
+    def _get_pending_batch_resource_ids(
+        self,
+        resource_type: str,
+        resource_filters: dict[str, str],
+    ) -> list[str]:
+        """Get the resources matching the filters that haven't been migrated."""
         handler = self._get_migration_handler(resource_type)
 
         resource_ids = handler.get_source_resource_ids(resource_filters)
 
+        migrations = self._get_latest_migrations(
+            [(resource_type, resource_id) for resource_id in resource_ids]
+        )
+        pending_resource_ids = []
         for resource_id in resource_ids:
-            migrations = db_api.get_migrations(
-                source_id=resource_id, status=constants.STATUS_COMPLETED
-            )
-            if migrations:
+            migration = migrations[(resource_type, resource_id)]
+            if migration and migration.status in (
+                constants.STATUS_COMPLETED,
+                constants.STATUS_PENDING_FINAL_SYNC,
+            ):
                 LOG.info(
                     "Resource already migrated, skipping: %s. Migration: %s.",
                     resource_id,
-                    migrations[-1].uuid,
+                    migration.uuid,
                 )
                 continue
+            pending_resource_ids.append(resource_id)
+        return pending_resource_ids
 
-            self.perform_individual_migration(
-                resource_type,
-                resource_id,
-                cleanup_source=cleanup_source,
-                include_dependencies=include_dependencies,
-                include_members=include_members,
-                dry_run=dry_run,
+    def _perform_parallel_batch_migration(
+        self,
+        resource_type: str,
+        resource_ids: list[str],
+        dry_run: bool,
+        cleanup_source: bool,
+        include_dependencies: bool,
+        include_members: bool,
+        concurrency: int,
+    ):
+        graph = scheduler.build_migration_graph(
+            self,
+            [
+                base.Resource(resource_type=resource_type, source_id=resource_id)
+                for resource_id in resource_ids
+            ],
+            include_dependencies=include_dependencies,
+            include_members=include_members,
+            cleanup_source=cleanup_source,
+        )
+        scheduler.estimate_migration_costs(self, graph, concurrency=concurrency)
+        if dry_run:
+            scheduler.log_migration_graph(graph, prefix="DRY-RUN: ")
+            scheduler.log_schedule_estimate(graph, concurrency, prefix="DRY-RUN: ")
+            return
+        scheduler.log_schedule_estimate(graph, concurrency)
+
+        executor = scheduler.ParallelMigrationExecutor(
+            self, graph, concurrency=concurrency
+        )
+        executor.run()
+
+    def create_migration_plan(
+        self,
+        resource_type: str,
+        resource_filters: dict[str, str] | None = None,
+        resource_ids: list[str] | None = None,
+        cleanup_source: bool = False,
+        include_dependencies: bool = False,
+        include_members: bool = False,
+    ) -> models.MigrationPlan:
+        """Resolve the dependency graph and store it as a migration plan.
+
+        The resources are either specified explicitly or selected using
+        batch migration filters.
+        """
+        if not resource_type:
+            raise exception.InvalidInput("No resource type specified.")
+        if resource_ids and resource_filters:
+            raise exception.InvalidInput(
+                "Resource ids and resource filters are mutually exclusive."
+            )
+        if not resource_ids:
+            resource_ids = self._get_pending_batch_resource_ids(
+                resource_type, resource_filters or {}
+            )
+
+        graph = scheduler.build_migration_graph(
+            self,
+            [
+                base.Resource(resource_type=resource_type, source_id=resource_id)
+                for resource_id in resource_ids
+            ],
+            include_dependencies=include_dependencies,
+            include_members=include_members,
+            cleanup_source=cleanup_source,
+        )
+        plan = scheduler.save_migration_graph(
+            graph,
+            source_cloud=CONFIG.source_cloud_name,
+            destination_cloud=CONFIG.destination_cloud_name,
+            resource_type=resource_type,
+            resource_filters=json.dumps(resource_filters or {}),
+            cleanup_source=cleanup_source,
+        )
+        LOG.info(
+            "Created migration plan %s, resources: %s.", plan.uuid, len(graph.nodes)
+        )
+        return plan
+
+    def apply_migration_plan(self, plan_id: str, concurrency: int = 1):
+        """Execute a migration plan.
+
+        The dependencies are retrieved from the plan instead of querying
+        the source cloud again.
+        """
+        plans = db_api.get_migration_plans(uuid=plan_id)
+        if not plans:
+            raise exception.NotFound(f"Migration plan not found: {plan_id}")
+        plan = plans[0]
+        if (plan.source_cloud, plan.destination_cloud) != (
+            CONFIG.source_cloud_name,
+            CONFIG.destination_cloud_name,
+        ):
+            raise exception.InvalidInput(
+                f"The migration plan {plan_id} was created for a different "
+                f"cloud pair: {plan.source_cloud} -> {plan.destination_cloud}, "
+                f"configured clouds: {CONFIG.source_cloud_name} -> "
+                f"{CONFIG.destination_cloud_name}"
+            )
+
+        graph = scheduler.load_migration_graph(plan)
+        LOG.info(
+            "Applying migration plan %s, resources: %s.", plan_id, len(graph.nodes)
+        )
+        scheduler.estimate_migration_costs(self, graph, concurrency=concurrency)
+        scheduler.log_schedule_estimate(graph, concurrency)
+
+        plan.status = constants.STATUS_IN_PROGRESS
+        plan.save()
+        try:
+            executor = scheduler.ParallelMigrationExecutor(
+                self, graph, concurrency=concurrency
             )
+            executor.run()
+        except Exception as ex:
+            plan.status = constants.STATUS_FAILED
+            plan.error_message = "Migration plan failed, error: %r" % ex
+            plan.save()
+            raise
+        finally:
+            ratelimit.get_rate_limiter().log_stats()
+            image_cache.get_image_cache().log_stats()
+
+        plan.status = constants.STATUS_COMPLETED
+        plan.error_message = None
+        plan.save()
 
     def cleanup_migration_source(self, migration: models.Migration):
         """Cleanup the migration source."""
@@ -384,11 +979,11 @@ class OpenstackMigrationManager:
             handler = self._get_migration_handler(migration.resource_type)
             handler.delete_source_resource(migration.source_id)
             migration.source_removed = True
-            migration.save()
+            self._save_migration(migration)
         except Exception as ex:
             migration.status = constants.STATUS_SOURCE_CLEANUP_FAILED
             migration.error_message = "Source cleanup failed, error: %r" % ex
-            migration.save()
+            self._save_migration(migration)
             raise
 
     def _get_migrated_resource(
@@ -417,20 +1012,17 @@ class OpenstackMigrationManager:
         if not resource_id:
             raise exception.InvalidInput("No resource id specified.")
 
-        existing = db_api.get_migrations(
-            source_id=resource_id,
-            resource_type=resource_type,
-        )
-        if existing and existing[0].status in constants.LIST_STATUS_MIGRATED:
+        existing = self._get_latest_migration(resource_type, resource_id)
+        if existing and existing.status in constants.LIST_STATUS_MIGRATED:
             LOG.info(
                 "Already migrated %s resource: %s (migration %s, status %s) "
                 "skipping duplicate migration",
                 resource_type,
                 resource_id,
-                existing[0].uuid,
-                existing[0].status,
+                existing.uuid,
+                existing.status,
             )
-            return existing[0]
+            return existing
 
         LOG.info(
             "DRY-RUN: migrating %s resource: %s, cleanup source: %s",
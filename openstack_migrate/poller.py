@@ -0,0 +1,311 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Central resource status poller.
+
+Instead of polling each resource individually, the migration handlers
+register status waits with the poller. Pending resources are grouped (e.g.
+by cloud, resource type and project) and each group is refreshed using a
+single list request, resolving the futures of the resources that reached
+the requested status.
+"""
+
+import dataclasses
+import logging
+import threading
+import time
+import typing
+from concurrent import futures
+
+from openstack import exceptions as openstack_exc
+
+from openstack_migrate import config
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+@dataclasses.dataclass(eq=False)
+class _Wait:
+    resource_id: str
+    status: str
+    failures: list[str]
+    attribute: str
+    deadline: float | None
+    # Returns True while an asynchronous operation is in progress, in which
+    # case the failure statuses are ignored.
+    pending: typing.Callable[[typing.Any], bool] | None = None
+    future: futures.Future = dataclasses.field(default_factory=futures.Future)
+
+
+@dataclasses.dataclass
+class _WaitGroup:
+    # Retrieves the resources of this group, used to check multiple
+    # resources at once.
+    list_resources: typing.Callable[[], typing.Iterable[typing.Any]]
+    # Retrieves individual resources that are missing from the list.
+    get_resource: typing.Callable[[str], typing.Any]
+    interval: float
+    next_poll: float
+    waits: list[_Wait] = dataclasses.field(default_factory=list)
+    last_statuses: dict[str, str | None] = dataclasses.field(default_factory=dict)
+
+
+def _normalize_status(status: str | None) -> str | None:
+    return status.lower() if status else status
+
+
+class StatusPoller:
+    """Resolve resource status waits using one request per resource group.
+
+    The polling interval of each group starts at "min_interval" and
+    increases up to "max_interval" while none of the resources change their
+    status. The interval is reset once a status change is observed.
+    """
+
+    def __init__(
+        self,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+    ):
+        self._min_interval = (
+            CONF.status_poll_min_interval if min_interval is None else min_interval
+        )
+        self._max_interval = (
+            CONF.status_poll_max_interval if max_interval is None else max_interval
+        )
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._groups: dict[typing.Hashable, _WaitGroup] = {}
+        self._thread: threading.Thread | None = None
+
+    def watch(
+        self,
+        group: typing.Hashable,
+        list_resources: typing.Callable[[], typing.Iterable[typing.Any]],
+        get_resource: typing.Callable[[str], typing.Any],
+        resource_id: str,
+        status: str,
+        failures: list[str] | None = None,
+        attribute: str = "status",
+        timeout: float | None = None,
+        pending: typing.Callable[[typing.Any], bool] | None = None,
+    ) -> futures.Future:
+        """Register a status wait, returning a future.
+
+        :param group: the resource group key, e.g. (cloud, resource type,
+            project). Waits that share the same group are expected to pass
+            the same list callback.
+        :param list_resources: callback that retrieves the resources of
+            the group
+        :param get_resource: callback used to retrieve individual resources
+            that are missing from the list
+        :param resource_id: the id of the awaited resource
+        :param status: the expected resource status
+        :param failures: statuses that indicate a failed transition
+        :param attribute: the resource attribute that contains the status
+        :param timeout: how long to wait for the expected status (seconds)
+        :param pending: optional callback that returns True while an
+            asynchronous operation is in progress, in which case the failure
+            statuses are ignored. Useful for operations that start from
+            and revert the resource to one of the failure statuses.
+
+        The future will contain the updated resource or an
+        openstack ResourceFailure or ResourceTimeout exception.
+        """
+        wait = _Wait(
+            resource_id=resource_id,
+            status=str(_normalize_status(status)),
+            failures=[str(_normalize_status(failure)) for failure in failures or []],
+            attribute=attribute,
+            deadline=time.monotonic() + timeout if timeout else None,
+            pending=pending,
+        )
+        with self._lock:
+            wait_group = self._groups.get(group)
+            if not wait_group:
+                wait_group = _WaitGroup(
+                    list_resources=list_resources,
+                    get_resource=get_resource,
+                    interval=self._min_interval,
+                    next_poll=time.monotonic(),
+                )
+                self._groups[group] = wait_group
+            wait_group.waits.append(wait)
+            self._ensure_started()
+            self._wakeup.notify()
+        return wait.future
+
+    def wait_for_status(self, *args, **kwargs) -> typing.Any:
+        """Register a status wait and block until the future completes.
+
+        Receives the same arguments as "watch".
+        """
+        return self.watch(*args, **kwargs).result()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="status-poller", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._groups:
+                    self._wakeup.wait()
+                group_key, wait_group = min(
+                    self._groups.items(), key=lambda item: item[1].next_poll
+                )
+                delay = wait_group.next_poll - time.monotonic()
+                if delay > 0:
+                    # New waits may be registered in the meantime.
+                    self._wakeup.wait(delay)
+                    continue
+                waits = list(wait_group.waits)
+
+            try:
+                changed = self._poll_group(group_key, wait_group, waits)
+            except Exception as ex:
+                LOG.warning("Unable to poll %s resources: %r", group_key, ex)
+                changed = False
+
+            now = time.monotonic()
+            for wait in waits:
+                if not wait.future.done() and wait.deadline and now > wait.deadline:
+                    wait_group.last_statuses.pop(wait.resource_id, None)
+                    wait.future.set_exception(
+                        openstack_exc.ResourceTimeout(
+                            f"Timeout waiting for {wait.resource_id} to "
+                            f"transition to {wait.status}"
+                        )
+                    )
+
+            with self._lock:
+                finished = [wait for wait in waits if wait.future.done()]
+                wait_group.waits = [
+                    wait for wait in wait_group.waits if wait not in finished
+                ]
+                if not wait_group.waits:
+                    del self._groups[group_key]
+                    continue
+
+                if changed:
+                    wait_group.interval = self._min_interval
+                else:
+                    wait_group.interval = min(
+                        wait_group.interval * 1.5, self._max_interval
+                    )
+                wait_group.next_poll = time.monotonic() + wait_group.interval
+
+    def _poll_group(
+        self,
+        group_key: typing.Hashable,
+        wait_group: _WaitGroup,
+        waits: list[_Wait],
+    ) -> bool:
+        """Refresh a resource group, returns True if any status changed."""
+        pending_ids = {wait.resource_id for wait in waits}
+        resources = {
+            resource.id: resource
+            for resource in wait_group.list_resources()
+            if resource.id in pending_ids
+        }
+        LOG.debug(
+            "Polled %s resources: %s pending, %s listed.",
+            group_key,
+            len(pending_ids),
+            len(resources),
+        )
+
+        changed = False
+        for wait in waits:
+            resource = resources.get(wait.resource_id)
+            if resource is None:
+                # Not included in the list, e.g. due to filters or visibility.
+                try:
+                    resource = wait_group.get_resource(wait.resource_id)
+                except openstack_exc.NotFoundException:
+                    resource = None
+                if resource is None:
+                    wait.future.set_exception(
+                        openstack_exc.ResourceFailure(
+                            f"{wait.resource_id} went away while waiting "
+                            f"for {wait.status}"
+                        )
+                    )
+                    continue
+
+            status = _normalize_status(getattr(resource, wait.attribute))
+            previous_status = wait_group.last_statuses.get(wait.resource_id)
+            wait_group.last_statuses[wait.resource_id] = status
+            changed = changed or status != previous_status
+
+            if status == wait.status:
+                wait_group.last_statuses.pop(wait.resource_id, None)
+                wait.future.set_result(resource)
+            elif status in wait.failures and not (
+                wait.pending and wait.pending(resource)
+            ):
+                wait_group.last_statuses.pop(wait.resource_id, None)
+                wait.future.set_exception(
+                    openstack_exc.ResourceFailure(
+                        f"{wait.resource_id} transitioned to failure state {status}"
+                    )
+                )
+            else:
+                LOG.debug(
+                    "Still waiting for resource %s to reach state %s, "
+                    "current state is %s",
+                    wait.resource_id,
+                    wait.status,
+                    status,
+                )
+        return changed
+
+
+_POLLER: StatusPoller | None = None
+_POLLER_LOCK = threading.Lock()
+
+
+def get_poller() -> StatusPoller:
+    """Retrieve the process-wide status poller."""
+    global _POLLER
+    with _POLLER_LOCK:
+        if not _POLLER:
+            _POLLER = StatusPoller()
+        return _POLLER
+
+
+def wait_for_resource_status(
+    session,
+    resource_type: str,
+    resource_id: str,
+    list_resources: typing.Callable[[], typing.Iterable[typing.Any]],
+    get_resource: typing.Callable[[str], typing.Any],
+    status: str,
+    failures: list[str] | None = None,
+    attribute: str = "status",
+    timeout: float | None = None,
+    group_id: str | None = None,
+    pending: typing.Callable[[typing.Any], bool] | None = None,
+) -> typing.Any:
+    """Wait for an Openstack resource to reach the specified status.
+
+    The resources that share the same cloud, resource type and group id
+    (e.g. project id) are polled at once using the "list_resources" callback,
+    which must apply the same filters for the entire group.
+    """
+    return get_poller().wait_for_status(
+        (session.config.name, resource_type, group_id),
+        list_resources,
+        get_resource,
+        resource_id,
+        status,
+        failures=failures,
+        attribute=attribute,
+        timeout=timeout,
+        pending=pending,
+    )
@@ -0,0 +1,190 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Openstack API rate limiting.
+
+The Openstack connections retrieved through the connection registry are
+rate limited on a per cloud and per service basis, avoiding overloading the
+Openstack control plane when performing concurrent migrations.
+"""
+
+import collections
+import contextlib
+import logging
+import threading
+import time
+import typing
+
+from openstack_migrate import config
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+# Maps Keystone catalog service types to the service names returned by
+# the migration handlers.
+SERVICE_TYPE_NAMES = {
+    "compute": "nova",
+    "volume": "cinder",
+    "volumev2": "cinder",
+    "volumev3": "cinder",
+    "block-storage": "cinder",
+    "image": "glance",
+    "network": "neutron",
+    "identity": "keystone",
+    "share": "manila",
+    "sharev2": "manila",
+    "shared-file-system": "manila",
+    "load-balancer": "octavia",
+    "dns": "designate",
+    "key-manager": "barbican",
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = float(self._burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Acquire a token, blocking until one becomes available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._last_refill) * self._rate
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self._rate
+            time.sleep(delay)
+
+
+class _ServiceLimiter:
+    def __init__(self, limit: config.ApiRateLimit):
+        self.bucket = (
+            TokenBucket(limit.requests_per_second, limit.burst or 1)
+            if limit.requests_per_second
+            else None
+        )
+        self.semaphore = (
+            threading.BoundedSemaphore(limit.max_in_flight)
+            if limit.max_in_flight
+            else None
+        )
+
+
+class RateLimiter:
+    """Rate limit Openstack API requests per cloud and service.
+
+    The limits are defined through the "api_rate_limits" setting. The time
+    spent waiting for the limiter is recorded for each cloud and service.
+    """
+
+    def __init__(self, limits: dict[str, config.ApiRateLimit] | None = None):
+        self._limits = CONF.api_rate_limits if limits is None else limits
+        self._lock = threading.Lock()
+        self._limiters: dict[tuple[str, str], _ServiceLimiter | None] = {}
+        # Seconds spent waiting for the rate limiters.
+        self.throttled_time: collections.defaultdict[tuple[str, str], float] = (
+            collections.defaultdict(float)
+        )
+        self.request_count: collections.Counter[tuple[str, str]] = collections.Counter()
+
+    def _get_limiter(self, cloud_name: str, service: str) -> _ServiceLimiter | None:
+        key = (cloud_name, service)
+        with self._lock:
+            if key not in self._limiters:
+                # Cloud specific limits take precedence.
+                limit = (
+                    self._limits.get(f"{cloud_name}:{service}")
+                    or self._limits.get(service)
+                    or self._limits.get("default")
+                )
+                self._limiters[key] = _ServiceLimiter(limit) if limit else None
+            return self._limiters[key]
+
+    @contextlib.contextmanager
+    def limit(self, cloud_name: str, service: str) -> typing.Iterator[None]:
+        """Wait for the rate limiter before performing an API request."""
+        limiter = self._get_limiter(cloud_name, service)
+        if not limiter:
+            yield
+            return
+
+        start = time.monotonic()
+        if limiter.semaphore:
+            limiter.semaphore.acquire()
+        try:
+            if limiter.bucket:
+                limiter.bucket.acquire()
+            throttled = time.monotonic() - start
+            with self._lock:
+                self.throttled_time[(cloud_name, service)] += throttled
+                self.request_count[(cloud_name, service)] += 1
+            yield
+        finally:
+            if limiter.semaphore:
+                limiter.semaphore.release()
+
+    def log_stats(self):
+        """Log the time spent throttled for each cloud and service."""
+        with self._lock:
+            for key, count in sorted(self.request_count.items()):
+                LOG.info(
+                    "API rate limiter stats, cloud: %s, service: %s, "
+                    "requests: %s, throttled: %.2fs.",
+                    key[0],
+                    key[1],
+                    count,
+                    self.throttled_time[key],
+                )
+
+
+def get_service_name(endpoint_filter: dict[str, typing.Any] | None) -> str | None:
+    """Get the service name (e.g. "nova") based on the endpoint filter."""
+    service_type = (endpoint_filter or {}).get("service_type")
+    if not service_type:
+        return None
+    return SERVICE_TYPE_NAMES.get(service_type, service_type)
+
+
+def apply_rate_limits(connection, cloud_name: str, limiter: "RateLimiter"):
+    """Rate limit the requests performed through an Openstack connection.
+
+    This wraps the underlying Keystone session, which is used by all the
+    openstacksdk service proxies and the clients that reuse the session.
+    """
+    session = connection.session
+    if getattr(session, "_rate_limited", False):
+        return
+    request = session.request
+
+    def _rate_limited_request(url, method, *args, **kwargs):
+        service = get_service_name(kwargs.get("endpoint_filter"))
+        if not service:
+            return request(url, method, *args, **kwargs)
+        with limiter.limit(cloud_name, service):
+            return request(url, method, *args, **kwargs)
+
+    session.request = _rate_limited_request
+    session._rate_limited = True
+
+
+_LIMITER: RateLimiter | None = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Retrieve the process-wide rate limiter."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if not _LIMITER:
+            _LIMITER = RateLimiter()
+        return _LIMITER
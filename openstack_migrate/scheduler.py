@@ -0,0 +1,666 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Dependency aware migration scheduling.
+
+The migration graph combines the associated (dependency) and member resources
+of the requested resources. Each resource is represented by a single node,
+which means that shared dependencies (e.g. networks, flavors, projects) are
+migrated exactly once.
+
+Nodes that do not depend on each other are migrated concurrently using a
+bounded worker pool. Dependent resources are released as soon as all their
+dependencies have been migrated.
+
+Member resources depend on their parent resource. The parent migration is
+completed (member resources connected to the parent, source resources cleaned
+up) once all its members have been processed.
+
+The ready nodes are started in the order of their estimated remaining
+cost: the node's own migration duration, estimated using the transferred
+data size or historical migration durations, plus the longest chain of
+dependent migrations. This starts the longest transfers first instead of
+leaving them at the tail of the migration window.
+"""
+
+import collections
+import datetime
+import heapq
+import itertools
+import json
+import logging
+import threading
+from concurrent import futures
+
+from openstack_migrate import config, constants, exception
+from openstack_migrate.db import api as db_api
+from openstack_migrate.db import models
+from openstack_migrate.handlers import base
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+# (resource_type, source_id)
+ResourceKey = tuple[str, str]
+
+_ACTION_MIGRATE = "migrate"
+_ACTION_COMPLETE = "complete"
+
+_RELATION_DEPENDENCY = "dependency"
+_RELATION_MEMBER = "member"
+
+# Estimated migration duration (seconds) of the resources that do not
+# report a size and were never migrated before.
+DEFAULT_MIGRATION_COST = 1.0
+
+
+class MigrationNode:
+    """A resource that is part of the migration graph."""
+
+    def __init__(self, resource_type: str, source_id: str):
+        self.resource_type = resource_type
+        self.source_id = source_id
+        # The dependencies reported by the migration handler, including the
+        # ones that have already been migrated.
+        self.associated_resources: list[base.Resource] = []
+        # Nodes that must be migrated before this one (pending dependencies
+        # and parent resources).
+        self.requires: set[ResourceKey] = set()
+        self.required_by: set[ResourceKey] = set()
+        # Member (contained) resources and the parents containing this node.
+        self.members: list[ResourceKey] = []
+        self.parents: set[ResourceKey] = set()
+        # Whether the source resource should be removed after the migration.
+        self.cleanup_source = False
+        # The estimated migration duration (seconds).
+        self.cost = DEFAULT_MIGRATION_COST
+        # The estimated duration of the longest migration chain starting
+        # with this node, including its own cost.
+        self.priority = 0.0
+
+    @property
+    def key(self) -> ResourceKey:
+        """The (resource_type, source_id) tuple identifying the node."""
+        return (self.resource_type, self.source_id)
+
+    def __repr__(self) -> str:
+        """Describe the node."""
+        return f"MigrationNode({self.resource_type}, {self.source_id})"
+
+
+class MigrationGraph:
+    """Dependency graph of the resources that are going to be migrated."""
+
+    def __init__(self, include_dependencies: bool, include_members: bool):
+        self.include_dependencies = include_dependencies
+        self.include_members = include_members
+        self.nodes: dict[ResourceKey, MigrationNode] = {}
+        # The resources explicitly requested by the user.
+        self.roots: list[ResourceKey] = []
+
+    def add_node(self, resource_type: str, source_id: str) -> MigrationNode:
+        """Add a resource to the graph, returning the existing node if any."""
+        key = (resource_type, source_id)
+        if key not in self.nodes:
+            self.nodes[key] = MigrationNode(resource_type, source_id)
+        return self.nodes[key]
+
+    def add_dependency(self, node_key: ResourceKey, dependency_key: ResourceKey):
+        """Declare that "dependency_key" must be migrated before "node_key"."""
+        self.nodes[node_key].requires.add(dependency_key)
+        self.nodes[dependency_key].required_by.add(node_key)
+
+    def add_member(self, parent_key: ResourceKey, member_key: ResourceKey):
+        """Declare a member resource, migrated after its parent."""
+        parent = self.nodes[parent_key]
+        if member_key not in parent.members:
+            parent.members.append(member_key)
+        self.nodes[member_key].parents.add(parent_key)
+        self.add_dependency(member_key, parent_key)
+
+    def get_levels(self) -> list[list[MigrationNode]]:
+        """Group the nodes by topological level.
+
+        The nodes from a given level only depend on nodes from the previous
+        levels and can be migrated concurrently.
+        """
+        remaining = {key: len(node.requires) for key, node in self.nodes.items()}
+        level = [self.nodes[key] for key, count in remaining.items() if not count]
+        levels = []
+        processed = 0
+        while level:
+            levels.append(level)
+            processed += len(level)
+            next_level = []
+            for node in level:
+                for dependent_key in sorted(node.required_by):
+                    remaining[dependent_key] -= 1
+                    if not remaining[dependent_key]:
+                        next_level.append(self.nodes[dependent_key])
+            level = next_level
+
+        if processed != len(self.nodes):
+            cyclic = [key for key, count in remaining.items() if count]
+            raise exception.InvalidInput(
+                "Circular resource dependencies detected: %s" % cyclic
+            )
+        return levels
+
+    def update_priorities(self):
+        """Compute the node priorities based on the estimated costs."""
+        for level in reversed(self.get_levels()):
+            for node in level:
+                node.priority = node.cost + max(
+                    (self.nodes[key].priority for key in node.required_by),
+                    default=0,
+                )
+
+
+def _is_pending(mgr, resource: base.Resource) -> bool:
+    """Check whether the resource still needs to be migrated."""
+    migration = mgr._get_latest_migration(resource.resource_type, resource.source_id)
+    if not migration:
+        return True
+    if migration.status in constants.LIST_STATUS_MIGRATED:
+        return False
+    if migration.status == constants.STATUS_IN_PROGRESS:
+        LOG.info(
+            "%s resource %s already in progress (migration %s), "
+            "it will not be included in the migration graph",
+            resource.resource_type,
+            resource.source_id,
+            migration.uuid,
+        )
+        return False
+    return True
+
+
+def build_migration_graph(
+    mgr,
+    resources: list[base.Resource],
+    include_dependencies: bool = False,
+    include_members: bool = False,
+    cleanup_source: bool = False,
+) -> MigrationGraph:
+    """Resolve the dependencies of the specified resources.
+
+    :param mgr: the migration manager, used to retrieve migration handlers
+    :param resources: the resources requested by the user
+    :param include_dependencies: whether to include pending dependencies
+    :param include_members: whether to include member resources
+    :param cleanup_source: whether the requested resources (and their
+        members) should be removed from the source cloud once migrated
+    """
+    graph = MigrationGraph(
+        include_dependencies=include_dependencies,
+        include_members=include_members,
+    )
+    queue: collections.deque[MigrationNode] = collections.deque()
+    for resource in resources:
+        node = graph.add_node(resource.resource_type, resource.source_id)
+        node.cleanup_source = cleanup_source
+        if node.key not in graph.roots:
+            graph.roots.append(node.key)
+            queue.append(node)
+
+    visited: set[ResourceKey] = set()
+    while queue:
+        node = queue.popleft()
+        if node.key in visited:
+            continue
+        visited.add(node.key)
+
+        handler = mgr._get_migration_handler(node.resource_type)
+        node.associated_resources = mgr._resolve_associated_resources(
+            node.resource_type, node.source_id
+        )
+        if include_dependencies:
+            mgr._get_latest_migrations(
+                [
+                    (resource.resource_type, resource.source_id)
+                    for resource in node.associated_resources
+                ]
+            )
+        for associated_resource in node.associated_resources:
+            # Pending dependencies that aren't included will be reported
+            # when attempting to migrate the dependent resource.
+            if not include_dependencies or not _is_pending(mgr, associated_resource):
+                continue
+            dependency = graph.add_node(
+                associated_resource.resource_type, associated_resource.source_id
+            )
+            graph.add_dependency(node.key, dependency.key)
+            queue.append(dependency)
+
+        if not include_members:
+            continue
+        member_resources = handler.get_member_resources(node.source_id)
+        mgr._get_latest_migrations(
+            [
+                (resource.resource_type, resource.source_id)
+                for resource in member_resources
+            ]
+        )
+        for member_resource in member_resources:
+            if not _is_pending(mgr, member_resource):
+                continue
+            member = graph.add_node(
+                member_resource.resource_type, member_resource.source_id
+            )
+            graph.add_member(node.key, member.key)
+            queue.append(member)
+
+    # Member resources inherit the cleanup flag, similar to sequential
+    # migrations. This also validates the graph.
+    for level in graph.get_levels():
+        for node in level:
+            if any(graph.nodes[key].cleanup_source for key in node.parents):
+                node.cleanup_source = True
+            if node.cleanup_source:
+                mgr._check_source_cleanup_allowed(
+                    mgr._get_migration_handler(node.resource_type), node.resource_type
+                )
+
+    LOG.info(
+        "Resolved migration graph: %s resources, %s requested.",
+        len(graph.nodes),
+        len(graph.roots),
+    )
+    return graph
+
+
+def save_migration_graph(graph: MigrationGraph, **plan_fields) -> models.MigrationPlan:
+    """Persist the migration graph as a migration plan.
+
+    :param graph: the resolved migration graph
+    :param plan_fields: additional migration plan fields
+        (e.g. the requested resource type and filters)
+    """
+    plan = models.MigrationPlan(
+        include_dependencies=graph.include_dependencies,
+        include_members=graph.include_members,
+        status=constants.STATUS_PLANNED,
+        **plan_fields,
+    )
+
+    nodes: list[models.MigrationPlanNode] = []
+    node_indexes: dict[ResourceKey, int] = {}
+    for level_idx, level in enumerate(graph.get_levels()):
+        for node in level:
+            node_indexes[node.key] = len(nodes)
+            nodes.append(
+                models.MigrationPlanNode(
+                    resource_type=node.resource_type,
+                    source_id=node.source_id,
+                    level=level_idx,
+                    requested=node.key in graph.roots,
+                    cleanup_source=node.cleanup_source,
+                    associated_resources=json.dumps(
+                        [
+                            resource.model_dump()
+                            for resource in node.associated_resources
+                        ]
+                    ),
+                )
+            )
+
+    edges: list[tuple[int, int, str]] = []
+    for key, node in graph.nodes.items():
+        for required_key in sorted(node.requires):
+            relation = (
+                _RELATION_MEMBER
+                if required_key in node.parents
+                else _RELATION_DEPENDENCY
+            )
+            edges.append((node_indexes[key], node_indexes[required_key], relation))
+
+    return db_api.create_migration_plan(plan, nodes, edges)
+
+
+def load_migration_graph(plan: models.MigrationPlan) -> MigrationGraph:
+    """Load the migration graph stored by a migration plan."""
+    graph = MigrationGraph(
+        include_dependencies=bool(plan.include_dependencies),
+        include_members=bool(plan.include_members),
+    )
+
+    nodes_by_id: dict[int, MigrationNode] = {}
+    for plan_node in db_api.get_migration_plan_nodes(plan.id):
+        node = graph.add_node(str(plan_node.resource_type), str(plan_node.source_id))
+        node.cleanup_source = bool(plan_node.cleanup_source)
+        node.associated_resources = [
+            base.Resource(**resource)
+            for resource in json.loads(plan_node.associated_resources or "[]")
+        ]
+        if plan_node.requested:
+            graph.roots.append(node.key)
+        nodes_by_id[plan_node.id] = node
+
+    for edge in db_api.get_migration_plan_edges(plan.id):
+        node = nodes_by_id[edge.node_id]
+        required_node = nodes_by_id[edge.required_node_id]
+        if edge.relation == _RELATION_MEMBER:
+            graph.add_member(required_node.key, node.key)
+        else:
+            graph.add_dependency(node.key, required_node.key)
+
+    return graph
+
+
+def log_migration_graph(graph: MigrationGraph, prefix: str = ""):
+    """Log the migration graph, one topological level at a time."""
+    for idx, level in enumerate(graph.get_levels()):
+        for node in level:
+            LOG.info(
+                "%sLevel %s: migrating %s resource: %s, cleanup source: %s, "
+                "estimated duration: %s, depends on: %s",
+                prefix,
+                idx,
+                node.resource_type,
+                node.source_id,
+                node.cleanup_source,
+                _format_duration(node.cost),
+                sorted(node.requires) or "-",
+            )
+
+
+def _format_duration(seconds: float) -> str:
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def estimate_migration_costs(mgr, graph: MigrationGraph, concurrency: int = 1):
+    """Estimate the migration duration of each node and update the priorities.
+
+    The resources that report a size (e.g. volumes, images, shares) are
+    estimated based on the configured transfer rate. Other resources use
+    the average duration of previous migrations of the same type.
+
+    :param mgr: the migration manager, used to retrieve migration handlers
+    :param graph: the migration graph
+    :param concurrency: the number of concurrent size requests
+    """
+    durations = db_api.get_average_migration_durations()
+
+    def _get_size(node: MigrationNode) -> int | None:
+        handler = mgr._get_migration_handler(node.resource_type)
+        try:
+            return handler.get_resource_size(node.source_id)
+        except Exception as ex:
+            LOG.debug(
+                "Unable to retrieve %s resource size: %s, error: %r",
+                node.resource_type,
+                node.source_id,
+                ex,
+            )
+            return None
+
+    nodes = list(graph.nodes.values())
+    with futures.ThreadPoolExecutor(
+        max_workers=max(concurrency, 1), thread_name_prefix="estimate"
+    ) as pool:
+        sizes = list(pool.map(_get_size, nodes))
+
+    for node, size in zip(nodes, sizes):
+        if size:
+            node.cost = size / CONF.estimated_transfer_rate
+        else:
+            node.cost = durations.get(node.resource_type, DEFAULT_MIGRATION_COST)
+    graph.update_priorities()
+
+
+def predict_makespan(graph: MigrationGraph, concurrency: int) -> float:
+    """Predict the total migration duration (seconds).
+
+    Simulates the parallel executor using the estimated node costs.
+    """
+    remaining = {key: len(node.requires) for key, node in graph.nodes.items()}
+    counter = itertools.count()
+    ready = [
+        (-graph.nodes[key].priority, next(counter), key)
+        for key, count in remaining.items()
+        if not count
+    ]
+    heapq.heapify(ready)
+    running: list[tuple[float, int, ResourceKey]] = []
+    now = 0.0
+    while ready or running:
+        while ready and len(running) < concurrency:
+            _, _, key = heapq.heappop(ready)
+            heapq.heappush(running, (now + graph.nodes[key].cost, next(counter), key))
+        now, _, key = heapq.heappop(running)
+        for dependent_key in sorted(graph.nodes[key].required_by):
+            remaining[dependent_key] -= 1
+            if not remaining[dependent_key]:
+                dependent = graph.nodes[dependent_key]
+                heapq.heappush(
+                    ready, (-dependent.priority, next(counter), dependent_key)
+                )
+    return now
+
+
+def log_schedule_estimate(graph: MigrationGraph, concurrency: int, prefix: str = ""):
+    """Log the estimated migration duration."""
+    if not graph.nodes:
+        return
+    LOG.info(
+        "%sEstimated migration duration using %s workers: %s. "
+        "Total work: %s, critical path: %s.",
+        prefix,
+        concurrency,
+        _format_duration(predict_makespan(graph, concurrency)),
+        _format_duration(sum(node.cost for node in graph.nodes.values())),
+        _format_duration(max(node.priority for node in graph.nodes.values())),
+    )
+
+
+class ParallelMigrationExecutor:
+    """Migrate the resources of a migration graph using a worker pool."""
+
+    def __init__(self, mgr, graph: MigrationGraph, concurrency: int = 1):
+        if concurrency < 1:
+            raise exception.InvalidInput(f"Invalid concurrency: {concurrency}")
+        self._mgr = mgr
+        self._graph = graph
+        self._concurrency = concurrency
+
+        self._migrations: dict[ResourceKey, models.Migration] = {}
+        self._failed: dict[ResourceKey, str] = {}
+        self._remaining_dependencies: dict[ResourceKey, int] = {}
+        self._remaining_members: dict[ResourceKey, int] = {}
+        # The number of nodes that would clean up a given dependency. Shared
+        # dependencies are cleaned up once, by the last dependent node.
+        self._remaining_cleanup_dependents: collections.Counter[ResourceKey] = (
+            collections.Counter()
+        )
+        self._cleanup_lock = threading.Lock()
+        self._running: dict[futures.Future, tuple[str, ResourceKey]] = {}
+        # Ready actions, ordered by priority. Only "concurrency" actions are
+        # handed over to the worker pool at a time, allowing the highest
+        # priority actions to start as soon as a worker becomes available.
+        self._ready: list[tuple[bool, float, int, str, ResourceKey]] = []
+        self._counter = itertools.count()
+        self._pool: futures.ThreadPoolExecutor | None = None
+
+    def run(self) -> dict[ResourceKey, models.Migration]:
+        """Migrate all the resources from the graph.
+
+        Failures do not stop the migration of unrelated resources. Resources
+        that depend on failed migrations are skipped. An exception is raised
+        at the end if any of the migrations failed.
+        """
+        # Validate the graph before initiating any migration.
+        self._graph.update_priorities()
+
+        for key, node in self._graph.nodes.items():
+            self._remaining_dependencies[key] = len(node.requires)
+            self._remaining_members[key] = len(node.members)
+            if node.cleanup_source:
+                for associated_resource in node.associated_resources:
+                    if associated_resource.should_cleanup:
+                        self._remaining_cleanup_dependents[
+                            (
+                                associated_resource.resource_type,
+                                associated_resource.source_id,
+                            )
+                        ] += 1
+
+        with futures.ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix="migration"
+        ) as pool:
+            self._pool = pool
+            for key, count in self._remaining_dependencies.items():
+                if not count:
+                    self._submit(_ACTION_MIGRATE, key)
+            self._dispatch()
+
+            while self._running:
+                done, _ = futures.wait(
+                    self._running, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    action, key = self._running.pop(future)
+                    self._process_result(action, key, future)
+                self._dispatch()
+            self._pool = None
+
+        if self._failed:
+            raise exception.OpenstackMigrateException(
+                "Failed to migrate %s resource(s): %s"
+                % (len(self._failed), self._failed)
+            )
+        return self._migrations
+
+    def _submit(self, action: str, key: ResourceKey):
+        # Completing parent migrations is cheap and releases source
+        # resources, so these actions take precedence.
+        heapq.heappush(
+            self._ready,
+            (
+                action != _ACTION_COMPLETE,
+                -self._graph.nodes[key].priority,
+                next(self._counter),
+                action,
+                key,
+            ),
+        )
+
+    def _dispatch(self):
+        if not self._pool:
+            raise exception.OpenstackMigrateException("The worker pool is not running.")
+        while self._ready and len(self._running) < self._concurrency:
+            _, _, _, action, key = heapq.heappop(self._ready)
+            node = self._graph.nodes[key]
+            if action == _ACTION_MIGRATE:
+                future = self._pool.submit(self._migrate_node, node)
+            else:
+                future = self._pool.submit(self._complete_node, node)
+            self._running[future] = (action, key)
+
+    def _process_result(self, action: str, key: ResourceKey, future: futures.Future):
+        node = self._graph.nodes[key]
+        try:
+            result = future.result()
+        except Exception as ex:
+            LOG.error(
+                "Failed to %s %s resource %s: %r",
+                action,
+                node.resource_type,
+                node.source_id,
+                ex,
+            )
+            self._failed[key] = repr(ex)
+            if action == _ACTION_MIGRATE:
+                self._skip_dependents(node)
+            self._member_processed(node)
+            return
+
+        if action == _ACTION_COMPLETE:
+            self._member_processed(node)
+            return
+
+        self._migrations[key] = result
+        # Release the dependent resources, including the member resources.
+        for dependent_key in sorted(node.required_by):
+            if dependent_key in self._failed:
+                continue
+            self._remaining_dependencies[dependent_key] -= 1
+            if not self._remaining_dependencies[dependent_key]:
+                self._submit(_ACTION_MIGRATE, dependent_key)
+        if not self._remaining_members[key]:
+            self._submit(_ACTION_COMPLETE, key)
+
+    def _skip_dependents(self, node: MigrationNode):
+        for dependent_key in sorted(node.required_by):
+            if dependent_key in self._failed:
+                continue
+            dependent = self._graph.nodes[dependent_key]
+            LOG.warning(
+                "Skipping %s resource %s, dependency %s %s failed.",
+                dependent.resource_type,
+                dependent.source_id,
+                node.resource_type,
+                node.source_id,
+            )
+            self._failed[dependent_key] = (
+                f"dependency failed: {node.resource_type} {node.source_id}"
+            )
+            self._skip_dependents(dependent)
+            self._member_processed(dependent)
+
+    def _member_processed(self, node: MigrationNode):
+        """Complete the parent migrations once all members were processed."""
+        for parent_key in sorted(node.parents):
+            if parent_key in self._failed:
+                continue
+            self._remaining_members[parent_key] -= 1
+            if not self._remaining_members[parent_key]:
+                self._submit(_ACTION_COMPLETE, parent_key)
+
+    def _migrate_node(self, node: MigrationNode) -> models.Migration:
+        handler = self._mgr._get_migration_handler(node.resource_type)
+        migration, _ = self._mgr._migrate_parent_resource(
+            handler=handler,
+            resource_type=node.resource_type,
+            resource_id=node.source_id,
+            include_dependencies=self._graph.include_dependencies,
+            include_members=self._graph.include_members,
+            associated_resources=node.associated_resources,
+        )
+        migration.status = constants.STATUS_PENDING_MEMBERS
+        self._mgr._save_migration(migration)
+        return migration
+
+    def _complete_node(self, node: MigrationNode):
+        handler = self._mgr._get_migration_handler(node.resource_type)
+
+        # Similar to sequential migrations, only the dependencies migrated
+        # as part of this run are cleaned up. Dependencies shared by multiple
+        # nodes are cleaned up by the last one to complete, if all of them
+        # succeeded.
+        associated_migrations = []
+        for associated_resource in node.associated_resources:
+            key = (associated_resource.resource_type, associated_resource.source_id)
+            if not associated_resource.should_cleanup or not node.cleanup_source:
+                continue
+            with self._cleanup_lock:
+                self._remaining_cleanup_dependents[key] -= 1
+                last_dependent = not self._remaining_cleanup_dependents[key]
+            if last_dependent and key in self._migrations:
+                associated_migrations.append(self._migrations[key])
+
+        migrated_member_resources: list[base.MigratedResource] | None = None
+        if self._graph.include_members:
+            migrated_member_resources = [
+                self._mgr._get_migrated_resource(self._migrations[key])
+                for key in node.members
+                if key in self._migrations and key not in self._failed
+            ]
+
+        self._mgr._complete_migration(
+            handler=handler,
+            migration=self._migrations[node.key],
+            associated_migrations=associated_migrations,
+            migrated_member_resources=migrated_member_resources,
+            cleanup_source=node.cleanup_source,
+        )
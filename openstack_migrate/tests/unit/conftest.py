@@ -0,0 +1,13 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from openstack_migrate.db import api as db_api
+from openstack_migrate.db import session_utils
+
+
+@pytest.fixture
+def database(tmp_path):
+    session_utils.initialize(f"sqlite:///{tmp_path}/sqlite.db")
+    db_api.create_tables()
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+from unittest import mock
+
+import pytest
+
+from openstack_migrate.utils import connection_utils
+
+
+@mock.patch.object(connection_utils, "_connect")
+def test_connection_reused(mock_connect):
+    registry = connection_utils.ConnectionRegistry()
+    mock_connect.side_effect = lambda cloud_name: mock.Mock(cloud_name=cloud_name)
+
+    connections = []
+
+    def _get_connections():
+        for cloud_name in ("source", "destination"):
+            connections.append(registry.get_connection(cloud_name))
+
+    threads = [threading.Thread(target=_get_connections) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_connect.call_count == 2
+    assert len(set(map(id, connections))) == 2
+
+
+def test_role_assignment_confirmed_once():
+    registry = connection_utils.ConnectionRegistry()
+    grant = mock.Mock()
+
+    for _ in range(3):
+        registry.ensure_role_assignment("source", "project-0", "member", grant)
+    registry.ensure_role_assignment("destination", "project-0", "member", grant)
+
+    assert grant.call_count == 2
+
+
+def test_failed_role_assignment_retried():
+    registry = connection_utils.ConnectionRegistry()
+    grant = mock.Mock(side_effect=[Exception("fake error"), None])
+
+    with pytest.raises(Exception):
+        registry.ensure_role_assignment("source", "project-0", "member", grant)
+    registry.ensure_role_assignment("source", "project-0", "member", grant)
+    registry.ensure_role_assignment("source", "project-0", "member", grant)
+
+    assert grant.call_count == 2
+
+
+def test_project_connections():
+    registry = connection_utils.ConnectionRegistry()
+    connect = mock.Mock(side_effect=lambda: mock.Mock())
+
+    project_0 = registry.get_connection("source", "project-0", connect)
+    assert registry.get_connection("source", "project-0", connect) is project_0
+    assert registry.get_connection("source", "project-1", connect) is not project_0
+    assert connect.call_count == 2
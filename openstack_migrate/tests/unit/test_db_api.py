@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime
+from unittest import mock
+
+import sqlalchemy
+
+from openstack_migrate.db import api as db_api
+from openstack_migrate.db import models, session_utils
+
+
+def _create_migration(resource_type, source_id, status, age=0, archived=False):
+    migration = models.Migration(
+        resource_type=resource_type,
+        source_id=source_id,
+        status=status,
+        archived=archived,
+        created_at=datetime.datetime.now() - datetime.timedelta(minutes=age),
+    )
+    migration.save()
+    return migration
+
+
+@mock.patch.object(db_api, "RESOURCE_KEY_BATCH_SIZE", 2)
+def test_get_latest_migrations(database):
+    _create_migration("volume", "volume-0", "failed", age=10)
+    latest = _create_migration("volume", "volume-0", "completed", age=5)
+    _create_migration("volume", "volume-0", "failed", archived=True)
+    _create_migration("instance", "volume-0", "completed")
+    flavor = _create_migration("flavor", "flavor-0", "in-progress")
+
+    migrations = db_api.get_latest_migrations(
+        [
+            ("volume", "volume-0"),
+            ("flavor", "flavor-0"),
+            ("volume", "missing"),
+            ("volume", "volume-0"),
+        ]
+    )
+
+    assert migrations == {
+        ("volume", "volume-0"): latest,
+        ("flavor", "flavor-0"): flavor,
+    }
+
+
+def test_get_average_migration_durations(database):
+    for duration in (60, 180):
+        migration = _create_migration("volume", "volume-0", "completed", age=10)
+        migration.updated_at = migration.created_at + datetime.timedelta(
+            seconds=duration
+        )
+        migration.save()
+    _create_migration("volume", "volume-1", "failed", age=10)
+    _create_migration("flavor", "flavor-0", "completed")
+
+    durations = db_api.get_average_migration_durations()
+
+    assert list(durations) == ["volume"]
+    assert round(durations["volume"]) == 120
+
+
+def test_create_tables_adds_missing_columns(tmp_path):
+    session_utils.initialize(f"sqlite:///{tmp_path}/sqlite.db")
+    with session_utils.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("CREATE TABLE migrations (id INTEGER PRIMARY KEY)")
+        )
+
+    db_api.create_tables()
+
+    columns = {
+        column["name"]
+        for column in sqlalchemy.inspect(session_utils.engine).get_columns("migrations")
+    }
+    assert "reused" in columns
+    _create_migration("volume", "volume-0", "completed")
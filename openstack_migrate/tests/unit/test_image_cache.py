@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import exception
+from openstack_migrate.transfer import image_cache, resumable
+
+
+def _fake_image(image_id, data):
+    return mock.Mock(
+        id=image_id,
+        size=len(data),
+        checksum=hashlib.md5(data).hexdigest(),
+        hash_algo="sha512",
+        hash_value=hashlib.sha512(data).hexdigest(),
+    )
+
+
+def _fake_spool(images):
+    def _spool(image_proxy, image_id, path, chunk_size, hash_algorithms):
+        path.write_bytes(images[image_id])
+        return {
+            algorithm: hashlib.new(algorithm, images[image_id]).hexdigest()
+            for algorithm in hash_algorithms
+        }
+
+    return _spool
+
+
+def test_image_cache(tmp_path):
+    images = {
+        "image-0": b"a" * 100,
+        "image-1": b"a" * 100,
+        "image-2": b"b" * 100,
+        "image-3": b"c" * 100,
+    }
+    cache = image_cache.ImageCache(cache_dir=tmp_path, max_size=250)
+
+    with mock.patch.object(
+        resumable, "spool_image", side_effect=_fake_spool(images)
+    ) as spool:
+        for image_id in ("image-0", "image-1"):
+            image = _fake_image(image_id, images[image_id])
+            with cache.get_image_file(mock.sentinel.proxy, image) as path:
+                assert path.read_bytes() == images[image_id]
+        # Images with the same content are downloaded only once.
+        spool.assert_called_once()
+
+        first_path = path
+        os.utime(first_path, (0, 0))
+        with cache.get_image_file(
+            mock.sentinel.proxy, _fake_image("image-2", images["image-2"])
+        ) as path:
+            assert path.read_bytes() == images["image-2"]
+
+        # The least recently used entry is evicted.
+        with cache.get_image_file(
+            mock.sentinel.proxy, _fake_image("image-3", images["image-3"])
+        ):
+            pass
+
+    assert not first_path.exists()
+    assert cache.stats == {"hits": 1, "misses": 3, "evictions": 1}
+
+
+def test_image_cache_checksum_mismatch(tmp_path):
+    cache = image_cache.ImageCache(cache_dir=tmp_path, max_size=250)
+    image = _fake_image("image-0", b"a" * 100)
+
+    with mock.patch.object(
+        resumable, "spool_image", side_effect=_fake_spool({"image-0": b"b" * 100})
+    ):
+        with pytest.raises(exception.Invalid):
+            with cache.get_image_file(mock.sentinel.proxy, image):
+                pass
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_image_cache_concurrent_misses(tmp_path):
+    images = {"image-0": b"a" * 90, "image-1": b"b" * 90}
+    cache = image_cache.ImageCache(cache_dir=tmp_path, max_size=100)
+    spool = _fake_spool(images)
+    download_started = threading.Event()
+    download_unblocked = threading.Event()
+
+    def _slow_spool(image_proxy, image_id, path, chunk_size, hash_algorithms):
+        # Only the partial file exists while downloading.
+        path.with_name(path.name + resumable.PARTIAL_SUFFIX).touch()
+        download_started.set()
+        assert download_unblocked.wait(timeout=10)
+        path.with_name(path.name + resumable.PARTIAL_SUFFIX).unlink()
+        return spool(image_proxy, image_id, path, chunk_size, hash_algorithms)
+
+    paths = {}
+
+    def _get_image(image_id):
+        image = _fake_image(image_id, images[image_id])
+        with cache.get_image_file(mock.sentinel.proxy, image) as path:
+            paths[image_id] = path
+
+    with mock.patch.object(resumable, "spool_image", side_effect=_slow_spool):
+        thread = threading.Thread(target=_get_image, args=("image-0",))
+        thread.start()
+        assert download_started.wait(timeout=10)
+        # The ongoing download counts with its full size.
+        _get_image("image-1")
+        download_unblocked.set()
+        thread.join()
+
+    # The second image does not fit in the cache.
+    assert paths["image-0"].read_bytes() == images["image-0"]
+    assert paths["image-1"] is None
+    assert cache.stats == {"misses": 1}
+    assert not cache._reserved
+
+
+def test_iter_file_chunks(tmp_path):
+    path = tmp_path / "image"
+    path.write_bytes(b"x" * 2500)
+
+    chunks = [bytes(chunk) for chunk in resumable.iter_file_chunks(path, 1000)]
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+
+
+def test_get_image_hashes():
+    image = _fake_image("image-0", b"a" * 100)
+    assert image_cache.get_image_hashes(image) == {
+        "md5": image.checksum,
+        "sha512": image.hash_value,
+    }
+
+    image.hash_algo = None
+    image.checksum = None
+    assert image_cache.get_image_hashes(image) == {}
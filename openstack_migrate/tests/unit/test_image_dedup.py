@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import config
+from openstack_migrate.transfer import dedup
+
+
+def _fake_image(
+    image_id, hash_value="abc", owner="owner-0", visibility="private", name=None
+):
+    image = mock.Mock(
+        id=image_id,
+        hash_algo="sha512",
+        hash_value=hash_value,
+        disk_format="qcow2",
+        container_format="bare",
+        owner=owner,
+        visibility=visibility,
+    )
+    # "name" is a reserved Mock argument.
+    image.name = name or image_id
+    return image
+
+
+@pytest.mark.parametrize(
+    "mode, owner, expected_id",
+    [
+        (config.ImageDeduplication.disabled, "owner-0", None),
+        (config.ImageDeduplication.same_owner, "owner-0", "image-1"),
+        (config.ImageDeduplication.same_owner, "owner-2", None),
+        (config.ImageDeduplication.any, "owner-0", "image-1"),
+        (config.ImageDeduplication.any, "owner-2", "image-0"),
+    ],
+)
+def test_destination_image_index(mode, owner, expected_id):
+    image_proxy = mock.Mock()
+    image_proxy.images.return_value = [
+        _fake_image("image-0", owner="owner-1", visibility="public"),
+        _fake_image("image-1"),
+        _fake_image("image-2", hash_value="def"),
+    ]
+    index = dedup.DestinationImageIndex()
+
+    for _ in range(2):
+        image = index.find(image_proxy, _fake_image("source"), owner, mode)
+        assert (image.id if image else None) == expected_id
+
+    if mode != config.ImageDeduplication.disabled:
+        # The destination images are listed only once.
+        image_proxy.images.assert_called_once_with(status="active")
+
+
+@mock.patch.object(dedup.time, "monotonic")
+def test_destination_image_index_rebuilt(mock_monotonic):
+    image_proxy = mock.Mock()
+    image_proxy.images.return_value = [
+        _fake_image("image-0", name="volmigr-volume-0-1234"),
+        _fake_image("image-1", name="instmigr-instance-0-1234"),
+    ]
+    index = dedup.DestinationImageIndex(ttl=60)
+    mock_monotonic.return_value = 100
+
+    # The temporary images are not indexed.
+    assert not index.find(
+        image_proxy, _fake_image("source"), "owner-0", config.ImageDeduplication.any
+    )
+
+    image_proxy.images.return_value.append(_fake_image("image-2"))
+    mock_monotonic.return_value = 150
+    assert not index.find(
+        image_proxy, _fake_image("source"), "owner-0", config.ImageDeduplication.any
+    )
+    mock_monotonic.return_value = 161
+    image = index.find(
+        image_proxy, _fake_image("source"), "owner-0", config.ImageDeduplication.any
+    )
+
+    assert image.id == "image-2"
+    assert image_proxy.images.call_count == 2
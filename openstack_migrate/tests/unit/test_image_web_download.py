@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import http.server
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from unittest import mock
+
+import pytest
+from openstack.image.v2 import image as image_resource
+
+from openstack_migrate import config, poller
+from openstack_migrate.handlers.glance import image as image_handler
+from openstack_migrate.transfer import web_download
+
+IMAGE_DATA = b"image-data" * 1000
+
+
+class _ImageRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path != "/images/source-image":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(IMAGE_DATA)))
+        self.end_headers()
+        self.wfile.write(IMAGE_DATA)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ImageRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class _FakeGlance:
+    """Destination Glance stand-in, implementing the web-download import."""
+
+    def __init__(self):
+        self.image = mock.Mock(
+            id="destination-image",
+            status="queued",
+            checksum=None,
+            hash_algo=None,
+            hash_value=None,
+            properties={},
+        )
+        # Checks the calls against the SDK signature.
+        self.image.upload = mock.create_autospec(
+            image_resource.Image().upload, return_value=mock.Mock(status_code=204)
+        )
+        self.get_import_info = mock.Mock(
+            return_value=mock.Mock(
+                import_methods={"value": ["glance-direct", "web-download"]}
+            )
+        )
+
+    def get_image(self, image_id):
+        return self.image
+
+    def images(self, status=None):
+        return [self.image] if self.image.status == status else []
+
+    def import_image(self, image, method, uri):
+        # The image remains queued until the import task starts.
+        self.image.properties["os_glance_import_task"] = "task-0"
+        threading.Thread(target=self._download, args=(uri,)).start()
+
+    def _download(self, uri):
+        self.image.status = "importing"
+        try:
+            with urllib.request.urlopen(uri) as response:
+                data = response.read()
+        except urllib.error.URLError:
+            # Glance reverts the image to the queued status.
+            self.image.status = "queued"
+            return
+        finally:
+            self.image.properties.pop("os_glance_import_task")
+        self.image.checksum = hashlib.md5(data).hexdigest()
+        self.image.hash_algo = "sha512"
+        self.image.hash_value = hashlib.sha512(data).hexdigest()
+        self.image.status = "active"
+
+
+@pytest.fixture
+def handler():
+    session = mock.Mock(image=_FakeGlance())
+    session.config.name = "destination"
+    handler = image_handler.ImageHandler()
+    with (
+        mock.patch.object(
+            image_handler.ImageHandler,
+            "_destination_session",
+            new_callable=mock.PropertyMock,
+            return_value=session,
+        ),
+        mock.patch.object(
+            poller, "_POLLER", poller.StatusPoller(min_interval=0.01, max_interval=0.05)
+        ),
+    ):
+        yield handler
+
+
+def _source_image():
+    return mock.Mock(
+        id="source-image",
+        size=len(IMAGE_DATA),
+        checksum=hashlib.md5(IMAGE_DATA).hexdigest(),
+        hash_algo="sha512",
+        hash_value=hashlib.sha512(IMAGE_DATA).hexdigest(),
+    )
+
+
+def test_web_download(handler, image_server):
+    hexdigests: dict[str, str] = {}
+    with mock.patch.multiple(
+        config.get_config(),
+        image_transfer_mode=config.ImageTransferMode.web_download,
+        image_web_download_url=image_server + "/images/{image_id}",
+    ):
+        destination_image = handler._upload_image_data(
+            _source_image(), "destination-image", hexdigests
+        )
+
+    assert destination_image.status == "active"
+    # No data was transferred by the migration host.
+    assert not hexdigests
+    destination_image.upload.assert_not_called()
+    handler._verify_destination_image(
+        destination_image, {"sha512": hashlib.sha512(IMAGE_DATA).hexdigest()}
+    )
+
+
+def test_web_download_fallback(handler, image_server):
+    with (
+        mock.patch.multiple(
+            config.get_config(),
+            image_transfer_mode=config.ImageTransferMode.web_download,
+            image_web_download_url=image_server + "/missing/{image_id}",
+            image_upload_method=config.ImageUploadMethod.upload,
+        ),
+        mock.patch.object(handler, "_get_image_data", return_value=[IMAGE_DATA]),
+    ):
+        destination_image = handler._upload_image_data(
+            _source_image(), "destination-image", {}
+        )
+
+    destination_image.upload.assert_called_once_with(mock.ANY, data=[IMAGE_DATA])
+
+
+def test_get_source_image_url():
+    with mock.patch.multiple(
+        config.get_config(),
+        image_web_download_url="https://swift/v1/AUTH_glance/images/{image_id}",
+        image_web_download_temp_url_key="secret",
+        image_web_download_url_ttl=60,
+    ):
+        with mock.patch("time.time", return_value=1000):
+            url = web_download.get_source_image_url("image-0")
+
+    signature = web_download.get_temp_url_signature(
+        "secret", "GET", "/v1/AUTH_glance/images/image-0", 1060
+    )
+    assert url == (
+        "https://swift/v1/AUTH_glance/images/image-0"
+        f"?temp_url_sig={signature}&temp_url_expires=1060"
+    )
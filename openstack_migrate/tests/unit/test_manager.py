@@ -1,20 +1,26 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
+import threading
 from unittest import mock
 
 import pytest
 
 from openstack_migrate import constants, exception, manager
+from openstack_migrate.db import api as db_api
+from openstack_migrate.handlers import base
 from openstack_migrate.handlers.base import Resource
+from openstack_migrate.handlers.manila import share as share_handler
+from openstack_migrate.handlers.nova import instance as instance_handler
 
 
 @mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
-@mock.patch("openstack_migrate.db.api.get_migrations")
+@mock.patch("openstack_migrate.db.api.get_latest_migrations")
 @mock.patch("openstack_migrate.db.models.Migration.save")
 def _test_individual_migration(
     mock_migration_cls_save,
-    mock_get_migrations,
+    mock_get_latest_migrations,
     mock_get_migration_handler,
     cleanup_source=False,
     include_members=False,
@@ -24,26 +30,23 @@ def _test_individual_migration(
 ):
     mock_handler = mock_get_migration_handler.return_value
     mock_handler.get_service_type.return_value = "fake-service-type"
+    mock_handler.requires_final_sync.return_value = False
 
     migrated_resources = set()
 
-    def _fake_get_migrations(
-        order_by="created_at",
-        ascending=False,
-        session=None,
-        include_archived=False,
-        source_id=None,
-        resource_type=None,
-    ):
-        if source_id in migrated_resources:
-            return [mock.Mock(status=constants.STATUS_COMPLETED)]
-        return []
+    def _fake_get_latest_migrations(resource_keys):
+        return {
+            (resource_type, source_id): mock.Mock(status=constants.STATUS_COMPLETED)
+            for resource_type, source_id in resource_keys
+            if source_id in migrated_resources
+        }
 
     def _fake_migrate_resource(
         resource_id,
         migrated_associated_resources,
     ):
         migrated_resources.add(resource_id)
+        return f"dest-{resource_id}"
 
     def _fake_get_associated_resources(resource_id):
         if has_dependencies and resource_id == "fake-instance":
@@ -72,7 +75,7 @@ def _test_individual_migration(
         else:
             return []
 
-    mock_get_migrations.side_effect = _fake_get_migrations
+    mock_get_latest_migrations.side_effect = _fake_get_latest_migrations
     mock_handler.perform_individual_migration.side_effect = _fake_migrate_resource
     mock_handler.get_associated_resources.side_effect = _fake_get_associated_resources
     mock_handler.get_member_resources.side_effect = _fake_get_member_resources
@@ -120,6 +123,12 @@ def _test_individual_migration(
             not in mock_handler.delete_source_resource.call_args_list
         )
 
+    # The associated resources are only retrieved once per resource.
+    resolved = [
+        call.args[0] for call in mock_handler.get_associated_resources.call_args_list
+    ]
+    assert len(resolved) == len(set(resolved))
+
     if include_members and not dry_run:
         mock_handler.perform_individual_migration.assert_any_call(
             "fake-subnet",
@@ -166,7 +175,7 @@ def test_migrate_individual_resource_dry_run():
 
 
 @mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
-@mock.patch("openstack_migrate.db.api.get_migrations")
+@mock.patch("openstack_migrate.db.api.get_latest_migrations")
 @mock.patch("openstack_migrate.db.models.Migration.save")
 @mock.patch(
     "openstack_migrate.manager.OpenstackMigrationManager.perform_individual_migration"
@@ -174,13 +183,17 @@ def test_migrate_individual_resource_dry_run():
 def test_perform_batch_migration(
     mock_individual_migration,
     mock_migration_cls_save,
-    mock_get_migrations,
+    mock_get_latest_migrations,
     mock_get_migration_handler,
 ):
     mock_handler = mock_get_migration_handler.return_value
     mock_handler.get_service_type.return_value = "fake-service-type"
 
-    mock_get_migrations.side_effect = [None, None, [mock.Mock()]]
+    mock_get_latest_migrations.return_value = {
+        (mock.sentinel.resource_type, mock.sentinel.resource_id_2): mock.Mock(
+            status=constants.STATUS_COMPLETED
+        ),
+    }
     fake_resources = [
         mock.sentinel.resource_id_0,
         mock.sentinel.resource_id_1,
@@ -215,3 +228,203 @@ def test_perform_batch_migration(
     mock_handler.get_source_resource_ids.assert_called_once_with(
         mock.sentinel.resource_filters
     )
+    # The migration records are retrieved at once.
+    mock_get_latest_migrations.assert_called_once_with(
+        [
+            (mock.sentinel.resource_type, fake_resource)
+            for fake_resource in fake_resources
+        ]
+    )
+
+
+class _FakeSteppedHandler(base.BaseMigrationHandler):
+    def __init__(self, failing_steps=None):
+        super().__init__()
+        self.calls: list[str] = []
+        self.failing_steps = failing_steps or []
+
+    def get_service_type(self):
+        return "fake-service-type"
+
+    def get_source_resource_ids(self, resource_filters):
+        return []
+
+    def _call(self, name, result):
+        self.calls.append(name)
+        if name in self.failing_steps:
+            raise exception.OpenstackMigrateException("fake error")
+        return result
+
+    def perform_individual_migration(self, resource_id, migrated_associated_resources):
+        image_id = self._run_step(
+            "upload-image", lambda: self._call("upload-image", "fake-image")
+        )
+        return self._run_step(
+            "create-volume", lambda: self._call("create-volume", f"dest-{image_id}")
+        )
+
+
+@mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
+def test_resume_migration(mock_get_migration_handler, database):
+    handler = _FakeSteppedHandler(failing_steps=["create-volume"])
+    mock_get_migration_handler.return_value = handler
+
+    with pytest.raises(exception.OpenstackMigrateException):
+        manager.OpenstackMigrationManager().perform_individual_migration(
+            "volume", "fake-volume"
+        )
+    migration = db_api.get_migrations(source_id="fake-volume")[0]
+    assert migration.status == constants.STATUS_FAILED
+
+    handler.failing_steps = []
+    handler.calls = []
+    migration = manager.OpenstackMigrationManager().resume_migration(migration.uuid)
+
+    # The completed steps are skipped.
+    assert handler.calls == ["create-volume"]
+    assert migration.status == constants.STATUS_COMPLETED
+    assert migration.destination_id == "dest-fake-image"
+    steps = db_api.get_migration_steps(migration.id)
+    assert [(step.name, step.status) for step in steps] == [
+        ("upload-image", constants.STATUS_COMPLETED),
+        ("create-volume", constants.STATUS_FAILED),
+        ("create-volume", constants.STATUS_COMPLETED),
+    ]
+
+
+class _FakeInstanceHandler(base.BaseMigrationHandler):
+    """Migrates "instance-0", having three volumes sharing a volume type."""
+
+    def __init__(self, volume_barrier, calls):
+        super().__init__()
+        self.volume_barrier = volume_barrier
+        self.calls = calls
+
+    def get_service_type(self):
+        return "fake-service-type"
+
+    def get_source_resource_ids(self, resource_filters):
+        return []
+
+    def get_concurrent_associated_resource_types(self):
+        return ["volume"]
+
+    def get_associated_resources(self, resource_id):
+        if resource_id == "instance-0":
+            return [
+                Resource(resource_type="volume", source_id=f"volume-{idx}")
+                for idx in range(3)
+            ] + [Resource(resource_type="flavor", source_id="flavor-0")]
+        if resource_id.startswith("volume-"):
+            return [Resource(resource_type="volume-type", source_id="type-0")]
+        return []
+
+    @contextlib.contextmanager
+    def prepare_migration(self, resource_id):
+        self.calls.append(f"prepare-{resource_id}")
+        yield
+
+    def perform_individual_migration(self, resource_id, migrated_associated_resources):
+        if resource_id.startswith("volume-"):
+            # Fails unless all the volumes are migrated concurrently.
+            self.volume_barrier.wait(timeout=10)
+        self.calls.append(resource_id)
+        return f"dest-{resource_id}"
+
+
+@mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
+def test_concurrent_dependencies(mock_get_migration_handler, database):
+    calls: list[str] = []
+    barrier = threading.Barrier(3)
+    mock_get_migration_handler.side_effect = lambda resource_type: _FakeInstanceHandler(
+        barrier, calls
+    )
+
+    migration = manager.OpenstackMigrationManager().perform_individual_migration(
+        "instance", "instance-0", include_dependencies=True
+    )
+
+    assert migration.destination_id == "dest-instance-0"
+    # The serial dependencies are migrated first and the shared volume type
+    # is migrated only once.
+    assert calls[:3] == ["prepare-instance-0", "prepare-flavor-0", "flavor-0"]
+    assert calls.count("type-0") == 1
+    assert calls[-1] == "instance-0"
+
+
+@mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
+def test_register_external_migration(mock_get_migration_handler, database):
+    mock_get_migration_handler.return_value.get_service_type.return_value = "glance"
+    mgr = manager.OpenstackMigrationManager()
+    assert mgr._get_latest_migration("image", "image-0") is None
+
+    migration = mgr.register_external_migration("image", "image-0", "dest-image-0")
+
+    # The cached lookup result is updated.
+    assert mgr._get_latest_migration("image", "image-0") is migration
+    assert migration.external
+    assert (
+        mgr.register_external_migration("image", "image-0", "dest-image-0").uuid
+        == migration.uuid
+    )
+
+
+@pytest.mark.parametrize("resumable", [True, False])
+def test_instance_dependency_failure_releases_images(resumable, caplog):
+    handler = instance_handler.InstanceHandler()
+    handler.set_migration(mock.Mock(uuid="migration-0") if resumable else None)
+
+    def _export_root_disk(owner_source_session, source_instance):
+        handler._source_image_id = "source-image"
+        handler._destination_image_id = "destination-image"
+
+    with (
+        mock.patch.object(instance_handler.CONF, "source_cloud_name", "source"),
+        mock.patch.object(handler, "_get_openstack_session"),
+        mock.patch.object(handler, "_get_owner_source_session"),
+        mock.patch.object(handler, "_export_root_disk", side_effect=_export_root_disk),
+        mock.patch.object(handler, "_delete_temporary_images") as mock_delete_images,
+    ):
+        with pytest.raises(exception.OpenstackMigrateException, match="volume"):
+            with handler.prepare_migration("instance-0"):
+                raise exception.OpenstackMigrateException("volume migration failed")
+
+    # The images are preserved only if the migration can be resumed.
+    if resumable:
+        mock_delete_images.assert_not_called()
+        assert "preserving the temporary images" in caplog.text
+    else:
+        mock_delete_images.assert_called_once_with("source-image", "destination-image")
+
+
+@mock.patch("openstack_migrate.handlers.factory.get_migration_handler")
+def test_share_pending_final_sync(mock_get_migration_handler, database):
+    handler = mock.Mock(spec=share_handler.ShareHandler)
+    handler.get_service_type.return_value = "manila"
+    handler.get_associated_resources.return_value = []
+    handler.prepare_migration.return_value = contextlib.nullcontext()
+    handler.perform_individual_migration.return_value = "dest-share-0"
+    # Live pre-copied shares.
+    handler.requires_final_sync.return_value = True
+    mock_get_migration_handler.return_value = handler
+    mgr = manager.OpenstackMigrationManager()
+
+    # The source share cannot be removed before the final sync.
+    with pytest.raises(exception.InvalidInput):
+        mgr.perform_individual_migration("share", "share-0", cleanup_source=True)
+    handler.perform_individual_migration.assert_not_called()
+
+    migration = mgr.perform_individual_migration("share", "share-0")
+    assert migration.status == constants.STATUS_PENDING_FINAL_SYNC
+    assert mgr.resume_migration(migration.uuid).uuid == migration.uuid
+    handler.perform_individual_migration.assert_called_once()
+
+    migration = mgr.sync_share_data(migration.uuid)
+    assert migration.status == constants.STATUS_PENDING_FINAL_SYNC
+    with pytest.raises(exception.InvalidInput):
+        mgr.sync_share_data(migration.uuid, cleanup_source=True)
+
+    migration = mgr.sync_share_data(migration.uuid, final=True, cleanup_source=True)
+    assert migration.status == constants.STATUS_COMPLETED
+    assert migration.source_removed
+    handler.delete_source_resource.assert_called_once_with("share-0")
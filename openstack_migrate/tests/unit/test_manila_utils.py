@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import config, exception
+from openstack_migrate.utils import manila_utils
+
+
+@pytest.fixture
+def fake_share_ops(tmp_path):
+    mounted = []
+    with (
+        mock.patch.object(config.get_config(), "temporary_migration_dir", tmp_path),
+        mock.patch.object(
+            manila_utils, "get_share_export_path", lambda conn, share_id: share_id
+        ),
+        mock.patch.object(manila_utils, "get_local_access_ip") as get_access_ip,
+        mock.patch.object(manila_utils, "_find_access_rule", return_value=None),
+        mock.patch.object(manila_utils, "_create_temporary_access_rule") as create_rule,
+        mock.patch.object(manila_utils, "_delete_temporary_access_rule") as delete_rule,
+        mock.patch.object(
+            manila_utils,
+            "mount_nfs_share",
+            lambda export_path, mountpoint: mounted.append(export_path),
+        ),
+        mock.patch.object(
+            manila_utils,
+            "unmount_nfs_share",
+            lambda mountpoint: mounted.remove(mountpoint.split("/")[-1].split(".")[0]),
+        ),
+    ):
+        get_access_ip.return_value = "10.0.0.1"
+        yield mounted, create_rule, delete_rule
+
+
+def _share(share_id):
+    return mock.Mock(id=share_id)
+
+
+def test_mount_manager_reuse(fake_share_ops):
+    mounted, create_rule, delete_rule = fake_share_ops
+    conn = mock.Mock()
+    conn.config.name = "source"
+    mount_manager = manila_utils.ShareMountManager(max_mounts=2)
+
+    for _ in range(2):
+        with mount_manager.mounted_shares(
+            (conn, _share("share-0")), (conn, _share("share-1"))
+        ) as mountpoints:
+            assert len(mountpoints) == 2
+    # The mounts and access rules are reused.
+    assert sorted(mounted) == ["share-0", "share-1"]
+    assert create_rule.call_count == 2
+
+    # The least recently used idle share is unmounted when reaching the limit.
+    with mount_manager.mounted_shares((conn, _share("share-2"))):
+        assert sorted(mounted) == ["share-1", "share-2"]
+    delete_rule.assert_called_once_with(conn, "share-0", create_rule.return_value.id)
+
+    mount_manager.release_share("source", "share-1")
+    assert mounted == ["share-2"]
+
+    mount_manager.unmount_all()
+    assert not mounted
+    assert delete_rule.call_count == 3
+
+
+def test_mount_manager_limit(fake_share_ops):
+    conn = mock.Mock()
+    mount_manager = manila_utils.ShareMountManager(max_mounts=1)
+
+    with pytest.raises(exception.InvalidInput):
+        with mount_manager.mounted_shares(
+            (conn, _share("share-0")), (conn, _share("share-1"))
+        ):
+            pass
@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+from unittest import mock
+
+import pytest
+from openstack import exceptions as openstack_exc
+
+from openstack_migrate import poller
+
+
+class _FakeResources:
+    def __init__(self, statuses):
+        self.lock = threading.Lock()
+        self.statuses = statuses
+        self.list_calls = 0
+
+    def list_resources(self):
+        with self.lock:
+            self.list_calls += 1
+            # Resources become available after a few polls.
+            if self.list_calls == 3:
+                for resource_id, status in self.statuses.items():
+                    if status == "creating":
+                        self.statuses[resource_id] = "available"
+            return [
+                mock.Mock(id=resource_id, status=status)
+                for resource_id, status in self.statuses.items()
+                if resource_id != "hidden"
+            ]
+
+    def get_resource(self, resource_id):
+        if resource_id not in self.statuses:
+            raise openstack_exc.NotFoundException()
+        return mock.Mock(id=resource_id, status=self.statuses[resource_id])
+
+
+def _watch(status_poller, fake_resources, resource_id, timeout=None):
+    return status_poller.watch(
+        ("fake-cloud", "volume", "fake-project"),
+        fake_resources.list_resources,
+        fake_resources.get_resource,
+        resource_id,
+        status="available",
+        failures=["error"],
+        timeout=timeout,
+    )
+
+
+def test_status_poller():
+    status_poller = poller.StatusPoller(min_interval=0.01, max_interval=0.05)
+    fake_resources = _FakeResources(
+        {
+            "volume-0": "creating",
+            "volume-1": "creating",
+            "volume-2": "error",
+            "hidden": "available",
+        }
+    )
+
+    results = {
+        resource_id: _watch(status_poller, fake_resources, resource_id)
+        for resource_id in ("volume-0", "volume-1", "volume-2", "hidden", "missing")
+    }
+
+    assert results["volume-0"].result(timeout=5).status == "available"
+    assert results["volume-1"].result(timeout=5).status == "available"
+    assert results["hidden"].result(timeout=5).status == "available"
+    with pytest.raises(openstack_exc.ResourceFailure):
+        results["volume-2"].result(timeout=5)
+    with pytest.raises(openstack_exc.ResourceFailure):
+        results["missing"].result(timeout=5)
+    # The resources are polled at once.
+    assert fake_resources.list_calls <= 4
+
+
+def test_status_poller_timeout():
+    status_poller = poller.StatusPoller(min_interval=0.01, max_interval=0.01)
+    fake_resources = _FakeResources({"volume-0": "downloading"})
+    # Avoid status changes.
+    fake_resources.list_calls = 10
+
+    future = _watch(status_poller, fake_resources, "volume-0", timeout=0.05)
+
+    with pytest.raises(openstack_exc.ResourceTimeout):
+        future.result(timeout=5)
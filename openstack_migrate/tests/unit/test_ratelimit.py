@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+from unittest import mock
+
+from openstack_migrate import config, ratelimit
+
+
+def test_token_bucket():
+    bucket = ratelimit.TokenBucket(rate=100, burst=5)
+
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+
+    # The first 5 requests are allowed immediately.
+    assert time.monotonic() - start >= 0.04
+
+
+def test_max_in_flight():
+    limiter = ratelimit.RateLimiter(
+        {"nova": config.ApiRateLimit(max_in_flight=2)},
+    )
+    lock = threading.Lock()
+    in_flight = []
+    max_in_flight = []
+
+    def _request():
+        with limiter.limit("source", "nova"):
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(max_in_flight) == 2
+    assert limiter.request_count[("source", "nova")] == 8
+    assert limiter.throttled_time[("source", "nova")] > 0
+
+
+def test_apply_rate_limits():
+    limiter = mock.MagicMock()
+    connection = mock.Mock()
+    connection.session._rate_limited = False
+    request = connection.session.request
+
+    ratelimit.apply_rate_limits(connection, "source", limiter)
+    connection.session.request(
+        "/volumes", "GET", endpoint_filter={"service_type": "volumev3"}
+    )
+    connection.session.request("/v3/auth/tokens", "POST")
+
+    limiter.limit.assert_called_once_with("source", "cinder")
+    assert request.call_count == 2
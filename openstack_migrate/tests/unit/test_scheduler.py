@@ -0,0 +1,279 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import contextlib
+import threading
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import config, constants, exception, manager, scheduler
+from openstack_migrate.db import api as db_api
+from openstack_migrate.handlers.base import Resource
+
+FAKE_DEPENDENCIES = {
+    "instance-0": [
+        Resource(resource_type="volume", source_id="volume-0", should_cleanup=True),
+        Resource(resource_type="flavor", source_id="flavor-0"),
+    ],
+    "instance-1": [
+        Resource(resource_type="volume", source_id="volume-1", should_cleanup=True),
+        Resource(resource_type="flavor", source_id="flavor-0"),
+    ],
+    "instance-2": [
+        Resource(resource_type="flavor", source_id="flavor-0"),
+    ],
+    "instance-3": [
+        Resource(resource_type="volume", source_id="volume-2", should_cleanup=True),
+    ],
+    "instance-4": [
+        Resource(resource_type="volume", source_id="volume-2", should_cleanup=True),
+    ],
+    "subnet-0": [
+        Resource(resource_type="network", source_id="network-0"),
+    ],
+}
+FAKE_MEMBERS = {
+    "network-0": [Resource(resource_type="subnet", source_id="subnet-0")],
+}
+
+
+class _FakeCloud:
+    def __init__(self, failing_resources=None):
+        self.lock = threading.Lock()
+        self.migrated: list[str] = []
+        self.failing_resources = failing_resources or []
+
+    def get_latest_migrations(self, resource_keys):
+        with self.lock:
+            return {
+                (resource_type, source_id): mock.Mock(status=constants.STATUS_COMPLETED)
+                for resource_type, source_id in resource_keys
+                if source_id in self.migrated
+            }
+
+    def perform_individual_migration(self, resource_id, migrated_associated_resources):
+        for resource in FAKE_DEPENDENCIES.get(resource_id, []):
+            # Dependencies are expected to be migrated first.
+            assert resource.source_id in self.migrated
+        if resource_id in self.failing_resources:
+            raise exception.OpenstackMigrateException("fake error")
+        with self.lock:
+            self.migrated.append(resource_id)
+        return f"dest-{resource_id}"
+
+
+def _get_fake_handler(fake_cloud):
+    handler = mock.Mock()
+    handler.get_service_type.return_value = "fake-service-type"
+    handler.prepare_migration.return_value = contextlib.nullcontext()
+    handler.requires_final_sync.return_value = False
+    handler.get_associated_resources.side_effect = lambda resource_id: list(
+        FAKE_DEPENDENCIES.get(resource_id, [])
+    )
+    handler.get_member_resources.side_effect = lambda resource_id: list(
+        FAKE_MEMBERS.get(resource_id, [])
+    )
+    handler.perform_individual_migration.side_effect = (
+        fake_cloud.perform_individual_migration
+    )
+    return handler
+
+
+def _migrate(resources, fake_cloud, cleanup_source=False, include_members=False):
+    handler = _get_fake_handler(fake_cloud)
+    with (
+        mock.patch(
+            "openstack_migrate.handlers.factory.get_migration_handler",
+            return_value=handler,
+        ),
+        mock.patch(
+            "openstack_migrate.db.api.get_latest_migrations",
+            side_effect=fake_cloud.get_latest_migrations,
+        ),
+        mock.patch("openstack_migrate.db.models.Migration.save"),
+    ):
+        mgr = manager.OpenstackMigrationManager()
+        graph = scheduler.build_migration_graph(
+            mgr,
+            resources,
+            include_dependencies=True,
+            include_members=include_members,
+            cleanup_source=cleanup_source,
+        )
+        executor = scheduler.ParallelMigrationExecutor(mgr, graph, concurrency=4)
+        return handler, executor.run()
+
+
+def test_shared_dependencies_migrated_once():
+    fake_cloud = _FakeCloud()
+    resources = [
+        Resource(resource_type="instance", source_id=f"instance-{idx}")
+        for idx in range(3)
+    ]
+
+    handler, migrations = _migrate(resources, fake_cloud, cleanup_source=True)
+
+    assert sorted(fake_cloud.migrated) == [
+        "flavor-0",
+        "instance-0",
+        "instance-1",
+        "instance-2",
+        "volume-0",
+        "volume-1",
+    ]
+    for migration in migrations.values():
+        assert migration.status == constants.STATUS_COMPLETED
+
+    # The flavor is shared and should not be cleaned up.
+    deleted = [call.args[0] for call in handler.delete_source_resource.mock_calls]
+    assert sorted(deleted) == [
+        "instance-0",
+        "instance-1",
+        "instance-2",
+        "volume-0",
+        "volume-1",
+    ]
+
+
+def test_shared_cleanup_dependency_cleaned_up_once():
+    fake_cloud = _FakeCloud()
+    resources = [
+        Resource(resource_type="instance", source_id=f"instance-{idx}")
+        for idx in (3, 4)
+    ]
+
+    handler, _ = _migrate(resources, fake_cloud, cleanup_source=True)
+
+    deleted = [call.args[0] for call in handler.delete_source_resource.mock_calls]
+    assert sorted(deleted) == ["instance-3", "instance-4", "volume-2"]
+
+
+def test_failed_dependency_skips_dependents():
+    fake_cloud = _FakeCloud(failing_resources=["volume-0"])
+    resources = [
+        Resource(resource_type="instance", source_id=f"instance-{idx}")
+        for idx in range(3)
+    ]
+
+    with pytest.raises(exception.OpenstackMigrateException):
+        _migrate(resources, fake_cloud)
+
+    assert "instance-0" not in fake_cloud.migrated
+    assert "instance-1" in fake_cloud.migrated
+    assert "instance-2" in fake_cloud.migrated
+
+
+def test_member_resources():
+    fake_cloud = _FakeCloud()
+    resources = [Resource(resource_type="network", source_id="network-0")]
+
+    handler, migrations = _migrate(resources, fake_cloud, include_members=True)
+
+    assert fake_cloud.migrated == ["network-0", "subnet-0"]
+    handler.connect_member_resources_to_parent.assert_any_call(
+        parent_resource_id="dest-network-0",
+        migrated_member_resources=[mock.ANY],
+    )
+
+
+def test_graph_levels():
+    graph = scheduler.MigrationGraph(include_dependencies=True, include_members=True)
+    for resource_id in ("network", "subnet", "port"):
+        graph.add_node("fake-type", resource_id)
+    graph.add_member(("fake-type", "network"), ("fake-type", "subnet"))
+    graph.add_dependency(("fake-type", "port"), ("fake-type", "subnet"))
+
+    levels = graph.get_levels()
+
+    assert [[node.source_id for node in level] for level in levels] == [
+        ["network"],
+        ["subnet"],
+        ["port"],
+    ]
+
+
+def test_graph_circular_dependencies():
+    graph = scheduler.MigrationGraph(include_dependencies=True, include_members=False)
+    graph.add_node("fake-type", "a")
+    graph.add_node("fake-type", "b")
+    graph.add_dependency(("fake-type", "a"), ("fake-type", "b"))
+    graph.add_dependency(("fake-type", "b"), ("fake-type", "a"))
+
+    with pytest.raises(exception.InvalidInput):
+        graph.get_levels()
+
+
+def test_migration_plan_roundtrip(database):
+    graph = scheduler.MigrationGraph(include_dependencies=True, include_members=True)
+    network = graph.add_node("network", "network-0")
+    subnet = graph.add_node("subnet", "subnet-0")
+    port = graph.add_node("port", "port-0")
+    graph.roots.append(network.key)
+    network.cleanup_source = True
+    port.associated_resources = [
+        Resource(resource_type="subnet", source_id="subnet-0", should_cleanup=True)
+    ]
+    graph.add_member(network.key, subnet.key)
+    graph.add_dependency(port.key, subnet.key)
+
+    plan = scheduler.save_migration_graph(graph, resource_type="network")
+    loaded_plan = db_api.get_migration_plans(uuid=plan.uuid)[0]
+    loaded = scheduler.load_migration_graph(loaded_plan)
+
+    assert loaded_plan.status == constants.STATUS_PLANNED
+    assert loaded.include_dependencies and loaded.include_members
+    assert loaded.roots == [network.key]
+    assert set(loaded.nodes) == set(graph.nodes)
+    for key, node in graph.nodes.items():
+        loaded_node = loaded.nodes[key]
+        assert loaded_node.requires == node.requires
+        assert loaded_node.members == node.members
+        assert loaded_node.cleanup_source == node.cleanup_source
+        assert loaded_node.associated_resources == node.associated_resources
+
+
+def test_apply_migration_plan_cloud_mismatch(database):
+    graph = scheduler.MigrationGraph(include_dependencies=True, include_members=False)
+    graph.roots.append(graph.add_node("network", "network-0").key)
+    plan = scheduler.save_migration_graph(
+        graph, source_cloud="other-source", destination_cloud="destination"
+    )
+
+    with (
+        mock.patch.object(config.get_config(), "source_cloud_name", "source"),
+        mock.patch.object(config.get_config(), "destination_cloud_name", "destination"),
+    ):
+        with pytest.raises(exception.InvalidInput):
+            manager.OpenstackMigrationManager().apply_migration_plan(plan.uuid)
+
+    assert db_api.get_migration_plans(uuid=plan.uuid)[0].status == (
+        constants.STATUS_PLANNED
+    )
+
+
+def test_longest_migrations_first():
+    graph = scheduler.MigrationGraph(include_dependencies=True, include_members=False)
+    for resource_id, cost in (("small", 1), ("medium", 3), ("large", 10)):
+        graph.add_node("volume", resource_id).cost = cost
+    instance = graph.add_node("instance", "instance-0")
+    instance.cost = 1
+    graph.add_dependency(instance.key, ("volume", "small"))
+    graph.update_priorities()
+
+    # The small volume is on a longer chain than the medium one.
+    assert graph.nodes[("volume", "small")].priority == 2
+    # The large volume starts first while the others share the second worker.
+    assert scheduler.predict_makespan(graph, concurrency=2) == 10
+    assert scheduler.predict_makespan(graph, concurrency=1) == 15
+
+    started = []
+    mgr = mock.Mock()
+    mgr._migrate_parent_resource.side_effect = lambda **kwargs: (
+        started.append(kwargs["resource_id"]) or mock.Mock(),
+        None,
+    )
+    executor = scheduler.ParallelMigrationExecutor(mgr, graph, concurrency=1)
+    executor.run()
+
+    assert started == ["large", "medium", "small", "instance-0"]
@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import contextlib
+import os
+import typing
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import exception
+from openstack_migrate.handlers.cinder import transfer_backends
+from openstack_migrate.transfer import blockcopy, sparse
+from openstack_migrate.utils import cinder_utils
+
+BLOCK = sparse.ZERO_BLOCK_SIZE
+
+
+def _make_disk(path, size):
+    data = bytearray(size)
+    for offset in (0, 3 * BLOCK + 10, size - 1):
+        data[offset] = 1
+    data[5 * BLOCK : 7 * BLOCK] = os.urandom(2 * BLOCK)
+    path.write_bytes(data)
+    return bytes(data)
+
+
+def test_block_copy(tmp_path):
+    size = 16 * BLOCK
+    data = _make_disk(tmp_path / "source", size)
+    # Stale destination data is not preserved.
+    (tmp_path / "destination").write_bytes(os.urandom(size))
+    progress = []
+
+    stats = blockcopy.BlockCopier(
+        str(tmp_path / "source"),
+        str(tmp_path / "destination"),
+        chunk_size=4 * BLOCK,
+        progress_callback=progress.append,
+    ).run()
+
+    assert (tmp_path / "destination").read_bytes() == data
+    assert stats["bytes"] == 5 * BLOCK
+    assert stats["skipped"] == 11 * BLOCK
+    assert sum(progress) == size
+
+
+def test_block_copy_zero_range_fallback(tmp_path):
+    path = tmp_path / "disk"
+    path.write_bytes(b"\xff" * 4 * BLOCK)
+    copier = blockcopy.BlockCopier(str(path), str(path), chunk_size=BLOCK)
+
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        # BLKZEROOUT is not supported by regular files.
+        copier._zero_range(fd, BLOCK, 2 * BLOCK + 1)
+    finally:
+        os.close(fd)
+
+    assert path.read_bytes() == (
+        b"\xff" * BLOCK + bytes(2 * BLOCK + 1) + b"\xff" * (BLOCK - 1)
+    )
+
+
+class _FileVolumeAttacher(cinder_utils.VolumeAttacher):
+    """Attach volumes backed by local files."""
+
+    def __init__(self, directory):
+        self._directory = directory
+
+    @contextlib.contextmanager
+    def attach_volume(self, sdk_conn, volume):
+        """Yield the volume file path."""
+        yield str(self._directory / volume.id)
+
+
+def test_block_copy_backend(tmp_path):
+    data = _make_disk(tmp_path / "source-volume", 16 * BLOCK)
+    (tmp_path / "destination-volume").write_bytes(bytes(16 * BLOCK))
+    source_volume = mock.Mock(
+        id="source-volume", status="available", size=1, is_bootable=True
+    )
+    destination_session = mock.Mock()
+    destination_session.block_storage.get_volume.return_value = mock.Mock(
+        id="destination-volume"
+    )
+    handler = mock.Mock()
+    handler._run_step = lambda name, func: func()
+    handler._create_destination_volume.return_value = "destination-volume"
+    metrics = mock.Mock()
+    handler._track_transfer.return_value = contextlib.nullcontext(metrics)
+    handler._transfer_phase.return_value = contextlib.nullcontext()
+
+    assert isinstance(
+        transfer_backends.get_transfer_backend(handler),
+        transfer_backends.GlanceVolumeTransferBackend,
+    )
+    backend = transfer_backends.BlockCopyVolumeTransferBackend(
+        handler, attacher=_FileVolumeAttacher(tmp_path)
+    )
+
+    volume_id = backend.transfer_volume(
+        source_volume, mock.Mock(), destination_session, [], None
+    )
+
+    assert volume_id == "destination-volume"
+    assert (tmp_path / "destination-volume").read_bytes() == data
+    handler._create_destination_volume.assert_called_once_with(
+        destination_session, source_volume, None, []
+    )
+    handler._wait_for_destination_volume.assert_called_once_with(
+        source_volume, "destination-volume", None
+    )
+    assert sum(call.args[0] for call in metrics.add_bytes.call_args_list) == len(data)
+    destination_session.block_storage.set_volume_bootable_status.assert_called_once()
+
+
+def test_block_copy_backend_resumed_wait(tmp_path):
+    _make_disk(tmp_path / "source-volume", 8 * BLOCK)
+    (tmp_path / "destination-volume").write_bytes(bytes(8 * BLOCK))
+    source_volume = mock.Mock(
+        id="source-volume", status="available", size=1, is_bootable=False
+    )
+    destination_session = mock.Mock()
+    destination_session.block_storage.get_volume.return_value = mock.Mock(
+        id="destination-volume"
+    )
+    completed_steps: dict[str, typing.Any] = {}
+
+    def _run_step(name, func):
+        if name not in completed_steps:
+            completed_steps[name] = func()
+        return completed_steps[name]
+
+    handler = mock.Mock()
+    handler._run_step = _run_step
+    handler._create_destination_volume.return_value = "destination-volume"
+    handler._wait_for_destination_volume.side_effect = [
+        exception.OpenstackMigrateException("fake timeout"),
+        None,
+    ]
+    handler._track_transfer.return_value = contextlib.nullcontext(mock.Mock())
+    handler._transfer_phase.return_value = contextlib.nullcontext()
+    backend = transfer_backends.BlockCopyVolumeTransferBackend(
+        handler, attacher=_FileVolumeAttacher(tmp_path)
+    )
+
+    with pytest.raises(exception.OpenstackMigrateException):
+        backend.transfer_volume(
+            source_volume, mock.Mock(), destination_session, [], None
+        )
+    volume_id = backend.transfer_volume(
+        source_volume, mock.Mock(), destination_session, [], None
+    )
+
+    # The resumed transfer waits for the previously created volume.
+    assert volume_id == "destination-volume"
+    handler._create_destination_volume.assert_called_once()
+    assert handler._wait_for_destination_volume.call_count == 2
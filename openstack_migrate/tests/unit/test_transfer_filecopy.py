@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import exception
+from openstack_migrate.transfer import filecopy
+
+
+def _make_tree(root):
+    (root / "dir-0" / "dir-1").mkdir(parents=True)
+    for idx in range(10):
+        (root / "dir-0" / f"small-{idx}").write_bytes(b"x" * idx)
+    (root / "dir-0" / "dir-1" / "large").write_bytes(
+        os.urandom(filecopy.SMALL_FILE_SIZE + 10)
+    )
+    (root / "dir-0" / "dir-1" / "large").chmod(0o600)
+    os.symlink("dir-0/small-1", root / "link")
+    os.link(root / "dir-0" / "small-2", root / "hardlink")
+    os.utime(root / "dir-0", ns=(10**18, 10**18))
+
+
+def _list_tree(root):
+    tree = {}
+    for path in sorted(root.rglob("*")):
+        st = path.lstat()
+        tree[str(path.relative_to(root))] = (
+            st.st_mode,
+            st.st_mtime_ns,
+            st.st_nlink,
+            os.readlink(path) if path.is_symlink() else None,
+            path.read_bytes() if path.is_file() and not path.is_symlink() else None,
+        )
+    return tree
+
+
+def test_copy_tree(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    _make_tree(source)
+
+    stats = filecopy.FileCopier(
+        source, destination, tmp_path / "manifest", workers=4, batch_size=3
+    ).run()
+
+    assert _list_tree(destination) == _list_tree(source)
+    assert (destination / "hardlink").stat().st_ino == (
+        destination / "dir-0" / "small-2"
+    ).stat().st_ino
+    assert stats["files"] == 13
+    assert not stats["skipped"]
+
+
+def test_copy_tree_resume(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    _make_tree(source)
+    manifest = tmp_path / "manifest"
+
+    copy_file = filecopy.FileCopier._copy_file
+    calls = []
+    failed = []
+
+    def _fail_once(self, rel_path, st):
+        calls.append(rel_path)
+        if rel_path.endswith("large") and not failed:
+            failed.append(rel_path)
+            raise OSError("connection lost")
+        return copy_file(self, rel_path, st)
+
+    with mock.patch.object(filecopy.FileCopier, "_copy_file", _fail_once):
+        with pytest.raises(exception.OpenstackMigrateException):
+            filecopy.FileCopier(source, destination, manifest, workers=1).run()
+
+        # Modified files are copied again.
+        (source / "dir-0" / "small-3").write_bytes(b"modified")
+        calls.clear()
+        stats = filecopy.FileCopier(source, destination, manifest, workers=1).run()
+
+    assert _list_tree(destination) == _list_tree(source)
+    # The hard links were not handled by the first attempt.
+    assert sorted(calls) == [
+        os.path.join("dir-0", "dir-1", "large"),
+        os.path.join("dir-0", "small-3"),
+        "hardlink",
+    ]
+    assert stats["skipped"] == 9
+
+
+def test_copy_tree_delta(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    _make_tree(source)
+    manifest = tmp_path / "manifest"
+    filecopy.FileCopier(source, destination, manifest).run()
+
+    # Modify the source tree, including file type changes.
+    (source / "dir-0" / "small-4").write_bytes(b"modified")
+    (source / "dir-0" / "small-5").unlink()
+    (source / "dir-0" / "small-6").unlink()
+    (source / "dir-0" / "small-6").mkdir()
+    (source / "dir-0" / "dir-1" / "large").unlink()
+    os.utime(source / "dir-0", ns=(10**18, 10**18))
+
+    stats = filecopy.FileCopier(source, destination, manifest, delete=True).run()
+
+    assert _list_tree(destination) == _list_tree(source)
+    assert stats["files"] == 1
+    assert stats["deleted"] == 2
+
+
+def test_copy_sparse_file(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    size = 64 * 1024 * 1024
+    with open(source / "sparse", "wb") as f:
+        f.seek(size // 2)
+        f.write(b"data")
+        f.truncate(size)
+    if (source / "sparse").stat().st_blocks * 512 >= size:
+        pytest.skip("Sparse files not supported.")
+
+    filecopy.FileCopier(source, destination, tmp_path / "manifest").run()
+
+    assert (destination / "sparse").read_bytes() == (source / "sparse").read_bytes()
+    # The holes are not allocated.
+    assert (destination / "sparse").stat().st_blocks * 512 < size // 8
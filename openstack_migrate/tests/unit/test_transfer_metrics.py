@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+from unittest import mock
+
+from openstack_migrate.transfer import metrics
+
+
+@mock.patch("time.monotonic")
+def test_transfer_metrics(mock_monotonic):
+    mock_monotonic.return_value = 100
+    with metrics.TransferMetrics("image-0", total_bytes=400, interval=0) as tracker:
+        with tracker.phase("upload"):
+            chunks = list(tracker.track([b"a" * 100, b"b" * 100]))
+            mock_monotonic.return_value = 110
+            # 200 bytes in 10s, the remaining 200 bytes should take 10s.
+            assert tracker.eta == 10
+        tracker.add_waits(source=1, destination=2)
+
+    assert chunks == [b"a" * 100, b"b" * 100]
+    assert tracker.to_dict() == {
+        "bytes_transferred": 200,
+        "duration": 10,
+        "rate": 20,
+        "source_wait": 1,
+        "destination_wait": 2,
+        "phases": {"upload": 10},
+    }
+
+
+def test_transfer_metrics_callback():
+    tracker = metrics.TransferMetrics("share-0", bytes_callback=lambda: 10, interval=0)
+    assert tracker.bytes_transferred == 10
+    assert tracker.eta is None
+
+
+def test_merge_metrics():
+    previous = {
+        "bytes_transferred": 100,
+        "duration": 10,
+        "rate": 10,
+        "source_wait": 1,
+        "destination_wait": 0,
+        "phases": {"download": 10},
+    }
+    current = {
+        "bytes_transferred": 300,
+        "duration": 10,
+        "rate": 30,
+        "source_wait": 0,
+        "destination_wait": 1,
+        "phases": {"download": 5, "upload": 5},
+    }
+
+    assert metrics.merge_metrics(previous, current) == {
+        "bytes_transferred": 400,
+        "duration": 20,
+        "rate": 20,
+        "source_wait": 1,
+        "destination_wait": 1,
+        "phases": {"download": 15, "upload": 5},
+    }
@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import io
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from openstack_migrate import config, exception
+from openstack_migrate.transfer import pipeline
+
+
+class _FailingSource(io.BytesIO):
+    def readinto(self, buffer):
+        if self.tell() >= 10:
+            raise IOError("connection reset")
+        return super().readinto(memoryview(buffer)[:5])
+
+
+def test_transfer_pipeline():
+    data = bytes(range(256)) * 41
+
+    with pipeline.TransferPipeline(
+        io.BytesIO(data), chunk_size=1000, buffer_count=2
+    ) as transfer:
+        chunks = [bytes(chunk) for chunk in transfer]
+        hexdigests = transfer.hexdigests()
+
+    assert b"".join(chunks) == data
+    assert [len(chunk) for chunk in chunks] == [1000] * 10 + [496]
+    assert hexdigests == {"md5": hashlib.md5(data).hexdigest()}
+    assert transfer.bytes_transferred == len(data)
+
+
+def test_transfer_pipeline_source_error():
+    with pipeline.TransferPipeline(
+        _FailingSource(b"x" * 100), chunk_size=10, buffer_count=2
+    ) as transfer:
+        with pytest.raises(exception.OpenstackMigrateException):
+            list(transfer)
+
+        with pytest.raises(exception.OpenstackMigrateException):
+            transfer.hexdigests()
+
+
+def test_transfer_pipeline_consumer_stopped():
+    transfer = pipeline.TransferPipeline(
+        io.BytesIO(b"x" * 100), chunk_size=10, buffer_count=2
+    )
+    with transfer:
+        for _ in transfer:
+            break
+
+    assert transfer.bytes_transferred == 10
+
+
+def test_transfer_pipeline_memory_budget():
+    data = bytes(range(256)) * 100
+    budget = pipeline.MemoryBudget(limit=3000)
+    results: dict[int, bytes] = {}
+    max_used = []
+
+    def _transfer(index):
+        with pipeline.TransferPipeline(
+            io.BytesIO(data), chunk_size=1000, buffer_count=4, budget=budget
+        ) as transfer:
+            chunks = []
+            for chunk in transfer:
+                max_used.append(budget.used)
+                chunks.append(bytes(chunk))
+                time.sleep(0.001)
+            results[index] = b"".join(chunks)
+
+    threads = [threading.Thread(target=_transfer, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0: data, 1: data, 2: data}
+    assert max(max_used) <= 3000
+    assert budget.used == 0
+    assert budget.transfers == 0
+
+
+@mock.patch.object(pipeline, "_MIN_SAMPLE_DURATION", 0)
+def test_transfer_pipeline_adaptive_chunk_size():
+    data = b"x" * 200_000
+    budget = pipeline.MemoryBudget(limit=1024 * 1024)
+
+    with mock.patch.multiple(
+        config.get_config(),
+        image_transfer_min_chunk_size=1024,
+        image_transfer_max_chunk_size=16384,
+    ):
+        with pipeline.TransferPipeline(
+            io.BytesIO(data),
+            chunk_size=1024,
+            buffer_count=2,
+            adaptive=True,
+            budget=budget,
+        ) as transfer:
+            chunks = [bytes(chunk) for chunk in transfer]
+
+    assert b"".join(chunks) == data
+    # The chunk size grows up to the maximum chunk size.
+    assert len(chunks[0]) == 1024
+    assert max(len(chunk) for chunk in chunks) == 16384
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import io
+from unittest import mock
+
+from openstack_migrate.transfer import resumable
+
+IMAGE_DATA = bytes(range(256)) * 40
+
+
+class _InterruptedStream(io.BytesIO):
+    def __init__(self, data, fail_at=None):
+        super().__init__(data)
+        self.fail_at = fail_at
+
+    def readinto(self, buffer):
+        if self.fail_at is not None and self.tell() >= self.fail_at:
+            raise ConnectionResetError("connection reset")
+        return super().readinto(memoryview(buffer)[:1000])
+
+
+class _FakeImageProxy:
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.ranges = []
+
+    def get(self, url, stream, headers):
+        range_header = headers.get("Range")
+        self.ranges.append(range_header)
+        offset = int(range_header[6:-1]) if range_header else 0
+        fail_at = self.fail_at
+        # Fail only once.
+        self.fail_at = None
+        return mock.Mock(
+            status_code=206 if range_header else 200,
+            raw=_InterruptedStream(IMAGE_DATA[offset:], fail_at),
+        )
+
+
+@mock.patch.object(resumable, "_RETRY_INTERVAL", 0)
+def test_image_data_reader_resume():
+    proxy = _FakeImageProxy(fail_at=3000)
+
+    with resumable.ImageDataReader(proxy, "image-0", retries=1) as reader:
+        data = reader.read()
+
+    assert data == IMAGE_DATA
+    assert proxy.ranges == [None, "bytes=3000-"]
+
+
+def test_spool_image_resume(tmp_path):
+    path = tmp_path / "image-0"
+    (tmp_path / "image-0.part").write_bytes(IMAGE_DATA[:5000])
+    proxy = _FakeImageProxy()
+
+    hexdigests = resumable.spool_image(proxy, "image-0", path, chunk_size=1024)
+
+    assert path.read_bytes() == IMAGE_DATA
+    assert not (tmp_path / "image-0.part").exists()
+    assert proxy.ranges == ["bytes=5000-"]
+    assert hexdigests == {"md5": hashlib.md5(IMAGE_DATA).hexdigest()}
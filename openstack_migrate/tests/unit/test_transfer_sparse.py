@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+from unittest import mock
+
+from openstack_migrate.transfer import sparse
+
+
+def test_is_zero():
+    data = bytearray(sparse.ZERO_BLOCK_SIZE * 3 + 10)
+    assert sparse.is_zero(memoryview(data))
+
+    data[-1] = 1
+    assert not sparse.is_zero(memoryview(data))
+
+
+def test_write_sparse(tmp_path):
+    block_size = sparse.ZERO_BLOCK_SIZE
+    data = bytearray(block_size * 4 + 10)
+    data[block_size : block_size * 2] = b"a" * block_size
+    data[-10:] = b"b" * 10
+
+    path = tmp_path / "image"
+    with path.open("wb") as f:
+        skipped = sparse.write_sparse(f, memoryview(data)[: block_size * 2])
+        skipped += sparse.write_sparse(f, memoryview(data)[block_size * 2 :])
+        f.truncate()
+
+    assert skipped == block_size * 3
+    assert path.read_bytes() == data
+
+
+@mock.patch("subprocess.check_call")
+def test_convert_image(mock_check_call, tmp_path):
+    sparse.convert_image(tmp_path / "image", tmp_path / "image.qcow2", "raw", "qcow2")
+
+    mock_check_call.assert_called_once_with(
+        [
+            "qemu-img",
+            "convert",
+            "-f",
+            "raw",
+            "-O",
+            "qcow2",
+            str(tmp_path / "image"),
+            str(tmp_path / "image.qcow2"),
+        ],
+        text=True,
+    )
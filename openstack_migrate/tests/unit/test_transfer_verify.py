@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+
+from openstack_migrate.transfer import filecopy, verify
+
+
+def _make_tree(root):
+    (root / "dir-0").mkdir(parents=True)
+    for idx in range(5):
+        (root / "dir-0" / f"file-{idx}").write_bytes(b"x" * idx)
+    (root / "large").write_bytes(os.urandom(verify.SAMPLE_BLOCK_SIZE * 3))
+    os.symlink("dir-0/file-1", root / "link")
+
+
+def test_verify_tree(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    _make_tree(source)
+    filecopy.FileCopier(source, destination).run()
+
+    results = verify.TreeVerifier(source, destination, workers=4).run()
+    assert results["files"] == 6
+    assert not results["mismatches"]
+
+    (destination / "dir-0" / "file-2").write_bytes(b"yy")
+    (destination / "dir-0" / "file-3").unlink()
+    (destination / "extra").write_bytes(b"")
+    with open(destination / "large", "r+b") as f:
+        f.seek(verify.SAMPLE_BLOCK_SIZE + 10)
+        f.write(b"modified")
+
+    results = verify.TreeVerifier(source, destination, workers=4).run()
+    assert sorted(
+        (mismatch["path"], mismatch["reason"])
+        for mismatch in results["mismatched_paths"]
+    ) == [
+        (os.path.join("dir-0", "file-2"), "content"),
+        (os.path.join("dir-0", "file-3"), "missing"),
+        ("extra", "unexpected"),
+        ("large", "content"),
+    ]
+
+    # The modified block is not sampled.
+    results = verify.TreeVerifier(source, destination, sample_blocks=2).run()
+    assert results["sampled"]
+    assert results["mismatches"] == 3
+
+
+def test_delta_copy_content_manifest(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    source.mkdir()
+    _make_tree(source)
+    manifest = tmp_path / "manifest"
+    content_manifest = tmp_path / "content-manifest"
+    filecopy.FileCopier(source, destination, manifest).run()
+    verify.TreeVerifier(source, destination, content_manifest).run()
+
+    # Touched files are not copied again, unlike modified files.
+    os.utime(source / "large", ns=(10**18, 10**18))
+    (source / "dir-0" / "file-4").write_bytes(b"modified")
+
+    stats = filecopy.FileCopier(
+        source,
+        destination,
+        manifest,
+        delete=True,
+        content_manifest_path=content_manifest,
+    ).run()
+
+    assert stats["files"] == 2
+    assert stats["unchanged"] == 1
+    assert stats["bytes"] == len(b"modified")
+    assert (destination / "large").stat().st_mtime_ns == 10**18
+    assert not verify.TreeVerifier(source, destination).run()["mismatches"]
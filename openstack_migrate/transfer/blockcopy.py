@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Direct block device copy.
+
+Used to transfer the volume data between locally attached volumes, avoiding
+the Glance round trip. The data is read sequentially using large chunks and
+written at the same offsets on the destination side.
+
+All-zero blocks are not written. Newly created volumes are not guaranteed
+to be empty (e.g. thick provisioned LVM volumes), so the zero ranges are
+explicitly zeroed using BLKZEROOUT, which is offloaded to the storage
+backend where supported (e.g. thin provisioned volumes, SCSI WRITE SAME).
+Regular files (e.g. loop device backing files) are truncated beforehand,
+leaving holes instead. The destination zeroing may be disabled if the
+storage backend is known to provide empty volumes.
+
+Accessing the attached volumes usually requires root privileges, in which
+case the copy is performed by a separate process:
+
+    sudo python -m openstack_migrate.transfer.blockcopy SOURCE DESTINATION
+"""
+
+import collections
+import errno
+import fcntl
+import json
+import logging
+import os
+import stat
+import struct
+import sys
+import typing
+
+import click
+
+from openstack_migrate import exception
+from openstack_migrate.transfer import sparse
+
+LOG = logging.getLogger()
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+# "_IO(0x12, 127)", zeroes out a byte range of a block device.
+BLKZEROOUT = 0x127F
+# "_IOR(0x12, 114, size_t)", retrieves the block device size.
+BLKGETSIZE64 = 0x80081272
+
+
+def get_size(fd: int) -> int:
+    """Get the size of a block device or regular file."""
+    st = os.fstat(fd)
+    if stat.S_ISBLK(st.st_mode):
+        buffer = fcntl.ioctl(fd, BLKGETSIZE64, b"\0" * 8)
+        return struct.unpack("Q", buffer)[0]
+    return st.st_size
+
+
+def _iter_runs(view: memoryview) -> typing.Iterator[tuple[int, int, bool]]:
+    """Split the buffer in zero and non-zero runs.
+
+    Yields (offset, length, is_zero) tuples, merging adjacent blocks of the
+    same kind.
+    """
+    run_start = 0
+    run_zero: bool | None = None
+    for offset in range(0, len(view), sparse.ZERO_BLOCK_SIZE):
+        block_zero = sparse.is_zero(view[offset : offset + sparse.ZERO_BLOCK_SIZE])
+        if run_zero is not None and block_zero != run_zero:
+            yield run_start, offset - run_start, run_zero
+            run_start = offset
+        run_zero = block_zero
+    if run_zero is not None:
+        yield run_start, len(view) - run_start, run_zero
+
+
+class BlockCopier:
+    """Copy the contents of a block device, skipping the all-zero blocks.
+
+    :param source_path: the source block device or file
+    :param destination_path: the destination block device or file, which
+                             must be at least as large as the source
+    :param chunk_size: the size of the reads
+    :param zero_destination: whether to zero out the destination ranges that
+                             correspond to all-zero source blocks
+    :param progress_callback: called with the number of processed bytes
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        destination_path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        zero_destination: bool = True,
+        progress_callback: typing.Callable[[int], None] | None = None,
+    ):
+        if chunk_size < sparse.ZERO_BLOCK_SIZE:
+            raise exception.InvalidInput(f"Invalid chunk size: {chunk_size}")
+        self._source_path = source_path
+        self._destination_path = destination_path
+        self._chunk_size = chunk_size
+        self._zero_destination = zero_destination
+        self._progress_callback = progress_callback
+        self._zeroout_supported = True
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    def run(self) -> collections.Counter[str]:
+        """Copy the data, returning the copy stats."""
+        source_fd = os.open(self._source_path, os.O_RDONLY)
+        try:
+            destination_fd = os.open(self._destination_path, os.O_WRONLY)
+            try:
+                self._copy(source_fd, destination_fd)
+                os.fsync(destination_fd)
+            finally:
+                os.close(destination_fd)
+        finally:
+            os.close(source_fd)
+
+        LOG.info(
+            "Finished copying %s to %s, written: %s bytes, skipped: %s bytes",
+            self._source_path,
+            self._destination_path,
+            self.stats["bytes"],
+            self.stats["skipped"],
+        )
+        return self.stats
+
+    def _copy(self, source_fd: int, destination_fd: int):
+        size = get_size(source_fd)
+        destination_size = get_size(destination_fd)
+        is_file = stat.S_ISREG(os.fstat(destination_fd).st_mode)
+        if destination_size < size and not is_file:
+            raise exception.Invalid(
+                f"The destination {self._destination_path} is smaller than the "
+                f"source {self._source_path}: {destination_size} < {size}"
+            )
+        LOG.info(
+            "Copying %s to %s, size: %s bytes",
+            self._source_path,
+            self._destination_path,
+            size,
+        )
+        if is_file:
+            # The file holes are read as zeros.
+            os.ftruncate(destination_fd, 0)
+            os.ftruncate(destination_fd, max(size, destination_size))
+        zero_destination = self._zero_destination and not is_file
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(source_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        buffer = bytearray(self._chunk_size)
+        view = memoryview(buffer)
+        # The pending zero range, merged across chunks.
+        zero_start = zero_length = 0
+        offset = 0
+        while offset < size:
+            count = os.preadv(
+                source_fd, [view[: min(self._chunk_size, size - offset)]], offset
+            )
+            if not count:
+                raise exception.OpenstackMigrateException(
+                    f"Unexpected end of data, {self._source_path}, offset: {offset}"
+                )
+            for run_offset, run_length, is_zero in _iter_runs(view[:count]):
+                if is_zero:
+                    if not zero_length:
+                        zero_start = offset + run_offset
+                    zero_length += run_length
+                    self.stats["skipped"] += run_length
+                    continue
+                if zero_length and zero_destination:
+                    self._zero_range(destination_fd, zero_start, zero_length)
+                zero_length = 0
+                self._write(
+                    destination_fd,
+                    view[run_offset : run_offset + run_length],
+                    offset + run_offset,
+                )
+                self.stats["bytes"] += run_length
+            offset += count
+            if self._progress_callback:
+                self._progress_callback(count)
+        if zero_length and zero_destination:
+            self._zero_range(destination_fd, zero_start, zero_length)
+
+    @staticmethod
+    def _write(fd: int, view: memoryview, offset: int):
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+
+    def _zero_range(self, fd: int, offset: int, length: int):
+        if self._zeroout_supported:
+            try:
+                fcntl.ioctl(fd, BLKZEROOUT, struct.pack("QQ", offset, length))
+                return
+            except OSError as ex:
+                if ex.errno not in (errno.ENOTTY, errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+                LOG.info(
+                    "BLKZEROOUT not supported by %s, writing zeros instead: %r",
+                    self._destination_path,
+                    ex,
+                )
+                self._zeroout_supported = False
+
+        zeros = memoryview(bytes(min(length, self._chunk_size)))
+        end = offset + length
+        while offset < end:
+            count = min(len(zeros), end - offset)
+            self._write(fd, zeros[:count], offset)
+            offset += count
+
+
+@click.command()
+@click.argument("source_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("destination_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option(
+    "--no-zero-destination",
+    is_flag=True,
+    help="Do not zero out the destination ranges of all-zero source blocks.",
+)
+@click.option("--debug", is_flag=True, help="Debug logging.")
+def main(
+    source_path: str,
+    destination_path: str,
+    chunk_size: int,
+    no_zero_destination: bool,
+    debug: bool,
+):
+    """Copy the contents of SOURCE_PATH to DESTINATION_PATH.
+
+    The copy stats are printed to stdout as JSON.
+    """
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s,%(msecs)03d %(levelname)s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    stats = BlockCopier(
+        source_path,
+        destination_path,
+        chunk_size=chunk_size,
+        zero_destination=not no_zero_destination,
+    ).run()
+    click.echo(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Destination image deduplication.
+
+The destination images are indexed by their hash ("os_hash_algo" and
+"os_hash_value"), allowing the image handler to reuse identical images
+(e.g. pre-seeded public cloud images) instead of transferring the data.
+
+The index is rebuilt periodically ("image_deduplication_index_ttl"), picking
+up the images created or removed in the meantime.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from openstack_migrate import config, constants
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+class DestinationImageIndex:
+    """Thread-safe index of the active destination images, keyed by hash.
+
+    The index is built lazily, using a single (paginated) image listing,
+    and rebuilt once older than the specified interval. The temporary
+    volume and instance images uploaded by openstack-migrate are not
+    indexed, as they are removed once the migration completes.
+
+    :param ttl: the index lifetime (seconds)
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self._ttl = CONF.image_deduplication_index_ttl if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._images: dict[tuple[str, str], list] | None = None
+        self._built_at = 0.0
+
+    def _build(self, image_proxy) -> dict[tuple[str, str], list]:
+        images: dict[tuple[str, str], list] = collections.defaultdict(list)
+        count = 0
+        for image in image_proxy.images(status="active"):
+            if (image.name or "").startswith(constants.TEMPORARY_IMAGE_PREFIXES):
+                continue
+            if image.hash_algo and image.hash_value:
+                images[(image.hash_algo, image.hash_value)].append(image)
+                count += 1
+        LOG.info("Indexed %s destination images by hash.", count)
+        return images
+
+    def find(
+        self,
+        image_proxy,
+        source_image,
+        owner: str | None,
+        mode: config.ImageDeduplication,
+    ):
+        """Find a destination image identical to the specified source image.
+
+        :param image_proxy: the destination image proxy
+        :param source_image: the source image
+        :param owner: the destination owner of the migrated image
+        :param mode: the deduplication mode
+
+        Returns None if there is no matching image.
+        """
+        if mode == config.ImageDeduplication.disabled:
+            return None
+        if not source_image.hash_algo or not source_image.hash_value:
+            return None
+
+        with self._lock:
+            if self._images is None or time.monotonic() - self._built_at > self._ttl:
+                self._images = self._build(image_proxy)
+                self._built_at = time.monotonic()
+            candidates = list(
+                self._images.get((source_image.hash_algo, source_image.hash_value), [])
+            )
+
+        candidates = [
+            image
+            for image in candidates
+            if image.disk_format == source_image.disk_format
+            and image.container_format == source_image.container_format
+        ]
+        same_owner = [
+            image
+            for image in candidates
+            if image.owner == owner and image.visibility == source_image.visibility
+        ]
+        if same_owner:
+            return same_owner[0]
+        if mode == config.ImageDeduplication.any and candidates:
+            return candidates[0]
+        return None
+
+
+_INDEX: DestinationImageIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_destination_image_index() -> DestinationImageIndex:
+    """Retrieve the process-wide destination image index."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if not _INDEX:
+            _INDEX = DestinationImageIndex()
+        return _INDEX
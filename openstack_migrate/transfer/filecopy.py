@@ -0,0 +1,526 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Parallel, resumable file tree copy.
+
+Used to transfer the Manila share data between the mounted shares. The
+directories are scanned concurrently and the files are copied by a pool of
+worker threads, small files being grouped in batches in order to reduce the
+scheduling overhead. Network filesystems are mostly bound by the metadata
+round trips when handling many small files, which are performed in parallel.
+
+The file ownership, permissions, extended attributes, timestamps, symlinks,
+hard links and sparse file holes are preserved.
+
+The copied files are recorded in a manifest along with the source file size,
+modification time and inode number. Interrupted copies are resumed without
+copying the finished files again, while subsequent incremental copies only
+transfer the files that were modified in the meantime, optionally removing
+the files that were deleted from the source.
+
+The content manifest produced by the share verification ("verify") may be
+used by incremental copies as well. Modified files whose contents still
+match the verified digest only have their metadata updated.
+
+Accessing the share contents and preserving the file ownership requires root
+privileges, the copy being performed by a separate process:
+
+    sudo python -m openstack_migrate.transfer.filecopy SOURCE DESTINATION
+"""
+
+import collections
+import errno
+import json
+import logging
+import os
+import pathlib
+import shutil
+import stat
+import sys
+import threading
+import typing
+from concurrent import futures
+
+import click
+
+from openstack_migrate import exception
+from openstack_migrate.transfer import sparse, tasks, verify
+
+LOG = logging.getLogger()
+
+# Files smaller than this are copied in batches.
+SMALL_FILE_SIZE = 1024 * 1024  # 1MB
+DEFAULT_WORKERS = 16
+DEFAULT_BATCH_SIZE = 64
+
+
+class CopyManifest:
+    """Record of the copied files, stored as JSON lines.
+
+    Each entry contains the relative path of the file along with the source
+    file size, modification time and inode number. Files that were modified
+    since being copied are copied again.
+
+    :param path: the manifest file, None to disable the manifest
+    """
+
+    def __init__(self, path: pathlib.Path | None):
+        self._path = path
+        self._entries: dict[str, dict[str, typing.Any]] = {}
+        self._lock = threading.Lock()
+        self._file: typing.TextIO | None = None
+
+    def __enter__(self):
+        """Load the manifest and open it for recording new entries."""
+        self.load()
+        if self._path:
+            self._file = open(self._path, "a")
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the manifest."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def load(self):
+        """Load the entries recorded by previous copies."""
+        if not self._path or not self._path.exists():
+            return
+        with open(self._path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Incomplete entry, the copy was interrupted.
+                    continue
+                self._entries[entry["path"]] = entry
+        LOG.info("Loaded %s manifest entries: %s", len(self._entries), self._path)
+
+    @staticmethod
+    def get_entry(rel_path: str, st: os.stat_result) -> dict[str, typing.Any]:
+        """Get the manifest entry of a source file."""
+        return {
+            "path": rel_path,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "ino": st.st_ino,
+        }
+
+    def get(self, rel_path: str) -> dict[str, typing.Any] | None:
+        """Get the recorded entry of a file, if any."""
+        return self._entries.get(rel_path)
+
+    def is_copied(self, rel_path: str, st: os.stat_result) -> bool:
+        """Check whether the source file was copied and left unchanged since."""
+        return self._entries.get(rel_path) == self.get_entry(rel_path, st)
+
+    def record(self, entries: list[dict[str, typing.Any]]):
+        """Record the copied files."""
+        with self._lock:
+            for entry in entries:
+                self._entries[entry["path"]] = entry
+            if self._file:
+                self._file.writelines(json.dumps(entry) + "\n" for entry in entries)
+                self._file.flush()
+
+
+class FileCopier:
+    """Copy the contents of a directory using a pool of worker threads.
+
+    :param source_dir: the source directory
+    :param destination_dir: the destination directory, created if missing
+    :param manifest_path: the manifest file used to resume interrupted copies
+    :param workers: the number of worker threads
+    :param batch_size: the maximum number of small files copied by a task
+    :param delete: remove the destination files that no longer exist on the
+                   source side, used by incremental copies
+    :param content_manifest_path: the content manifest of a previous
+                                  verification, allowing unchanged file
+                                  contents to be reused
+    """
+
+    def __init__(
+        self,
+        source_dir: pathlib.Path,
+        destination_dir: pathlib.Path,
+        manifest_path: pathlib.Path | None = None,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        delete: bool = False,
+        content_manifest_path: pathlib.Path | None = None,
+    ):
+        if workers < 1:
+            raise exception.InvalidInput(f"Invalid number of workers: {workers}")
+        self._source_dir = source_dir
+        self._destination_dir = destination_dir
+        self._manifest = CopyManifest(manifest_path)
+        self._workers = workers
+        self._batch_size = max(batch_size, 1)
+        self._delete = delete
+        self._content_manifest = CopyManifest(content_manifest_path)
+        # The ownership can only be preserved by privileged users.
+        self._preserve_ownership = os.geteuid() == 0
+
+        self._lock = threading.Lock()
+        self._tasks: tasks.TaskGroup | None = None
+        self._directories: list[tuple[str, os.stat_result]] = []
+        # Files having multiple hard links, keyed by (device, inode).
+        self._hard_links: dict[tuple[int, int], list[tuple[str, os.stat_result]]] = (
+            collections.defaultdict(list)
+        )
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    def run(self) -> collections.Counter[str]:
+        """Copy the directory contents, returning the copy stats."""
+        LOG.info(
+            "Copying %s to %s, workers: %s",
+            self._source_dir,
+            self._destination_dir,
+            self._workers,
+        )
+        self._content_manifest.load()
+        root_stat = os.lstat(self._source_dir)
+        self._make_directory("", root_stat)
+        with (
+            self._manifest,
+            futures.ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="filecopy"
+            ) as pool,
+        ):
+            self._tasks = tasks.TaskGroup(pool)
+            self._submit(self._scan_directory, "")
+            self._wait()
+
+            # The hard links are handled once all the links were found.
+            for links in self._hard_links.values():
+                self._submit(self._copy_hard_links, links)
+            self._wait()
+
+            # Writing the directory contents updates the directory timestamps,
+            # so the directory metadata is copied at the end.
+            for rel_path, st in self._directories:
+                self._submit(self._copy_directory_metadata, rel_path, st)
+            self._wait()
+            self._tasks = None
+
+        LOG.info(
+            "Finished copying %s to %s, copied files: %s (%s bytes), "
+            "skipped files: %s, unchanged contents: %s, deleted files: %s, "
+            "directories: %s",
+            self._source_dir,
+            self._destination_dir,
+            self.stats["files"],
+            self.stats["bytes"],
+            self.stats["skipped"],
+            self.stats["unchanged"],
+            self.stats["deleted"],
+            self.stats["directories"],
+        )
+        return self.stats
+
+    def _submit(self, func: typing.Callable, *args):
+        if not self._tasks:
+            raise exception.OpenstackMigrateException("The worker pool is not running.")
+        self._tasks.submit(func, *args)
+
+    def _wait(self):
+        """Wait for the submitted tasks, raising the first error, if any."""
+        if not self._tasks:
+            raise exception.OpenstackMigrateException("The worker pool is not running.")
+        try:
+            self._tasks.wait()
+        except Exception as ex:
+            raise exception.OpenstackMigrateException(
+                f"Failed to copy {self._source_dir}: {ex!r}"
+            ) from ex
+
+    def _make_directory(self, rel_path: str, st: os.stat_result):
+        os.makedirs(self._destination_dir / rel_path, exist_ok=True)
+        with self._lock:
+            self._directories.append((rel_path, st))
+            self.stats["directories"] += 1
+
+    def _list_destination(self, rel_path: str) -> dict[str, bool]:
+        """List the destination directory, mapping entry names to "is_dir"."""
+        with os.scandir(self._destination_dir / rel_path) as entries:
+            return {
+                entry.name: entry.is_dir(follow_symlinks=False) for entry in entries
+            }
+
+    def _scan_directory(self, rel_path: str):
+        # A single directory listing is used to determine the existing
+        # destination entries, avoiding a round trip per file.
+        destination_entries = self._list_destination(rel_path)
+        source_names = set()
+        batch: list[tuple[str, os.stat_result]] = []
+        try:
+            source_entries = os.scandir(self._source_dir / rel_path)
+        except FileNotFoundError:
+            LOG.debug("Source directory removed, skipping: %s", rel_path)
+            return
+        with source_entries as entries:
+            for entry in entries:
+                source_names.add(entry.name)
+                entry_path = os.path.join(rel_path, entry.name)
+                exists = entry.name in destination_entries
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    # The source file was removed in the meantime.
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    if exists and not destination_entries[entry.name]:
+                        self._remove(entry_path)
+                    self._make_directory(entry_path, st)
+                    self._submit(self._scan_directory, entry_path)
+                elif stat.S_ISREG(st.st_mode) and st.st_nlink > 1:
+                    with self._lock:
+                        self._hard_links[(st.st_dev, st.st_ino)].append(
+                            (entry_path, st)
+                        )
+                elif exists and self._manifest.is_copied(entry_path, st):
+                    with self._lock:
+                        self.stats["skipped"] += 1
+                else:
+                    # The destination file contents may be reused if they
+                    # match the digest of a previous verification.
+                    reuse_content = (
+                        exists
+                        and not destination_entries[entry.name]
+                        and self._has_content_digest(entry_path, st)
+                    )
+                    if exists and not reuse_content:
+                        # Stale copy, possibly having a different type.
+                        self._remove(entry_path)
+                    if stat.S_ISREG(st.st_mode) and st.st_size >= SMALL_FILE_SIZE:
+                        self._submit(self._copy_files, [(entry_path, st)])
+                        continue
+                    batch.append((entry_path, st))
+                    if len(batch) >= self._batch_size:
+                        self._submit(self._copy_files, batch)
+                        batch = []
+        if batch:
+            self._submit(self._copy_files, batch)
+
+        if self._delete:
+            for name in sorted(destination_entries.keys() - source_names):
+                entry_path = os.path.join(rel_path, name)
+                LOG.debug("Removing file deleted from the source: %s", entry_path)
+                self._remove(entry_path)
+                with self._lock:
+                    self.stats["deleted"] += 1
+
+    def _remove(self, rel_path: str):
+        path = self._destination_dir / rel_path
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+
+    def _is_copied(self, rel_path: str, st: os.stat_result) -> bool:
+        return self._manifest.is_copied(rel_path, st) and os.path.lexists(
+            self._destination_dir / rel_path
+        )
+
+    def _copy_files(self, files: list[tuple[str, os.stat_result]]):
+        copied = []
+        copied_bytes = 0
+        for rel_path, st in files:
+            try:
+                copied_bytes += self._copy_file(rel_path, st)
+            except FileNotFoundError:
+                if os.path.lexists(self._source_dir / rel_path):
+                    raise
+                # The source file was removed in the meantime.
+                LOG.debug("Source file removed, skipping: %s", rel_path)
+                continue
+            copied.append(CopyManifest.get_entry(rel_path, st))
+        self._manifest.record(copied)
+        with self._lock:
+            self.stats["files"] += len(copied)
+            self.stats["bytes"] += copied_bytes
+
+    def _copy_hard_links(self, links: list[tuple[str, os.stat_result]]):
+        first_path, first_stat = links[0]
+        if self._is_copied(first_path, first_stat):
+            with self._lock:
+                self.stats["skipped"] += 1
+        else:
+            self._remove_existing(first_path)
+            self._copy_files([links[0]])
+
+        target = self._destination_dir / first_path
+        for rel_path, st in links[1:]:
+            if self._is_copied(rel_path, st):
+                with self._lock:
+                    self.stats["skipped"] += 1
+                continue
+            self._remove_existing(rel_path)
+            os.link(target, self._destination_dir / rel_path)
+            self._manifest.record([CopyManifest.get_entry(rel_path, st)])
+            with self._lock:
+                self.stats["files"] += 1
+
+    def _remove_existing(self, rel_path: str):
+        if os.path.lexists(self._destination_dir / rel_path):
+            self._remove(rel_path)
+
+    def _has_content_digest(self, rel_path: str, st: os.stat_result) -> bool:
+        entry = self._content_manifest.get(rel_path)
+        return bool(
+            entry
+            and stat.S_ISREG(st.st_mode)
+            and entry["size"] == st.st_size
+            and entry["hash_algo"] == verify.HASH_ALGORITHM
+        )
+
+    def _is_content_unchanged(self, rel_path: str, st: os.stat_result) -> bool:
+        """Check whether both files still have the verified contents."""
+        if not self._has_content_digest(rel_path, st):
+            return False
+        entry = self._content_manifest.get(rel_path) or {}
+        try:
+            destination_st = os.lstat(self._destination_dir / rel_path)
+        except FileNotFoundError:
+            return False
+        # The destination file must not have been copied again since the
+        # verification, while the source file contents are hashed.
+        if (
+            not stat.S_ISREG(destination_st.st_mode)
+            or destination_st.st_size != st.st_size
+            or destination_st.st_mtime_ns != entry["destination_mtime_ns"]
+            or destination_st.st_ino != entry["destination_ino"]
+        ):
+            return False
+        return verify.hash_file(self._source_dir / rel_path) == entry["hash_value"]
+
+    def _copy_file(self, rel_path: str, st: os.stat_result) -> int:
+        """Copy a file, returning the number of copied data bytes."""
+        source_path = self._source_dir / rel_path
+        destination_path = self._destination_dir / rel_path
+        # Existing destination files are removed when scanning the directory,
+        # unless their contents may be reused.
+        if stat.S_ISREG(st.st_mode):
+            if self._is_content_unchanged(rel_path, st):
+                self._copy_metadata(source_path, destination_path, st)
+                with self._lock:
+                    self.stats["unchanged"] += 1
+                return 0
+            if os.path.lexists(destination_path):
+                self._remove(rel_path)
+            # Preserves the holes of sparse files.
+            sparse.copy_file(source_path, destination_path)
+            self._copy_metadata(source_path, destination_path, st)
+            return st.st_size
+
+        if stat.S_ISLNK(st.st_mode):
+            os.symlink(os.readlink(source_path), destination_path)
+        else:
+            # Fifos, sockets and device files.
+            os.mknod(destination_path, st.st_mode, st.st_rdev)
+        self._copy_metadata(source_path, destination_path, st)
+        return 0
+
+    def _copy_directory_metadata(self, rel_path: str, st: os.stat_result):
+        self._copy_metadata(
+            self._source_dir / rel_path, self._destination_dir / rel_path, st
+        )
+
+    def _copy_metadata(
+        self,
+        source_path: pathlib.Path,
+        destination_path: pathlib.Path,
+        st: os.stat_result,
+    ):
+        is_link = stat.S_ISLNK(st.st_mode)
+        self._copy_xattrs(source_path, destination_path)
+        if self._preserve_ownership:
+            os.chown(destination_path, st.st_uid, st.st_gid, follow_symlinks=False)
+        if not is_link:
+            # Changing the ownership clears the setuid and setgid bits, so the
+            # permissions are set afterwards.
+            os.chmod(destination_path, stat.S_IMODE(st.st_mode))
+        os.utime(
+            destination_path,
+            ns=(st.st_atime_ns, st.st_mtime_ns),
+            follow_symlinks=False,
+        )
+
+    def _copy_xattrs(self, source_path: pathlib.Path, destination_path: pathlib.Path):
+        try:
+            names = os.listxattr(source_path, follow_symlinks=False)
+        except OSError as ex:
+            if ex.errno in (errno.ENOTSUP, errno.EPERM):
+                return
+            raise
+        for name in names:
+            try:
+                value = os.getxattr(source_path, name, follow_symlinks=False)
+                os.setxattr(destination_path, name, value, follow_symlinks=False)
+            except OSError as ex:
+                # Some attributes cannot be set on the destination, e.g.
+                # "security.*" attributes of unprivileged users.
+                if ex.errno not in (errno.ENOTSUP, errno.EPERM):
+                    raise
+                LOG.debug(
+                    "Unable to copy extended attribute %s of %s: %r",
+                    name,
+                    source_path,
+                    ex,
+                )
+
+
+@click.command()
+@click.argument("source_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("destination_dir", type=click.Path(file_okay=False))
+@click.option("--manifest", type=click.Path(dir_okay=False), help="Manifest file.")
+@click.option("--workers", type=int, default=DEFAULT_WORKERS, show_default=True)
+@click.option("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option(
+    "--delete",
+    is_flag=True,
+    help="Remove the destination files that do not exist on the source side.",
+)
+@click.option(
+    "--content-manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Content manifest of a previous verification.",
+)
+@click.option("--debug", is_flag=True, help="Debug logging.")
+def main(
+    source_dir: str,
+    destination_dir: str,
+    manifest: str | None,
+    workers: int,
+    batch_size: int,
+    delete: bool,
+    content_manifest: str | None,
+    debug: bool,
+):
+    """Copy the contents of SOURCE_DIR to DESTINATION_DIR.
+
+    The copy stats are printed to stdout as JSON.
+    """
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s,%(msecs)03d %(levelname)s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    stats = FileCopier(
+        pathlib.Path(source_dir),
+        pathlib.Path(destination_dir),
+        manifest_path=pathlib.Path(manifest) if manifest else None,
+        workers=workers,
+        batch_size=batch_size,
+        delete=delete,
+        content_manifest_path=(
+            pathlib.Path(content_manifest) if content_manifest else None
+        ),
+    ).run()
+    click.echo(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
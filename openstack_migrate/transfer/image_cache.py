@@ -0,0 +1,211 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Content-addressed local image cache.
+
+Downloaded images are stored under "temporary_migration_dir", keyed by
+their hash ("os_hash_algo" and "os_hash_value" or the md5 checksum). Images
+that share the same content are downloaded from the source cloud only once,
+including by subsequent runs (e.g. when retrying a failed batch).
+
+The cache size is bounded, the least recently used entries being evicted
+to make room for new images.
+"""
+
+import collections
+import contextlib
+import logging
+import os
+import pathlib
+import threading
+import typing
+
+from openstack_migrate import config, exception
+from openstack_migrate.transfer import resumable
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+def get_cache_key(image) -> str | None:
+    """Get the cache key of a Glance image, None if the image has no hash."""
+    hash_algo = getattr(image, "hash_algo", None)
+    hash_value = getattr(image, "hash_value", None)
+    if hash_algo and hash_value:
+        return f"{hash_algo}-{hash_value}"
+    if image.checksum:
+        return f"md5-{image.checksum}"
+    return None
+
+
+def get_image_hashes(image) -> dict[str, str]:
+    """Get the hashes reported by Glance, keyed by hashlib algorithm."""
+    hashes = {}
+    if image.checksum:
+        hashes["md5"] = image.checksum
+    hash_algo = getattr(image, "hash_algo", None)
+    hash_value = getattr(image, "hash_value", None)
+    if hash_algo and hash_value:
+        hashes[hash_algo] = hash_value
+    return hashes
+
+
+class ImageCache:
+    """Thread-safe, size bounded image cache.
+
+    :param cache_dir: the cache directory
+    :param max_size: the cache size limit (bytes)
+    """
+
+    def __init__(
+        self, cache_dir: pathlib.Path | None = None, max_size: int | None = None
+    ):
+        self._dir = cache_dir or CONF.temporary_migration_dir / "image-cache"
+        self._max_size = CONF.image_cache_size if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        # Entries that are being downloaded or read, which may not be evicted.
+        self._pinned: collections.Counter[str] = collections.Counter()
+        # The sizes of the images being downloaded, which are only partially
+        # written to the disk.
+        self._reserved: dict[str, int] = {}
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is enabled."""
+        return self._max_size > 0
+
+    def _get_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _reserve(self, key: str, size: int) -> bool:
+        """Evict the least recently used entries to make room for an image.
+
+        The reserved size is accounted for until the image is unpinned.
+        Returns False if the image does not fit in the cache.
+        """
+        if size > self._max_size:
+            return False
+        with self._lock:
+            entries = []
+            disk_sizes: collections.Counter[str] = collections.Counter()
+            for path in self._dir.iterdir():
+                stat = path.stat()
+                entry_key = path.name.removesuffix(resumable.PARTIAL_SUFFIX)
+                # The partial file of the requested image is replaced.
+                if entry_key == key:
+                    continue
+                disk_sizes[entry_key] += stat.st_size
+                if not self._pinned[entry_key]:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            # Ongoing downloads count with their full size.
+            total_size = sum(
+                max(disk_sizes[entry_key], self._reserved.get(entry_key, 0))
+                for entry_key in disk_sizes.keys() | self._reserved.keys()
+                if entry_key != key
+            )
+
+            for _, entry_size, path in sorted(entries):
+                if total_size + size <= self._max_size:
+                    break
+                LOG.info("Evicting cached image: %s", path.name)
+                path.unlink(missing_ok=True)
+                total_size -= entry_size
+                self.stats["evictions"] += 1
+            if total_size + size > self._max_size:
+                return False
+            self._reserved[key] = size
+            return True
+
+    def _download(self, image_proxy, image, path: pathlib.Path):
+        expected = get_image_hashes(image)
+        hexdigests = resumable.spool_image(
+            image_proxy,
+            image.id,
+            path,
+            CONF.image_transfer_chunk_size,
+            hash_algorithms=list(expected),
+        )
+        for algorithm, value in expected.items():
+            if hexdigests[algorithm] != value:
+                path.unlink(missing_ok=True)
+                raise exception.Invalid(
+                    f"Checksum mismatch in downloaded image {image.id} ({algorithm})."
+                )
+
+    @contextlib.contextmanager
+    def get_image_file(
+        self, image_proxy, image
+    ) -> typing.Iterator[pathlib.Path | None]:
+        """Retrieve a local copy of the image, downloading it if necessary.
+
+        Yields None if the image cannot be cached, e.g. if it has no hash or
+        exceeds the cache size. The cached file may not be evicted while in
+        use.
+        """
+        key = get_cache_key(image)
+        if not self.enabled or not key:
+            yield None
+            return
+
+        self._dir.mkdir(mode=0o750, parents=True, exist_ok=True)
+        path = self._dir / key
+        cached_path: pathlib.Path | None = path
+        with self._get_key_lock(key):
+            with self._lock:
+                self._pinned[key] += 1
+            try:
+                if path.exists():
+                    LOG.info("Using cached image %s: %s", image.id, path)
+                    self.stats["hits"] += 1
+                    # Used to determine the least recently used entries.
+                    os.utime(path)
+                elif self._reserve(key, image.size or 0):
+                    self.stats["misses"] += 1
+                    self._download(image_proxy, image, path)
+                else:
+                    LOG.info(
+                        "Image %s exceeds the image cache size, skipping cache.",
+                        image.id,
+                    )
+                    cached_path = None
+            except BaseException:
+                self._unpin(key)
+                raise
+
+        try:
+            yield cached_path
+        finally:
+            self._unpin(key)
+
+    def _unpin(self, key: str):
+        with self._lock:
+            self._pinned[key] -= 1
+            if not self._pinned[key]:
+                del self._pinned[key]
+                self._reserved.pop(key, None)
+
+    def log_stats(self):
+        """Log the image cache hits, misses and evictions."""
+        if self.enabled:
+            LOG.info(
+                "Image cache stats, hits: %s, misses: %s, evictions: %s.",
+                self.stats["hits"],
+                self.stats["misses"],
+                self.stats["evictions"],
+            )
+
+
+_CACHE: ImageCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Retrieve the process-wide image cache."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if not _CACHE:
+            _CACHE = ImageCache()
+        return _CACHE
@@ -0,0 +1,232 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Data transfer metrics.
+
+Tracks the amount of transferred data, the transfer rate, the estimated
+time left, the time spent waiting for either side and the duration of each
+transfer phase (e.g. source upload, download, destination import).
+
+The progress of ongoing transfers is logged periodically
+("transfer_progress_interval"), allowing long running transfers to be
+distinguished from stuck ones. Phases that do not report the amount of
+transferred data (e.g. waiting for a Cinder volume upload) use the
+"estimated_transfer_rate" setting to estimate the time left.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+import typing
+
+from openstack_migrate import config
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+_MiB = 1024 * 1024
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+class TransferMetrics:
+    """Thread-safe transfer progress tracker.
+
+    :param name: the transfer name, used in log messages
+    :param total_bytes: the expected amount of data, if known
+    :param bytes_callback: optional callback that retrieves the amount of
+        transferred data, used when the data is transferred by an external
+        process (e.g. by copying files)
+    :param interval: the progress log interval (seconds), 0 to disable
+    """
+
+    def __init__(
+        self,
+        name: str,
+        total_bytes: int | None = None,
+        bytes_callback: typing.Callable[[], int] | None = None,
+        interval: float | None = None,
+    ):
+        self.name = name
+        self.total_bytes = total_bytes
+        self._bytes_callback = bytes_callback
+        self._interval = (
+            CONF.transfer_progress_interval if interval is None else interval
+        )
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_time = time.monotonic()
+        self._end_time: float | None = None
+        self._bytes_transferred = 0
+        # Time spent waiting for the source or destination side.
+        self.source_wait = 0.0
+        self.destination_wait = 0.0
+        # Phase durations (seconds).
+        self.phases: dict[str, float] = {}
+        self._phase: str | None = None
+        self._phase_start = 0.0
+
+    def __enter__(self) -> "TransferMetrics":
+        """Start reporting the transfer progress."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop reporting the transfer progress."""
+        self.stop()
+
+    def start(self):
+        """Start the progress reporting thread."""
+        self._start_time = time.monotonic()
+        if self._interval and not self._thread:
+            self._thread = threading.Thread(
+                target=self._report_progress, name="transfer-progress", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the progress reporting thread."""
+        self._end_time = time.monotonic()
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _report_progress(self):
+        while not self._stopped.wait(self._interval):
+            self.log_progress()
+
+    @property
+    def bytes_transferred(self) -> int:
+        """The amount of transferred data."""
+        if self._bytes_callback:
+            try:
+                return max(self._bytes_callback(), 0)
+            except Exception as ex:
+                LOG.debug("Unable to retrieve the %s progress: %r", self.name, ex)
+        return self._bytes_transferred
+
+    @property
+    def elapsed(self) -> float:
+        """The transfer duration (seconds)."""
+        return (self._end_time or time.monotonic()) - self._start_time
+
+    @property
+    def rate(self) -> float:
+        """The average transfer rate (bytes per second)."""
+        return self.bytes_transferred / max(self.elapsed, 1e-6)
+
+    @property
+    def eta(self) -> float | None:
+        """The estimated time left (seconds), None if unknown."""
+        if not self.total_bytes:
+            return None
+        transferred = self.bytes_transferred
+        if transferred:
+            return max(self.total_bytes - transferred, 0) / max(self.rate, 1e-6)
+        # Nothing transferred yet (or the progress is not reported by this
+        # phase), fall back to the estimated transfer rate.
+        estimated = self.total_bytes / CONF.estimated_transfer_rate
+        return max(estimated - self.elapsed, 0)
+
+    def add_bytes(self, count: int):
+        """Record transferred data."""
+        with self._lock:
+            self._bytes_transferred += count
+
+    def add_waits(self, source: float = 0, destination: float = 0):
+        """Record the time spent waiting for the source or destination side."""
+        with self._lock:
+            self.source_wait += source
+            self.destination_wait += destination
+
+    def track(self, chunks: typing.Iterable) -> typing.Iterator:
+        """Record the data passed through the specified chunk iterator."""
+        for chunk in chunks:
+            yield chunk
+            self.add_bytes(len(chunk))
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> typing.Iterator[None]:
+        """Measure the duration of a transfer phase."""
+        previous_phase, previous_start = self._phase, self._phase_start
+        self._phase, self._phase_start = name, time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - self._phase_start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0) + duration
+            self._phase, self._phase_start = previous_phase, previous_start
+
+    def log_progress(self):
+        """Log the current transfer progress."""
+        transferred = self.bytes_transferred
+        progress = f"{transferred} bytes"
+        if self.total_bytes:
+            percent = min(transferred / self.total_bytes * 100, 100)
+            progress = f"{transferred}/{self.total_bytes} bytes ({percent:.0f}%)"
+        eta = self.eta
+        LOG.info(
+            "Transfer in progress: %s, phase: %s, %s, %.1f MB/s, elapsed: %s, ETA: %s.",
+            self.name,
+            self._phase or "-",
+            progress,
+            self.rate / _MiB,
+            _format_duration(self.elapsed),
+            _format_duration(eta) if eta is not None else "unknown",
+        )
+
+    def log_summary(self):
+        """Log the transfer metrics."""
+        LOG.info(
+            "Transfer finished: %s, %s bytes in %.1fs (%.1f MB/s), "
+            "waiting for source: %.1fs, waiting for destination: %.1fs, "
+            "phases: %s.",
+            self.name,
+            self.bytes_transferred,
+            self.elapsed,
+            self.rate / _MiB,
+            self.source_wait,
+            self.destination_wait,
+            ", ".join(
+                f"{phase}: {duration:.1f}s" for phase, duration in self.phases.items()
+            )
+            or "-",
+        )
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Get the transfer metrics as a JSON serializable dict."""
+        return {
+            "bytes_transferred": self.bytes_transferred,
+            "duration": round(self.elapsed, 3),
+            "rate": round(self.rate),
+            "source_wait": round(self.source_wait, 3),
+            "destination_wait": round(self.destination_wait, 3),
+            "phases": {
+                phase: round(duration, 3) for phase, duration in self.phases.items()
+            },
+        }
+
+
+def merge_metrics(
+    previous: dict[str, typing.Any], current: dict[str, typing.Any]
+) -> dict[str, typing.Any]:
+    """Merge the metrics of subsequent transfers (e.g. resumed migrations)."""
+    merged = dict(previous)
+    for key, value in current.items():
+        if key == "phases":
+            phases = dict(previous.get("phases", {}))
+            for phase, duration in value.items():
+                phases[phase] = round(phases.get(phase, 0) + duration, 3)
+            merged[key] = phases
+        elif key != "rate":
+            merged[key] = previous.get(key, 0) + value
+    merged["rate"] = round(merged["bytes_transferred"] / max(merged["duration"], 1e-6))
+    return merged
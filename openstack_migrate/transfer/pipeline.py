@@ -0,0 +1,433 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Pipelined data transfers.
+
+The source data is read by a dedicated thread into a bounded ring of
+reusable buffers. The buffers are hashed by a separate thread and then
+handed over to the consumer (e.g. the destination upload request), which
+releases them once sent.
+
+A slow destination does not stall the source reads until the entire ring is
+in use and vice versa, allowing the transfer rate to approach the bandwidth
+of the slowest side. The hashlib functions release the GIL while processing
+large buffers, so hashing doesn't block the other stages either.
+
+The buffers of all the concurrent transfers are allocated from a shared
+memory budget ("image_transfer_memory_limit"). The chunk size may be adapted
+at runtime based on the observed transfer rate, using small chunks for slow
+transfers and large chunks for fast ones, within the fair share of the
+memory budget.
+"""
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+import typing
+
+from openstack_migrate import config, exception
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+# Used to check whether the transfer was stopped while waiting for buffers.
+_POLL_INTERVAL = 0.5
+# How long to wait for the pipeline threads when stopping the transfer. The
+# reader may be blocked by a stalled source request.
+_STOP_TIMEOUT = 5
+# Adaptive chunk sizes hold about this much data (seconds), based on the
+# observed transfer rate.
+_TARGET_CHUNK_DURATION = 0.5
+# The minimum transfer duration before adapting the chunk size (seconds).
+_MIN_SAMPLE_DURATION = 1
+
+
+class Readable(typing.Protocol):
+    """A binary stream supporting "readinto" (e.g. "io.RawIOBase")."""
+
+    def readinto(self, buffer: memoryview, /) -> int | None:
+        """Read data into the buffer, returning the number of bytes read."""
+        ...
+
+
+class _EndOfStream:
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+class MemoryBudget:
+    """Bounds the memory used by the buffers of concurrent transfers."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        # The number of transfers sharing the budget.
+        self.transfers = 0
+        self._cond = threading.Condition()
+
+    def register(self):
+        """Register a transfer that uses the budget."""
+        with self._cond:
+            self.transfers += 1
+
+    def unregister(self):
+        """Unregister a completed transfer."""
+        with self._cond:
+            self.transfers -= 1
+
+    def get_fair_share(self) -> int:
+        """Get the amount of memory available to each transfer."""
+        with self._cond:
+            return self.limit // max(self.transfers, 1)
+
+    def acquire(self, size: int, stopped: threading.Event, blocking: bool) -> bool:
+        """Reserve memory, returns False if unavailable or stopped."""
+        with self._cond:
+            while self.used + size > self.limit:
+                if not blocking or stopped.is_set():
+                    return False
+                self._cond.wait(_POLL_INTERVAL)
+            self.used += size
+            return True
+
+    def release(self, size: int):
+        """Release reserved memory."""
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+_BUDGET: MemoryBudget | None = None
+_BUDGET_LOCK = threading.Lock()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """Retrieve the process-wide transfer memory budget."""
+    global _BUDGET
+    with _BUDGET_LOCK:
+        if not _BUDGET:
+            _BUDGET = MemoryBudget(CONF.image_transfer_memory_limit)
+        return _BUDGET
+
+
+class BufferRing:
+    """A bounded set of reusable buffers.
+
+    Up to "count" buffers are allocated on demand, reserving memory from the
+    shared budget. Only the first buffer waits for memory to become
+    available, additional buffers being allocated if the budget allows. This
+    ensures that transfers make progress without exceeding the budget.
+
+    Buffers that do not match the current chunk size ("size") are released
+    and reallocated.
+    """
+
+    def __init__(self, count: int, size: int, budget: MemoryBudget | None = None):
+        if count < 1 or size < 1:
+            raise exception.InvalidInput(
+                f"Invalid transfer buffers, count: {count}, size: {size}."
+            )
+        self.size = size
+        self.count = count
+        self._budget = budget or get_memory_budget()
+        if size > self._budget.limit:
+            raise exception.InvalidInput(
+                f"The transfer buffer size ({size}) exceeds the memory limit "
+                f"({self._budget.limit})."
+            )
+        self._budget.register()
+        self._free: list[bytearray] = []
+        self._buffer_count = 0
+        self._allocated = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, stopped: threading.Event) -> bytearray | None:
+        """Wait for a free buffer, returns None if the transfer was stopped."""
+        while not stopped.is_set():
+            with self._cond:
+                size = self.size
+                while self._free:
+                    buffer = self._free.pop()
+                    if len(buffer) == size:
+                        return buffer
+                    self._discard(buffer)
+                if self._buffer_count >= self.count:
+                    self._cond.wait(_POLL_INTERVAL)
+                    continue
+                first = not self._buffer_count
+                self._buffer_count += 1
+
+            if self._budget.acquire(size, stopped, blocking=first):
+                with self._cond:
+                    if not self._closed:
+                        self._allocated += size
+                        return bytearray(size)
+                    self._budget.release(size)
+
+            with self._cond:
+                self._buffer_count -= 1
+                if not first:
+                    # Wait for a buffer to be released instead.
+                    self._cond.wait(_POLL_INTERVAL)
+        return None
+
+    def _discard(self, buffer: bytearray):
+        self._buffer_count -= 1
+        self._allocated -= len(buffer)
+        self._budget.release(len(buffer))
+
+    def release(self, buffer: bytearray):
+        """Return a buffer to the ring."""
+        with self._cond:
+            if self._closed:
+                # The memory was already released.
+                return
+            if len(buffer) == self.size:
+                self._free.append(buffer)
+            else:
+                self._discard(buffer)
+            self._cond.notify()
+
+    def close(self):
+        """Release the memory used by the buffers."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._free = []
+            self._budget.release(self._allocated)
+            self._allocated = 0
+        self._budget.unregister()
+
+
+def _read_into(source: Readable, view: memoryview) -> int:
+    """Fill the buffer, returning the number of bytes read.
+
+    Short reads are expected when reaching the end of the stream.
+    """
+    filled = 0
+    while filled < len(view):
+        count = source.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+class TransferPipeline:
+    """Read, hash and consume data using separate threads.
+
+    Iterate over the pipeline to retrieve the data, e.g. by passing it as a
+    request body. The yielded memory views are only valid until the next
+    chunk is requested, at which point the buffer is reused.
+
+    :param source: a binary file-like object supporting "readinto", such as
+        a streamed HTTP response ("response.raw")
+    :param chunk_size: the buffer size
+    :param buffer_count: the number of buffers
+    :param hash_algorithms: hashlib algorithms applied to the data
+    :param hashes: optional hash objects to update instead, e.g. when
+        resuming a transfer
+    :param name: a name used when logging the transfer statistics
+    :param adaptive: whether to adapt the chunk size based on the observed
+        transfer rate, "chunk_size" being the initial chunk size
+    :param size_hint: the expected amount of data, if known, used to avoid
+        allocating buffers larger than the transferred data
+    :param budget: the memory budget, defaults to the process-wide budget
+    """
+
+    def __init__(
+        self,
+        source: Readable,
+        chunk_size: int,
+        buffer_count: int | None = None,
+        hash_algorithms: typing.Iterable[str] = ("md5",),
+        hashes: dict[str, typing.Any] | None = None,
+        name: str = "data",
+        adaptive: bool = False,
+        size_hint: int | None = None,
+        budget: MemoryBudget | None = None,
+    ):
+        if not chunk_size:
+            raise exception.InvalidInput("No transfer chunk size provided.")
+        self._source = source
+        self._name = name
+        self._adaptive = adaptive
+        buffer_count = buffer_count or CONF.image_transfer_buffer_count
+        self._budget = budget or get_memory_budget()
+        if adaptive:
+            chunk_size = self._get_chunk_size(
+                min(chunk_size, size_hint or chunk_size), buffer_count, self._budget
+            )
+        self._buffers = BufferRing(buffer_count, chunk_size, self._budget)
+        self._hashes = (
+            hashes
+            if hashes is not None
+            else {
+                algorithm: hashlib.new(algorithm, usedforsecurity=False)
+                for algorithm in hash_algorithms
+            }
+        )
+        self._hash_queue: queue.Queue = queue.Queue()
+        self._output_queue: queue.Queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._started = False
+        self._completed = False
+
+        self.bytes_transferred = 0
+        # Time spent by the reader waiting for free buffers, indicating that
+        # the consumer (destination) is the bottleneck.
+        self.reader_wait = 0.0
+        # Time spent by the consumer waiting for data, indicating that the
+        # source is the bottleneck.
+        self.consumer_wait = 0.0
+
+    def __enter__(self) -> "TransferPipeline":
+        """Start the pipeline."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop the pipeline."""
+        self.close()
+
+    def start(self):
+        """Start the reader and hashing threads."""
+        if self._started:
+            return
+        self._started = True
+        self._start_time = time.monotonic()
+        for target, stage in ((self._read, "reader"), (self._hash, "hasher")):
+            thread = threading.Thread(
+                target=target, name=f"transfer-{stage}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self):
+        """Stop the pipeline threads and release the buffers."""
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout=_STOP_TIMEOUT)
+            if thread.is_alive():
+                LOG.debug("The %s transfer thread is still running.", thread.name)
+        self._threads = []
+        self._buffers.close()
+
+    @staticmethod
+    def _get_chunk_size(size: float, buffer_count: int, budget: MemoryBudget) -> int:
+        # Power of two sizes avoid frequent reallocations.
+        size = 1 << max(int(size) - 1, 0).bit_length()
+        size = max(size, CONF.image_transfer_min_chunk_size)
+        size = min(size, CONF.image_transfer_max_chunk_size)
+        # Leave room for the other transfers sharing the budget.
+        fair_share = budget.get_fair_share() // buffer_count
+        return max(min(size, fair_share), 1)
+
+    def _adapt_chunk_size(self):
+        elapsed = time.monotonic() - self._start_time
+        if not self._adaptive or elapsed < _MIN_SAMPLE_DURATION:
+            return
+        rate = self.bytes_transferred / elapsed
+        size = self._get_chunk_size(
+            rate * _TARGET_CHUNK_DURATION, self._buffers.count, self._budget
+        )
+        if size != self._buffers.size:
+            LOG.debug(
+                "Adapting the %s transfer chunk size: %s -> %s (%.1f MB/s).",
+                self._name,
+                self._buffers.size,
+                size,
+                rate / 1024 / 1024,
+            )
+            self._buffers.size = size
+
+    def _read(self):
+        error = None
+        try:
+            while not self._stopped.is_set():
+                start = time.monotonic()
+                buffer = self._buffers.acquire(self._stopped)
+                self.reader_wait += time.monotonic() - start
+                if buffer is None:
+                    break
+                count = _read_into(self._source, memoryview(buffer))
+                if not count:
+                    self._buffers.release(buffer)
+                    break
+                self._hash_queue.put((buffer, count))
+        except BaseException as ex:
+            error = ex
+        finally:
+            self._hash_queue.put(_EndOfStream(error))
+
+    def _hash(self):
+        while True:
+            item = self._hash_queue.get()
+            if isinstance(item, _EndOfStream):
+                self._output_queue.put(item)
+                return
+            buffer, count = item
+            if self._stopped.is_set():
+                self._buffers.release(buffer)
+                continue
+            with memoryview(buffer) as view:
+                for hash_obj in self._hashes.values():
+                    hash_obj.update(view[:count])
+            self._output_queue.put(item)
+
+    def __iter__(self) -> typing.Iterator[memoryview]:
+        """Yield the transferred data, blocking until available."""
+        self.start()
+        try:
+            while True:
+                start = time.monotonic()
+                item = self._output_queue.get()
+                self.consumer_wait += time.monotonic() - start
+                if isinstance(item, _EndOfStream):
+                    if item.error:
+                        raise exception.OpenstackMigrateException(
+                            f"Unable to read {self._name}: {item.error!r}"
+                        ) from item.error
+                    break
+                buffer, count = item
+                try:
+                    with memoryview(buffer) as view:
+                        yield view[:count]
+                finally:
+                    self.bytes_transferred += count
+                    self._buffers.release(buffer)
+                self._adapt_chunk_size()
+            self._completed = True
+            self._log_stats()
+        finally:
+            # Stop reading if the consumer failed.
+            self._stopped.set()
+
+    def _log_stats(self):
+        elapsed = max(time.monotonic() - self._start_time, 1e-6)
+        LOG.info(
+            "Transferred %s: %s bytes in %.1fs (%.1f MB/s), "
+            "waiting for destination: %.1fs, waiting for source: %.1fs.",
+            self._name,
+            self.bytes_transferred,
+            elapsed,
+            self.bytes_transferred / elapsed / 1024 / 1024,
+            self.reader_wait,
+            self.consumer_wait,
+        )
+
+    def hexdigests(self) -> dict[str, str]:
+        """Retrieve the data hashes, available once the transfer completes."""
+        if not self._completed:
+            raise exception.OpenstackMigrateException(
+                f"The {self._name} transfer did not complete."
+            )
+        return {
+            algorithm: hash_obj.hexdigest()
+            for algorithm, hash_obj in self._hashes.items()
+        }
@@ -0,0 +1,241 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Resumable Glance image downloads.
+
+Interrupted downloads are resumed from the current offset using HTTP Range
+requests instead of starting over.
+
+The image data may also be spooled to the local disk. The partially
+downloaded file is preserved if the transfer fails, allowing subsequent
+attempts (even from a different process) to continue where the previous one
+stopped. The hash state cannot be persisted, so it is rebuilt by hashing the
+local file prefix, which is considerably cheaper than downloading it again.
+"""
+
+import hashlib
+import io
+import logging
+import mmap
+import os
+import pathlib
+import time
+import typing
+
+import requests
+import urllib3
+from keystoneauth1 import exceptions as ks_exc
+from openstack import exceptions as openstack_exc
+
+from openstack_migrate import config, exception
+from openstack_migrate.transfer import pipeline, sparse
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+# Errors that interrupt the download, which may be resumed.
+_TRANSIENT_ERRORS = (
+    OSError,
+    requests.exceptions.RequestException,
+    urllib3.exceptions.HTTPError,
+    ks_exc.ConnectionError,
+)
+_RETRY_INTERVAL = 2
+PARTIAL_SUFFIX = ".part"
+
+
+def _is_transient(ex: BaseException) -> bool:
+    if isinstance(ex, openstack_exc.HttpException):
+        # Only server side errors are retried.
+        return (ex.status_code or 0) >= 500
+    return True
+
+
+class ImageDataReader(io.RawIOBase):
+    """Read the data of a Glance image, resuming interrupted downloads.
+
+    :param image_proxy: the Glance service proxy (e.g. "connection.image")
+    :param image_id: the image id
+    :param offset: the initial offset
+    :param retries: how many times to resume the download
+    """
+
+    def __init__(
+        self,
+        image_proxy,
+        image_id: str,
+        offset: int = 0,
+        retries: int | None = None,
+    ):
+        super().__init__()
+        self._proxy = image_proxy
+        self._image_id = image_id
+        self._retries = CONF.image_transfer_retries if retries is None else retries
+        self._response: requests.Response | None = None
+        self.offset = offset
+
+    def readable(self) -> bool:
+        """The reader is readable."""
+        return True
+
+    def _open(self) -> requests.Response:
+        headers = {}
+        if self.offset:
+            headers["Range"] = f"bytes={self.offset}-"
+        response = self._proxy.get(
+            f"/images/{self._image_id}/file", stream=True, headers=headers
+        )
+        openstack_exc.raise_from_response(response)
+        if self.offset and response.status_code != 206:
+            response.close()
+            raise exception.NotSupported(
+                "The source image service doesn't support range requests."
+            )
+        return response
+
+    def _close_response(self):
+        if self._response:
+            self._response.close()
+            self._response = None
+
+    def readinto(self, buffer) -> int:
+        """Read data into the specified buffer."""
+        attempt = 0
+        while True:
+            try:
+                if not self._response:
+                    self._response = self._open()
+                count = self._response.raw.readinto(buffer)
+                self.offset += count
+                return count
+            except _TRANSIENT_ERRORS as ex:
+                self._close_response()
+                if attempt >= self._retries or not _is_transient(ex):
+                    raise
+                attempt += 1
+                LOG.warning(
+                    "Image %s download interrupted at offset %s, resuming "
+                    "(attempt %s of %s). Error: %r",
+                    self._image_id,
+                    self.offset,
+                    attempt,
+                    self._retries,
+                    ex,
+                )
+                time.sleep(_RETRY_INTERVAL * attempt)
+
+    def close(self):
+        """Close the underlying response."""
+        self._close_response()
+        super().close()
+
+
+def _hash_file(
+    path: pathlib.Path, hashes: dict[str, typing.Any], chunk_size: int
+) -> int:
+    size = 0
+    with path.open("rb") as f:
+        buffer = bytearray(chunk_size)
+        with memoryview(buffer) as view:
+            while count := f.readinto(buffer):
+                for hash_obj in hashes.values():
+                    hash_obj.update(view[:count])
+                size += count
+    return size
+
+
+def get_spool_path(image_id: str) -> pathlib.Path:
+    """Get the local file used to spool the specified image."""
+    return CONF.temporary_migration_dir / "images" / image_id
+
+
+def spool_image(
+    image_proxy,
+    image_id: str,
+    path: pathlib.Path,
+    chunk_size: int,
+    hash_algorithms: typing.Iterable[str] = ("md5",),
+) -> dict[str, str]:
+    """Download an image to the local disk, returning its hashes.
+
+    Partially downloaded files ("<path>.part") are resumed. The file is
+    renamed once the download completes. All-zero blocks are not written,
+    leaving holes in the resulting sparse file.
+    """
+    hashes = {
+        algorithm: hashlib.new(algorithm, usedforsecurity=False)
+        for algorithm in hash_algorithms
+    }
+    if path.exists():
+        LOG.info("Using previously downloaded image %s: %s", image_id, path)
+        _hash_file(path, hashes, chunk_size)
+        return {
+            algorithm: hash_obj.hexdigest() for algorithm, hash_obj in hashes.items()
+        }
+
+    path.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+    partial_path = path.with_name(path.name + PARTIAL_SUFFIX)
+    offset = 0
+    if partial_path.exists():
+        offset = _hash_file(partial_path, hashes, chunk_size)
+        LOG.info(
+            "Resuming image %s download at offset %s: %s",
+            image_id,
+            offset,
+            partial_path,
+        )
+
+    reader = ImageDataReader(image_proxy, image_id, offset=offset)
+    partial_path.touch(exist_ok=True)
+    skipped = 0
+    with (
+        reader,
+        partial_path.open("r+b") as f,
+        pipeline.TransferPipeline(
+            reader,
+            chunk_size,
+            hashes=hashes,
+            name=f"image {image_id}",
+            adaptive=CONF.image_transfer_adaptive_chunk_size,
+        ) as transfer,
+    ):
+        f.seek(offset)
+        for chunk in transfer:
+            skipped += sparse.write_sparse(f, chunk)
+        # Allocate the trailing holes, if any.
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        hexdigests = transfer.hexdigests()
+
+    if skipped:
+        LOG.info(
+            "Skipped %s zero bytes out of %s while spooling image %s.",
+            skipped,
+            transfer.bytes_transferred,
+            image_id,
+        )
+    partial_path.rename(path)
+    return hexdigests
+
+
+def iter_file_chunks(
+    path: pathlib.Path, chunk_size: int
+) -> typing.Iterator[memoryview]:
+    """Read a local file using memory mapping.
+
+    The chunks reference the page cache directly, avoiding additional copies
+    when passed to the upload request.
+    """
+    with path.open("rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        # The mapping remains valid after closing the file. It is released
+        # once the chunks are no longer referenced, which is why it is not
+        # closed explicitly.
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    view = memoryview(mapped)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset : offset + chunk_size]
@@ -0,0 +1,173 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Sparse image handling.
+
+Raw disk images (e.g. uploaded volumes) are often mostly empty. All-zero
+blocks are detected while spooling the data, which are skipped instead of
+being written to the local disk. Raw images may then be converted to a
+sparse format (e.g. qcow2) using "qemu-img", in which case only the
+allocated data is uploaded to the destination cloud.
+
+Sparse files (e.g. share files) are copied without allocating their holes.
+"""
+
+import errno
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import typing
+
+LOG = logging.getLogger()
+
+# The granularity of the zero block detection.
+ZERO_BLOCK_SIZE = 64 * 1024
+_ZERO_BLOCK = bytes(ZERO_BLOCK_SIZE)
+# The read size used when in-kernel copies are not available.
+_COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def is_zero(view: memoryview) -> bool:
+    """Check whether the buffer contains only zeros.
+
+    The buffer is compared in blocks against a preallocated zero block,
+    returning early once non-zero data is found. "bytes.startswith" accepts
+    the memory view slices as is, using memcmp without copying the data.
+    """
+    for offset in range(0, len(view), ZERO_BLOCK_SIZE):
+        if not _ZERO_BLOCK.startswith(view[offset : offset + ZERO_BLOCK_SIZE]):
+            return False
+    return True
+
+
+def write_sparse(file: typing.BinaryIO, view: memoryview) -> int:
+    """Write the data, seeking over all-zero blocks instead of writing them.
+
+    The file must not be opened in append mode. Trailing holes are only
+    allocated once the file is truncated to its final size.
+
+    Returns the number of skipped bytes.
+    """
+    skipped = 0
+    # The start of the non-zero data that was not written yet.
+    start = 0
+    for offset in range(0, len(view), ZERO_BLOCK_SIZE):
+        block = view[offset : offset + ZERO_BLOCK_SIZE]
+        if not is_zero(block):
+            continue
+        if start < offset:
+            file.write(view[start:offset])
+        file.seek(len(block), os.SEEK_CUR)
+        skipped += len(block)
+        start = offset + len(block)
+    if start < len(view):
+        file.write(view[start:])
+    return skipped
+
+
+def _copy_range(source_fd: int, destination_fd: int, offset: int, length: int):
+    """Copy a byte range, using in-kernel copies where available."""
+    end = offset + length
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < end:
+                count = os.copy_file_range(
+                    source_fd, destination_fd, end - offset, offset, offset
+                )
+                if not count:
+                    return
+                offset += count
+        except OSError as ex:
+            # Not supported by the kernel or across filesystems.
+            if ex.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+    while offset < end:
+        data = os.pread(source_fd, min(end - offset, _COPY_CHUNK_SIZE), offset)
+        if not data:
+            return
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(destination_fd, view, offset)
+            view = view[written:]
+            offset += written
+
+
+def _copy_extents(source_fd: int, destination_fd: int):
+    size = os.fstat(source_fd).st_size
+    offset = 0
+    while offset < size:
+        try:
+            data_start = os.lseek(source_fd, offset, os.SEEK_DATA)
+        except OSError as ex:
+            # No data left, the file ends with a hole.
+            if ex.errno == errno.ENXIO:
+                break
+            raise
+        data_end = os.lseek(source_fd, data_start, os.SEEK_HOLE)
+        _copy_range(source_fd, destination_fd, data_start, data_end - data_start)
+        offset = data_end
+    # Extends the file, leaving the trailing hole unallocated.
+    os.ftruncate(destination_fd, size)
+
+
+def copy_file(source_path: str | pathlib.Path, destination_path: str | pathlib.Path):
+    """Copy a regular file, preserving its holes.
+
+    Files that have unallocated ranges are copied one data extent at a time,
+    the extents being located using SEEK_DATA and SEEK_HOLE. Fully allocated
+    files are copied using "shutil.copyfile" instead.
+    """
+    st = os.stat(source_path)
+    if st.st_blocks * 512 >= st.st_size or not hasattr(os, "SEEK_DATA"):
+        # Uses efficient in-kernel copies where available.
+        shutil.copyfile(source_path, destination_path)
+        return
+
+    source_fd = os.open(source_path, os.O_RDONLY)
+    try:
+        destination_fd = os.open(
+            destination_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666
+        )
+        try:
+            _copy_extents(source_fd, destination_fd)
+        finally:
+            os.close(destination_fd)
+    finally:
+        os.close(source_fd)
+
+
+def qemu_img_available() -> bool:
+    """Check whether "qemu-img" is available locally."""
+    return bool(shutil.which("qemu-img"))
+
+
+def convert_image(
+    source_path: pathlib.Path,
+    destination_path: pathlib.Path,
+    source_format: str,
+    destination_format: str,
+):
+    """Convert a disk image using "qemu-img".
+
+    The zero blocks are not allocated in the resulting image.
+    """
+    LOG.info(
+        "Converting %s image to %s: %s -> %s",
+        source_format,
+        destination_format,
+        source_path,
+        destination_path,
+    )
+    cmd = [
+        "qemu-img",
+        "convert",
+        "-f",
+        source_format,
+        "-O",
+        destination_format,
+        str(source_path),
+        str(destination_path),
+    ]
+    subprocess.check_call(cmd, text=True)
@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tracking of thread pool tasks that may submit further tasks.
+
+Used when walking directory trees, each directory scan submitting tasks for
+the subdirectories and files that it contains.
+"""
+
+import threading
+import typing
+from concurrent import futures
+
+
+class TaskGroup:
+    """Submit tasks to a thread pool and wait for their completion.
+
+    Once a task fails, no other tasks are submitted and the error is raised
+    by "wait".
+
+    :param pool: the thread pool
+    """
+
+    def __init__(self, pool: futures.ThreadPoolExecutor):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._error: BaseException | None = None
+
+    def submit(self, func: typing.Callable, *args):
+        """Submit a task, ignored if a previous task failed."""
+        with self._lock:
+            if self._error:
+                return
+            self._outstanding += 1
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(self._task_done)
+
+    def _task_done(self, future: futures.Future):
+        with self._lock:
+            self._outstanding -= 1
+            if future.exception() and not self._error:
+                self._error = future.exception()
+            self._idle.notify_all()
+
+    def wait(self):
+        """Wait for the submitted tasks, raising the first error, if any."""
+        with self._lock:
+            while self._outstanding:
+                self._idle.wait()
+            if self._error:
+                raise self._error
@@ -0,0 +1,312 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Parallel verification of copied file trees.
+
+Used to check that the destination share matches the source share once the
+data was copied. The directories are compared concurrently and the files are
+hashed on both sides by a pool of worker threads, using large sequential
+reads. The sampling mode only hashes a few blocks spread across each file,
+trading accuracy for speed.
+
+Full verifications produce a content manifest, recording the source file
+digests along with the file attributes. Subsequent incremental copies may
+use it in order to avoid transferring files that were touched but whose
+contents did not change (see "filecopy").
+
+Accessing the share contents requires root privileges, the verification
+being performed by a separate process:
+
+    sudo python -m openstack_migrate.transfer.verify SOURCE DESTINATION
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import stat
+import sys
+import threading
+import typing
+from concurrent import futures
+
+import click
+
+from openstack_migrate import exception
+from openstack_migrate.transfer import tasks
+
+LOG = logging.getLogger()
+
+HASH_ALGORITHM = "sha256"
+READ_SIZE = 8 * 1024 * 1024  # 8MB
+SAMPLE_BLOCK_SIZE = 1024 * 1024  # 1MB
+DEFAULT_WORKERS = 16
+# The maximum number of mismatches included in the verification results.
+MAX_REPORTED_MISMATCHES = 100
+
+
+def hash_file(path: str | pathlib.Path, sample_blocks: int = 0) -> str:
+    """Hash the file contents, returning the hex digest.
+
+    :param path: the file path
+    :param sample_blocks: only hash the specified number of blocks, evenly
+                          spread across the file, 0 to hash the entire file
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if sample_blocks and size > sample_blocks * SAMPLE_BLOCK_SIZE:
+            # The file size is included since the samples do not cover the
+            # entire file.
+            digest.update(str(size).encode())
+            step = (size - SAMPLE_BLOCK_SIZE) // max(sample_blocks - 1, 1)
+            for idx in range(sample_blocks):
+                f.seek(idx * step)
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+            return digest.hexdigest()
+
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        # hashlib releases the GIL while processing large buffers.
+        buffer = bytearray(READ_SIZE)
+        view = memoryview(buffer)
+        while count := f.readinto(buffer):
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+class TreeVerifier:
+    """Compare the contents of two directories using worker threads.
+
+    The file types, sizes, contents and symlink targets are compared, along
+    with the directory entries. The file ownership, permissions and
+    timestamps are not compared.
+
+    :param source_dir: the source directory
+    :param destination_dir: the destination directory
+    :param content_manifest_path: the file in which to record the source file
+                                  digests, ignored when sampling
+    :param workers: the number of worker threads
+    :param sample_blocks: the number of blocks hashed for each file, 0 to hash
+                          the entire files
+    """
+
+    def __init__(
+        self,
+        source_dir: pathlib.Path,
+        destination_dir: pathlib.Path,
+        content_manifest_path: pathlib.Path | None = None,
+        workers: int = DEFAULT_WORKERS,
+        sample_blocks: int = 0,
+    ):
+        if workers < 1:
+            raise exception.InvalidInput(f"Invalid number of workers: {workers}")
+        if sample_blocks < 0:
+            raise exception.InvalidInput(
+                f"Invalid number of sample blocks: {sample_blocks}"
+            )
+        self._source_dir = source_dir
+        self._destination_dir = destination_dir
+        self._content_manifest_path = content_manifest_path
+        self._workers = workers
+        self._sample_blocks = sample_blocks
+
+        self._lock = threading.Lock()
+        self._tasks: tasks.TaskGroup | None = None
+        self._content_entries: list[dict[str, typing.Any]] = []
+        self._mismatches: list[dict[str, str]] = []
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    def run(self) -> dict[str, typing.Any]:
+        """Compare the directories, returning the verification results."""
+        LOG.info(
+            "Verifying %s against %s, workers: %s, sample blocks: %s",
+            self._destination_dir,
+            self._source_dir,
+            self._workers,
+            self._sample_blocks,
+        )
+        with futures.ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="verify"
+        ) as pool:
+            self._tasks = tasks.TaskGroup(pool)
+            self._tasks.submit(self._scan_directory, "")
+            try:
+                self._tasks.wait()
+            except Exception as ex:
+                raise exception.OpenstackMigrateException(
+                    f"Failed to verify {self._destination_dir}: {ex!r}"
+                ) from ex
+            finally:
+                self._tasks = None
+
+        if self._content_manifest_path and not self._sample_blocks:
+            self._write_content_manifest(self._content_manifest_path)
+
+        LOG.info(
+            "Finished verifying %s, files: %s (%s bytes), directories: %s, "
+            "mismatches: %s",
+            self._destination_dir,
+            self.stats["files"],
+            self.stats["bytes"],
+            self.stats["directories"],
+            self.stats["mismatches"],
+        )
+        return {
+            "hash_algo": HASH_ALGORITHM,
+            "sampled": bool(self._sample_blocks),
+            "files": self.stats["files"],
+            "bytes": self.stats["bytes"],
+            "directories": self.stats["directories"],
+            "mismatches": self.stats["mismatches"],
+            "mismatched_paths": self._mismatches,
+        }
+
+    def _submit(self, func: typing.Callable, *args):
+        if not self._tasks:
+            raise exception.OpenstackMigrateException("The worker pool is not running.")
+        self._tasks.submit(func, *args)
+
+    def _add_mismatch(self, rel_path: str, reason: str):
+        LOG.warning("Verification mismatch (%s): %s", reason, rel_path)
+        with self._lock:
+            self.stats["mismatches"] += 1
+            if len(self._mismatches) < MAX_REPORTED_MISMATCHES:
+                self._mismatches.append({"path": rel_path, "reason": reason})
+
+    @staticmethod
+    def _list_directory(path: pathlib.Path) -> dict[str, os.stat_result]:
+        with os.scandir(path) as entries:
+            return {entry.name: entry.stat(follow_symlinks=False) for entry in entries}
+
+    def _scan_directory(self, rel_path: str):
+        with self._lock:
+            self.stats["directories"] += 1
+        source_entries = self._list_directory(self._source_dir / rel_path)
+        try:
+            destination_entries = self._list_directory(self._destination_dir / rel_path)
+        except FileNotFoundError:
+            self._add_mismatch(rel_path, "missing")
+            return
+
+        for name, st in sorted(source_entries.items()):
+            entry_path = os.path.join(rel_path, name)
+            destination_st = destination_entries.get(name)
+            if not destination_st:
+                self._add_mismatch(entry_path, "missing")
+            elif stat.S_IFMT(st.st_mode) != stat.S_IFMT(destination_st.st_mode):
+                self._add_mismatch(entry_path, "type")
+            elif stat.S_ISDIR(st.st_mode):
+                self._submit(self._scan_directory, entry_path)
+            elif stat.S_ISREG(st.st_mode):
+                if st.st_size != destination_st.st_size:
+                    self._add_mismatch(entry_path, "size")
+                else:
+                    self._submit(self._verify_file, entry_path, st, destination_st)
+            elif stat.S_ISLNK(st.st_mode):
+                if os.readlink(self._source_dir / entry_path) != os.readlink(
+                    self._destination_dir / entry_path
+                ):
+                    self._add_mismatch(entry_path, "symlink")
+
+        for name in sorted(destination_entries.keys() - source_entries.keys()):
+            self._add_mismatch(os.path.join(rel_path, name), "unexpected")
+
+    def _verify_file(
+        self, rel_path: str, st: os.stat_result, destination_st: os.stat_result
+    ):
+        try:
+            source_digest = hash_file(self._source_dir / rel_path, self._sample_blocks)
+            destination_digest = hash_file(
+                self._destination_dir / rel_path, self._sample_blocks
+            )
+        except FileNotFoundError:
+            self._add_mismatch(rel_path, "missing")
+            return
+
+        if source_digest != destination_digest:
+            self._add_mismatch(rel_path, "content")
+            return
+
+        with self._lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += st.st_size
+            self._content_entries.append(
+                {
+                    "path": rel_path,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "ino": st.st_ino,
+                    "hash_algo": HASH_ALGORITHM,
+                    "hash_value": source_digest,
+                    # Used to detect destination files that were copied
+                    # again after the verification.
+                    "destination_mtime_ns": destination_st.st_mtime_ns,
+                    "destination_ino": destination_st.st_ino,
+                }
+            )
+
+    def _write_content_manifest(self, path: pathlib.Path):
+        # Replace the previous manifest atomically.
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in self._content_entries)
+        os.replace(tmp_path, path)
+        LOG.info(
+            "Recorded %s content manifest entries: %s",
+            len(self._content_entries),
+            path,
+        )
+
+
+@click.command()
+@click.argument("source_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("destination_dir", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--content-manifest",
+    type=click.Path(dir_okay=False),
+    help="Record the source file digests in the specified file.",
+)
+@click.option("--workers", type=int, default=DEFAULT_WORKERS, show_default=True)
+@click.option(
+    "--sample-blocks",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Only hash the specified number of blocks of each file.",
+)
+@click.option("--debug", is_flag=True, help="Debug logging.")
+def main(
+    source_dir: str,
+    destination_dir: str,
+    content_manifest: str | None,
+    workers: int,
+    sample_blocks: int,
+    debug: bool,
+):
+    """Verify that DESTINATION_DIR matches SOURCE_DIR.
+
+    The verification results are printed to stdout as JSON.
+    """
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s,%(msecs)03d %(levelname)s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    results = TreeVerifier(
+        pathlib.Path(source_dir),
+        pathlib.Path(destination_dir),
+        content_manifest_path=(
+            pathlib.Path(content_manifest) if content_manifest else None
+        ),
+        workers=workers,
+        sample_blocks=sample_blocks,
+    ).run()
+    click.echo(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""Source image URLs used by the Glance "web-download" import method.
+
+The destination Glance service retrieves the image data directly, without
+passing it through the migration host. The source images must be exposed
+through an HTTP(S) endpoint reachable by the destination Glance service,
+e.g. the Swift container used as the source Glance backend or a proxy.
+
+The URLs may be signed using Swift temporary URL keys, limiting their
+validity to "image_web_download_url_ttl" seconds.
+"""
+
+import hmac
+import logging
+import time
+import urllib.parse
+
+from openstack_migrate import config
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+def get_temp_url_signature(
+    key: str, method: str, path: str, expires: int, digest: str = "sha256"
+) -> str:
+    """Compute a Swift temporary URL signature."""
+    body = f"{method}\n{expires}\n{path}"
+    return hmac.new(key.encode(), body.encode(), digest).hexdigest()
+
+
+def get_source_image_url(image_id: str) -> str | None:
+    """Get a short-lived URL of the source image data.
+
+    Returns None if "image_web_download_url" is not configured.
+    """
+    if not CONF.image_web_download_url:
+        return None
+    url = CONF.image_web_download_url.format(image_id=image_id)
+    if not CONF.image_web_download_temp_url_key:
+        return url
+
+    expires = int(time.time()) + CONF.image_web_download_url_ttl
+    parsed = urllib.parse.urlsplit(url)
+    signature = get_temp_url_signature(
+        CONF.image_web_download_temp_url_key, "GET", parsed.path, expires
+    )
+    query = urllib.parse.urlencode(
+        {"temp_url_sig": signature, "temp_url_expires": expires}
+    )
+    if parsed.query:
+        query = f"{parsed.query}&{query}"
+    return urllib.parse.urlunsplit(parsed._replace(query=query))
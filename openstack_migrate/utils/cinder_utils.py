@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import abc
+import contextlib
+import logging
+import socket
+import typing
+import urllib.parse
+
+from openstack_migrate import config, exception
+from openstack_migrate.utils import net_utils
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+
+def get_local_attach_ip(sdk_conn) -> str:
+    """Get the local IP used to access the volumes of the specified cloud."""
+    if CONF.volume_attach_local_ip:
+        return CONF.volume_attach_local_ip
+    endpoint = sdk_conn.block_storage.get_endpoint()
+    endpoint_host = urllib.parse.urlparse(endpoint).hostname
+    if not endpoint_host:
+        raise exception.InvalidInput(f"Invalid block storage endpoint: {endpoint}")
+    return net_utils.get_local_ip_for_remote(socket.gethostbyname(endpoint_host))
+
+
+class VolumeAttacher(abc.ABC):
+    """Attach Cinder volumes to the local host."""
+
+    @abc.abstractmethod
+    def attach_volume(self, sdk_conn, volume) -> typing.ContextManager[str]:
+        """Attach the volume, yielding the local device path.
+
+        The volume is detached when exiting the context.
+        """
+
+
+class OsBrickVolumeAttacher(VolumeAttacher):
+    """Attach volumes using the Cinder attachments API and "os-brick".
+
+    The "os-brick" library is an optional dependency. The connector packages
+    required by the storage backends (e.g. iSCSI initiator, Ceph client) must
+    be installed on the local host.
+    """
+
+    def __init__(self):
+        try:
+            from os_brick.initiator import connector
+        except ImportError as ex:
+            raise exception.NotSupported(
+                "The 'os-brick' library is required in order to attach volumes "
+                "locally. Install 'os-brick' or use the 'glance' volume transfer "
+                "backend."
+            ) from ex
+        self._connector = connector
+
+    @contextlib.contextmanager
+    def attach_volume(self, sdk_conn, volume) -> typing.Iterator[str]:
+        """Attach the volume, yielding the local device path.
+
+        The volume is detached when exiting the context.
+        """
+        connector_properties = self._connector.get_connector_properties(
+            CONF.os_brick_root_helper,
+            get_local_attach_ip(sdk_conn),
+            CONF.os_brick_use_multipath,
+            False,
+        )
+        LOG.info("Attaching volume locally: %s", volume.id)
+        attachment = sdk_conn.block_storage.create_attachment(
+            volume, connector=connector_properties
+        )
+        try:
+            connection_info = attachment.connection_info
+            brick_connector = self._connector.InitiatorConnector.factory(
+                connection_info["driver_volume_type"],
+                CONF.os_brick_root_helper,
+                use_multipath=CONF.os_brick_use_multipath,
+            )
+            device_info = brick_connector.connect_volume(connection_info["data"])
+            try:
+                sdk_conn.block_storage.complete_attachment(attachment)
+                LOG.info("Attached volume %s: %s", volume.id, device_info["path"])
+                yield device_info["path"]
+            finally:
+                LOG.info("Detaching volume: %s", volume.id)
+                brick_connector.disconnect_volume(connection_info["data"], device_info)
+        finally:
+            sdk_conn.block_storage.delete_attachment(attachment)
@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import os
+import threading
+import typing
+
+import openstack
+
+from openstack_migrate import config, constants, exception, ratelimit
+
+CONF = config.get_config()
+LOG = logging.getLogger()
+
+# (cloud name, project id), the project id is None for the default
+# cloud session.
+ConnectionKey = tuple[str, str | None]
+# (cloud name, project id, role name)
+RoleAssignmentKey = tuple[str, str, str]
+
+
+class ConnectionRegistry:
+    """Thread-safe registry of Openstack connections.
+
+    The migration handlers are instantiated on a per-request basis. Sharing
+    the Openstack connections avoids repeated Keystone authentication,
+    catalog retrieval and API version discovery.
+
+    The connections are kept for the lifetime of the process, keystoneauth
+    renewing the tokens once they expire.
+
+    The registry also keeps track of the role assignments that were already
+    confirmed, avoiding repeated role grants when using project scoped
+    connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks: dict[typing.Hashable, threading.Lock] = {}
+        self._connections: dict[ConnectionKey, openstack.connection.Connection] = {}
+        self._role_assignments: set[RoleAssignmentKey] = set()
+
+    def _get_key_lock(self, key: typing.Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_connection(
+        self,
+        cloud_name: str,
+        project_id: str | None = None,
+        connect: typing.Callable[[], openstack.connection.Connection] | None = None,
+    ) -> openstack.connection.Connection:
+        """Get a pooled connection, creating it if necessary.
+
+        :param cloud_name: the cloud name, as defined in the cloud config file
+        :param project_id: optional project id, used for project scoped
+            connections
+        :param connect: callback used to establish the connection. By default,
+            a new connection is established using the cloud config file.
+        """
+        key = (cloud_name, project_id)
+        # Avoid blocking other clouds or projects while authenticating.
+        with self._get_key_lock(key):
+            connection = self._connections.get(key)
+            if not connection:
+                LOG.debug("Establishing Openstack connection: %s", key)
+                connection = connect() if connect else _connect(cloud_name)
+                ratelimit.apply_rate_limits(
+                    connection, cloud_name, ratelimit.get_rate_limiter()
+                )
+                self._connections[key] = connection
+            return connection
+
+    def ensure_role_assignment(
+        self,
+        cloud_name: str,
+        project_id: str,
+        role_name: str,
+        grant: typing.Callable[[], None],
+    ):
+        """Grant a role using the specified callback, unless already confirmed.
+
+        :param cloud_name: the cloud name, as defined in the cloud config file
+        :param project_id: the project in which the role is assigned
+        :param role_name: the assigned role name
+        :param grant: callback used to assign the role
+        """
+        key = (cloud_name, project_id, role_name)
+        with self._get_key_lock(key):
+            if key in self._role_assignments:
+                return
+            grant()
+            self._role_assignments.add(key)
+
+    def clear(self):
+        """Drop the pooled connections and the confirmed role assignments."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._role_assignments.clear()
+            self._key_locks.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as ex:
+                LOG.debug("Unable to close Openstack connection: %r", ex)
+
+
+def _connect(cloud_name: str) -> openstack.connection.Connection:
+    if not CONF.cloud_config_file:
+        raise exception.InvalidInput("No cloud config provided.")
+
+    os.environ["OS_CLIENT_CONFIG_FILE"] = str(CONF.cloud_config_file)
+    return openstack.connect(
+        cloud=cloud_name,
+        compute_api_version=constants.NOVA_MICROVERSION,
+        share_api_version=constants.MANILA_MICROVERSION,
+    )
+
+
+_REGISTRY = ConnectionRegistry()
+
+
+def get_connection(
+    cloud_name: str,
+    project_id: str | None = None,
+    connect: typing.Callable[[], openstack.connection.Connection] | None = None,
+) -> openstack.connection.Connection:
+    """Get a connection from the process-wide connection registry."""
+    return _REGISTRY.get_connection(cloud_name, project_id, connect)
+
+
+def ensure_role_assignment(
+    cloud_name: str,
+    project_id: str,
+    role_name: str,
+    grant: typing.Callable[[], None],
+):
+    """Grant a role, unless already confirmed by the current process."""
+    _REGISTRY.ensure_role_assignment(cloud_name, project_id, role_name, grant)
@@ -1,17 +1,23 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import atexit
 import contextlib
+import functools
 import logging
 import os
-import re
 import socket
 import subprocess
+import threading
+import time
+import typing
 from collections.abc import Generator
+from concurrent import futures
 
 from openstack import exceptions as openstack_exc
 
-from openstack_migrate import config, exception
+from openstack_migrate import config, exception, poller
+from openstack_migrate.utils import net_utils
 
 CONF = config.get_config()
 LOG = logging.getLogger()
@@ -27,73 +33,99 @@ def get_share_export_path(sdk_conn, share_id: str) -> str:
     return export_locations[0].path
 
 
-def _get_local_ip_for_remote(remote_ip: str) -> str:
-    cmd = ["ip", "route", "get", remote_ip]
-    # Determine which local IP will be used to contact the specified remote IP.
-    output = subprocess.check_output(cmd, text=True)
-    # Output examples:
-    #   local 192.168.99.206 dev lo table local src 192.168.99.206 uid 1000
-    #   8.8.8.8 via 192.168.30.1 dev eth0 src 192.168.99.206 uid 1000
-    ips = re.findall(r"src ([\w.:]+)", output)
-    if not ips:
-        raise exception.NotFound(f"Unable to determine the route to {remote_ip}.")
-    return ips[0]
+def wait_for_access_rule(sdk_conn, access_rule):
+    """Wait for the share access rule to become active."""
+    return poller.wait_for_resource_status(
+        sdk_conn,
+        "share-access-rule",
+        access_rule.id,
+        list_resources=functools.partial(
+            sdk_conn.shared_file_system.access_rules, access_rule.share_id
+        ),
+        get_resource=sdk_conn.shared_file_system.get_access_rule,
+        status="active",
+        failures=["error"],
+        attribute="state",
+        timeout=CONF.resource_creation_timeout,
+        group_id=access_rule.share_id,
+    )
 
 
-@contextlib.contextmanager
-def temporary_share_access(sdk_conn, share, export_path: str, access_level="rw"):
+def get_local_access_ip(export_path: str) -> str:
+    """Get the local IP used to access the specified share export."""
     if CONF.manila_local_access_ip:
-        access_ip = CONF.manila_local_access_ip
-    else:
-        export_address = export_path.split("/", 1)[0].strip(":")
-        export_ip = socket.gethostbyname(export_address)
-        access_ip = _get_local_ip_for_remote(export_ip)
+        return CONF.manila_local_access_ip
+    export_address = export_path.split("/", 1)[0].strip(":")
+    export_ip = socket.gethostbyname(export_address)
+    return net_utils.get_local_ip_for_remote(export_ip)
+
 
+def _find_access_rule(sdk_conn, share, access_ip: str, access_level: str):
     try:
-        existing_rules = sdk_conn.shared_file_system.access_rules(share)
-        for rule in existing_rules:
+        for rule in sdk_conn.shared_file_system.access_rules(share):
             if (
                 rule.access_to == access_ip
                 and rule.access_level == access_level
                 and rule.access_type == "ip"
             ):
-                LOG.info("Share access already provided: %s", rule.id)
-                yield
-                return
+                return rule
     except openstack_exc.NotFoundException:
         # No access rules have been defined yet.
         pass
+    return None
+
+
+def _create_temporary_access_rule(sdk_conn, share, access_ip: str, access_level: str):
+    LOG.info("Adding temporary share access rule: %s to ip %s", share.id, access_ip)
+    access_rule = sdk_conn.shared_file_system.create_access_rule(
+        share.id, access_to=access_ip, access_type="ip", access_level=access_level
+    )
+    LOG.info("Waiting for share access rule to become active.")
+    wait_for_access_rule(sdk_conn, access_rule)
+    return access_rule
 
+
+def _delete_temporary_access_rule(sdk_conn, share_id: str, access_rule_id: str):
+    LOG.info("Deleting temporary share access rule: %s (%s)", share_id, access_rule_id)
+    try:
+        sdk_conn.shared_file_system.delete_access_rule(access_rule_id, share_id)
+    except openstack_exc.NotFoundException:
+        LOG.debug("Share access rule already removed: %s", access_rule_id)
+
+
+@contextlib.contextmanager
+def temporary_share_access(sdk_conn, share, export_path: str, access_level="rw"):
+    access_ip = get_local_access_ip(export_path)
+    rule = _find_access_rule(sdk_conn, share, access_ip, access_level)
+    if rule:
+        LOG.info("Share access already provided: %s", rule.id)
+        yield
+        return
+
+    access_rule = _create_temporary_access_rule(
+        sdk_conn, share, access_ip, access_level
+    )
     try:
-        LOG.info("Adding temporary share access rule: %s to ip %s", share.id, access_ip)
-        access_rule = sdk_conn.shared_file_system.create_access_rule(
-            share.id, access_to=access_ip, access_type="ip", access_level=access_level
-        )
-        LOG.info("Waiting for share access rule to become active.")
-        sdk_conn.shared_file_system.wait_for_status(
-            access_rule,
-            status="active",
-            attribute="state",
-            failures=["error"],
-            interval=5,
-            wait=CONF.resource_creation_timeout,
-        )
         yield
     finally:
-        LOG.info(
-            "Deleting temporary share access rule: %s to ip %s", share.id, access_ip
-        )
-        sdk_conn.shared_file_system.delete_access_rule(access_rule.id, share.id)
+        _delete_temporary_access_rule(sdk_conn, share.id, access_rule.id)
+
+
+def _make_mountpoint(share_id: str) -> str:
+    mount_dirname = f"{share_id}.{int.from_bytes(os.urandom(4))}"
+    mountpoint = str(CONF.temporary_migration_dir / mount_dirname)
+    os.makedirs(mountpoint)
+    return mountpoint
 
 
 @contextlib.contextmanager
 def mounted_nfs_share(sdk_conn, share, access_level="rw") -> Generator[str]:
-    export_path = get_share_export_path(sdk_conn, share.id)
+    """Temporarily mount the specified share.
 
-    base_dir = CONF.temporary_migration_dir
-    mount_dirname = f"{share.id}.{int.from_bytes(os.urandom(4))}"
-    mountpoint = str(base_dir / mount_dirname)
-    os.makedirs(mountpoint)
+    Unlike the mount manager, the share is unmounted when exiting the context.
+    """
+    export_path = get_share_export_path(sdk_conn, share.id)
+    mountpoint = _make_mountpoint(share.id)
 
     with temporary_share_access(sdk_conn, share, export_path, access_level):
         mount_nfs_share(export_path, mountpoint)
@@ -104,6 +136,258 @@ def mounted_nfs_share(sdk_conn, share, access_level="rw") -> Generator[str]:
             os.rmdir(mountpoint)
 
 
+class _ShareMount:
+    def __init__(self, key: tuple[str, str, str]):
+        self.key = key
+        self.mountpoint: str | None = None
+        # The temporary access rule, None if the access was already provided.
+        self.access_rule_id: str | None = None
+        self.sdk_conn = None
+        self.users = 0
+        self.last_used = 0.0
+        self.ready = False
+        self.failed = False
+
+
+class ShareMountManager:
+    """Mount Manila shares, reusing the mounts throughout the run.
+
+    Shares remain mounted after being used unless "manila_reuse_mounts" is
+    disabled, allowing subsequent operations (e.g. delta syncs) to skip the
+    access rule creation and the mount. At most "manila_max_mounted_shares"
+    shares are mounted at a time, the least recently used idle shares being
+    unmounted when reaching the limit. The remaining shares are unmounted at
+    the end of the run.
+
+    :param max_mounts: the mounted share limit, unlimited if 0
+    :param reuse_mounts: whether to keep the shares mounted after use
+    """
+
+    def __init__(self, max_mounts: int | None = None, reuse_mounts: bool | None = None):
+        self._max_mounts = (
+            CONF.manila_max_mounted_shares if max_mounts is None else max_mounts
+        )
+        self._reuse_mounts = (
+            CONF.manila_reuse_mounts if reuse_mounts is None else reuse_mounts
+        )
+        self._cond = threading.Condition()
+        self._mounts: dict[tuple[str, str, str], _ShareMount] = {}
+        # The local access IPs, keyed by export host.
+        self._access_ips: dict[str, str] = {}
+
+    @contextlib.contextmanager
+    def mounted_shares(
+        self, *shares: tuple[typing.Any, typing.Any], access_level="rw"
+    ) -> Generator[list[str]]:
+        """Mount the specified shares, yielding the mountpoints.
+
+        :param shares: (sdk connection, share) tuples
+
+        The shares are mounted concurrently. The mount slots are reserved at
+        once, preventing concurrent callers from waiting for each other.
+        """
+        requests = {
+            (sdk_conn.config.name, share.id, access_level): (sdk_conn, share)
+            for sdk_conn, share in shares
+        }
+        mounts, new_mounts, evicted = self._reserve(list(requests))
+        try:
+            for mount in evicted:
+                self._teardown_quietly(mount)
+            if new_mounts:
+                with futures.ThreadPoolExecutor(
+                    max_workers=len(new_mounts), thread_name_prefix="mount"
+                ) as pool:
+                    setup_futures = [
+                        pool.submit(
+                            self._setup, mount, *requests[mount.key], access_level
+                        )
+                        for mount in new_mounts
+                    ]
+                for future in setup_futures:
+                    future.result()
+            self._wait_ready(mounts)
+            yield [typing.cast(str, mount.mountpoint) for mount in mounts]
+        finally:
+            self._release(mounts)
+
+    def _reserve(self, keys: list[tuple[str, str, str]]):
+        if self._max_mounts and len(set(keys)) > self._max_mounts:
+            raise exception.InvalidInput(
+                f"Unable to mount {len(keys)} shares, the mounted share limit "
+                f"is {self._max_mounts}."
+            )
+        waiting = False
+        with self._cond:
+            while True:
+                missing = {key for key in keys if key not in self._mounts}
+                idle = sorted(
+                    (
+                        mount
+                        for mount in self._mounts.values()
+                        if mount.ready and not mount.users and mount.key not in keys
+                    ),
+                    key=lambda mount: mount.last_used,
+                )
+                excess = (
+                    len(self._mounts) + len(missing) - self._max_mounts
+                    if self._max_mounts
+                    else 0
+                )
+                if excess <= len(idle):
+                    evicted = idle[: max(excess, 0)]
+                    for mount in evicted:
+                        del self._mounts[mount.key]
+                    mounts = []
+                    new_mounts = []
+                    for key in keys:
+                        if key not in self._mounts:
+                            self._mounts[key] = _ShareMount(key)
+                            new_mounts.append(self._mounts[key])
+                        self._mounts[key].users += 1
+                        mounts.append(self._mounts[key])
+                    return mounts, new_mounts, evicted
+
+                if not waiting:
+                    LOG.info(
+                        "Reached the mounted share limit (%s), waiting for "
+                        "other share transfers to complete.",
+                        self._max_mounts,
+                    )
+                    waiting = True
+                self._cond.wait()
+
+    def _get_access_ip(self, export_path: str) -> str:
+        export_host = export_path.split("/", 1)[0].strip(":")
+        with self._cond:
+            access_ip = self._access_ips.get(export_host)
+        if not access_ip:
+            access_ip = get_local_access_ip(export_path)
+            with self._cond:
+                self._access_ips[export_host] = access_ip
+        return access_ip
+
+    def _setup(self, mount: _ShareMount, sdk_conn, share, access_level: str):
+        try:
+            mount.sdk_conn = sdk_conn
+            export_path = get_share_export_path(sdk_conn, share.id)
+            access_ip = self._get_access_ip(export_path)
+            rule = _find_access_rule(sdk_conn, share, access_ip, access_level)
+            if rule:
+                LOG.info("Share access already provided: %s", rule.id)
+            else:
+                rule = _create_temporary_access_rule(
+                    sdk_conn, share, access_ip, access_level
+                )
+                mount.access_rule_id = rule.id
+
+            mountpoint = _make_mountpoint(share.id)
+            try:
+                mount_nfs_share(export_path, mountpoint)
+            except Exception:
+                os.rmdir(mountpoint)
+                raise
+            mount.mountpoint = mountpoint
+        except Exception:
+            with self._cond:
+                mount.failed = True
+                self._mounts.pop(mount.key, None)
+                self._cond.notify_all()
+            self._teardown_quietly(mount)
+            raise
+
+        with self._cond:
+            mount.ready = True
+            self._cond.notify_all()
+
+    def _wait_ready(self, mounts: list[_ShareMount]):
+        with self._cond:
+            for mount in mounts:
+                while not mount.ready and not mount.failed:
+                    self._cond.wait()
+                if mount.failed:
+                    raise exception.OpenstackMigrateException(
+                        f"Unable to mount share: {mount.key[1]}"
+                    )
+
+    def _release(self, mounts: list[_ShareMount]):
+        unused = []
+        with self._cond:
+            for mount in mounts:
+                mount.users -= 1
+                mount.last_used = time.monotonic()
+                if not mount.users and (not self._reuse_mounts or mount.failed):
+                    if self._mounts.get(mount.key) is mount:
+                        del self._mounts[mount.key]
+                    if not mount.failed:
+                        unused.append(mount)
+            self._cond.notify_all()
+        for mount in unused:
+            self._teardown(mount)
+
+    def _teardown(self, mount: _ShareMount):
+        """Unmount the share and remove the temporary access rule."""
+        if mount.mountpoint:
+            unmount_nfs_share(mount.mountpoint)
+            os.rmdir(mount.mountpoint)
+            mount.mountpoint = None
+        if mount.access_rule_id:
+            _delete_temporary_access_rule(
+                mount.sdk_conn, mount.key[1], mount.access_rule_id
+            )
+            mount.access_rule_id = None
+
+    def release_share(self, cloud_name: str, share_id: str):
+        """Unmount the specified share, e.g. before deleting it."""
+        with self._cond:
+            mounts = [
+                mount
+                for key, mount in self._mounts.items()
+                if key[:2] == (cloud_name, share_id) and mount.ready and not mount.users
+            ]
+            for mount in mounts:
+                del self._mounts[mount.key]
+            self._cond.notify_all()
+        for mount in mounts:
+            self._teardown(mount)
+
+    def unmount_all(self):
+        """Unmount the idle shares, called at the end of the run."""
+        with self._cond:
+            mounts = [
+                mount
+                for mount in self._mounts.values()
+                if mount.ready and not mount.users
+            ]
+            for mount in mounts:
+                del self._mounts[mount.key]
+        for mount in mounts:
+            self._teardown_quietly(mount)
+
+    def _teardown_quietly(self, mount: _ShareMount):
+        try:
+            self._teardown(mount)
+        except Exception as ex:
+            LOG.error("Unable to unmount share %s: %r", mount.key[1], ex)
+
+
+_MOUNT_MANAGER: ShareMountManager | None = None
+_MOUNT_MANAGER_LOCK = threading.Lock()
+
+
+def get_mount_manager() -> ShareMountManager:
+    """Retrieve the process-wide share mount manager.
+
+    The remaining shares are unmounted when the process exits.
+    """
+    global _MOUNT_MANAGER
+    with _MOUNT_MANAGER_LOCK:
+        if not _MOUNT_MANAGER:
+            _MOUNT_MANAGER = ShareMountManager()
+            atexit.register(_MOUNT_MANAGER.unmount_all)
+        return _MOUNT_MANAGER
+
+
 def mount_nfs_share(export_path: str, mountpoint: str):
     LOG.info("Mounting nfs share %s to %s.", export_path, mountpoint)
     cmd = ["sudo", "mount", "-v", "-t", "nfs", export_path, mountpoint]
@@ -0,0 +1,20 @@
+# SPDX-FileCopyrightText: 2025 - Canonical Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+import subprocess
+
+from openstack_migrate import exception
+
+
+def get_local_ip_for_remote(remote_ip: str) -> str:
+    """Get the local IP used to contact the specified remote IP."""
+    cmd = ["ip", "route", "get", remote_ip]
+    output = subprocess.check_output(cmd, text=True)
+    # Output examples:
+    #   local 192.168.99.206 dev lo table local src 192.168.99.206 uid 1000
+    #   8.8.8.8 via 192.168.30.1 dev eth0 src 192.168.99.206 uid 1000
+    ips = re.findall(r"src ([\w.:]+)", output)
+    if not ips:
+        raise exception.NotFound(f"Unable to determine the route to {remote_ip}.")
+    return ips[0]